@@ -0,0 +1,77 @@
+import os
+import tempfile
+import threading
+
+
+class AnnotationCache:
+    """
+    Size-bounded on-disk cache of rendered JPEGs.
+
+    Files are named by their cache key and served as bytes. A hit refreshes the file's mtime, and
+    whenever the total size exceeds `max_bytes` the least recently used files
+    are deleted first. Writes go through a temp file, so concurrent requests
+    never serve a half-written image.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    def get(self, key):
+        """
+        Bytes of the cached image for `key`, or None. The bytes are read
+        here rather than handing out the path, so a concurrent eviction
+        can't delete the file before the response is sent.
+        """
+        path = self.path(key)
+        try:
+            os.utime(path)  # mark as recently used
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        path = self.path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def size(self):
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.jpg'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, entry.path, stat.st_size))
+        return entries
+
+    def evict(self):
+        """Deletes least recently used images until the cache fits in `max_bytes`."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+            for _, path, size in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
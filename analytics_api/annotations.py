@@ -0,0 +1,91 @@
+import os
+import json
+import hashlib
+
+from annotation_cache import AnnotationCache
+
+# Project root the stored image paths are resolved against
+PROJECT_ROOT = os.getenv('PROJECT_ROOT', '..')
+ANNOTATION_CACHE_DIR = os.getenv('ANNOTATION_CACHE_DIR', os.path.join(PROJECT_ROOT, 'data/cache/annotated'))
+ANNOTATION_CACHE_MB = int(os.getenv('ANNOTATION_CACHE_MB', 256))
+JPEG_QUALITY = int(os.getenv('ANNOTATION_JPEG_QUALITY', 85))
+
+cache = AnnotationCache(ANNOTATION_CACHE_DIR, ANNOTATION_CACHE_MB * 1024 * 1024)
+
+# A few distinct BGR colours, picked by class id
+PALETTE = [(56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207),
+           (10, 249, 72), (23, 204, 146), (134, 219, 61), (211, 188, 0), (209, 85, 0)]
+
+
+class RendererUnavailable(RuntimeError):
+    """OpenCV is not installed, so images can't be annotated here."""
+
+
+def resolve_image_path(stored_path):
+    """Stored paths are relative to the detection script (../../data/...); re-anchor them."""
+    parts = os.path.normpath(stored_path).split(os.sep)
+    while parts and parts[0] == '..':
+        parts.pop(0)
+    return os.path.join(PROJECT_ROOT, *parts)
+
+
+def cache_key(channel_name, message_id, rows):
+    """Changes whenever the image's detections change, so stale renders are never served."""
+    payload = json.dumps([channel_name, message_id, rows], default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def render(image_path, detections):
+    """Draws boxes and labels on the image and returns the JPEG bytes."""
+    # Imported here so the rest of the API runs without OpenCV
+    try:
+        import cv2
+    except ImportError as e:
+        raise RendererUnavailable("opencv is not installed") from e
+
+    image = cv2.imread(image_path)
+    if image is None:
+        raise FileNotFoundError(image_path)
+
+    thickness = max(2, round(sum(image.shape[:2]) / 600))
+    for d in detections:
+        if d["box"] is None:
+            continue
+        color = PALETTE[(d["class_id"] or 0) % len(PALETTE)]
+        x1, y1, x2, y2 = (int(v) for v in d["box"])
+        cv2.rectangle(image, (x1, y1), (x2, y2), color, thickness)
+        caption = f'{d["label"]} {float(d["confidence"]):.2f}'
+        (tw, th), _ = cv2.getTextSize(caption, cv2.FONT_HERSHEY_SIMPLEX, thickness / 4, 1)
+        top = max(y1 - th - 4, 0)
+        cv2.rectangle(image, (x1, top), (x1 + tw + 4, top + th + 4), color, -1)
+        cv2.putText(image, caption, (x1 + 2, top + th + 1), cv2.FONT_HERSHEY_SIMPLEX,
+                    thickness / 4, (255, 255, 255), 1, cv2.LINE_AA)
+
+    ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+    if not ok:
+        raise ValueError(f"could not encode {image_path}")
+    return encoded.tobytes()
+
+
+def annotated_image(channel_name, message_id, rows):
+    """
+    The annotated JPEG (bytes) for one image, rendered on first request and
+    served from the cache afterwards. `rows` are its raw.media_detections rows.
+    """
+    key = cache_key(channel_name, message_id, [tuple(row) for row in rows])
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    detections = [
+        {
+            "label": row.label,
+            "class_id": row.class_id,
+            "confidence": row.confidence,
+            "box": None if row.box_x1 is None else (row.box_x1, row.box_y1, row.box_x2, row.box_y2),
+        }
+        for row in rows if row.label != "no_object_detected"
+    ]
+    image = render(resolve_image_path(rows[0].image_path), detections)
+    cache.put(key, image)
+    return image
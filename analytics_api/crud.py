@@ -41,4 +41,29 @@ def get_product_pricing(product_name: str, db: Session):
         WHERE product_name ILIKE :product_name
         ORDER BY channel_name
     """)
-    return db.execute(sql, {"product_name": product_name}).fetchall()
\ No newline at end of file
+    return db.execute(sql, {"product_name": product_name}).fetchall()
+
+from sqlalchemy.exc import ProgrammingError
+
+# Postgres error codes for a missing column / table
+UNDEFINED_COLUMN, UNDEFINED_TABLE = "42703", "42P01"
+
+class DetectionsUnavailable(Exception):
+    """raw.media_detections is missing, or predates its box columns."""
+
+def get_image_detections(channel_name: str, message_id: int, db: Session):
+    sql = text("""
+        SELECT image_path, label, confidence, class_id, box_x1, box_y1, box_x2, box_y2
+        FROM raw.media_detections
+        WHERE channel_name = :channel_name AND message_id = :message_id
+        ORDER BY detection_id
+    """)
+    try:
+        return db.execute(sql, {"channel_name": channel_name, "message_id": message_id}).fetchall()
+    except ProgrammingError as e:
+        if getattr(e.orig, "pgcode", None) not in (UNDEFINED_COLUMN, UNDEFINED_TABLE):
+            raise
+        db.rollback()
+        raise DetectionsUnavailable(
+            "raw.media_detections has no detection boxes yet; run scripts/load_media_detections.py to migrate it"
+        ) from e
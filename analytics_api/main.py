@@ -107,3 +107,31 @@ def product_pricing(product_name: str, db: Session = Depends(get_db)):
     )
     json_str = json.dumps(response.dict(), indent=2, ensure_ascii=False, default=str)
     return Response(content=json_str, media_type="application/json", status_code=200)
+
+
+from crud import get_image_detections, DetectionsUnavailable
+from annotations import annotated_image, RendererUnavailable
+
+@app.get("/api/media/{channel_name}/{message_id}/annotated")
+def annotated_media(channel_name: str, message_id: int, db: Session = Depends(get_db)):
+    """
+    The image with its YOLO detections drawn on. Rendered on first request
+    from the stored boxes and cached on disk (size-bounded, least recently
+    used evicted first).
+    """
+    try:
+        rows = get_image_detections(channel_name, message_id, db)
+        if not rows:
+            raise FileNotFoundError
+        image = annotated_image(channel_name, message_id, rows)
+    except FileNotFoundError:
+        response = StandardResponse(success=False, count=0, data=[])
+        return Response(content=json.dumps(response.dict(), indent=2, ensure_ascii=False), media_type="application/json", status_code=404)
+    except DetectionsUnavailable as e:
+        response = dict(StandardResponse(success=False, count=0, data=[]).dict(), detail=str(e))
+        return Response(content=json.dumps(response, indent=2, ensure_ascii=False), media_type="application/json", status_code=503)
+    except RendererUnavailable:
+        response = StandardResponse(success=False, count=0, data=[])
+        return Response(content=json.dumps(response.dict(), indent=2, ensure_ascii=False), media_type="application/json", status_code=503)
+
+    return Response(content=image, media_type="image/jpeg")
@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 def load_credentials(env_path='../.env'):
@@ -17,4 +18,21 @@ def load_db_credentials(env_path='../.env'):
         'db_password': os.getenv('POSTGRES_PASSWORD'),
         'db_host': os.getenv('DB_HOST', 'localhost'),
         'db_port': int(os.getenv('DB_PORT', 5431))
-    }
\ No newline at end of file
+    }
+
+def load_channel_registry(path='../config/channels.json'):
+    """
+    Reads the channel registry: a list of channels with flags for which
+    passes (messages / media) to scrape. Disabled channels are dropped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        registry = json.load(f)
+    return [
+        {
+            'name': ch['name'] if ch['name'].startswith('@') else f"@{ch['name']}",
+            'messages': ch.get('messages', True),
+            'media': ch.get('media', False),
+        }
+        for ch in registry['channels']
+        if ch.get('enabled', True)
+    ]
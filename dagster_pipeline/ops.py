@@ -39,6 +39,14 @@ def load_media_index(context, scrape_result):
 @op
 def run_yolo_enrichment(context, scrape_result):
     context.log.info(f"Running YOLO enrichment after: {scrape_result}")
+    # Prefer the resident inference worker: its model is already loaded
+    from src.models.inference_client import InferenceClient
+    client = InferenceClient()
+    if client.available():
+        summary = client.run_index()
+        context.log.info(f"YOLO enrichment complete on the inference worker: {summary}")
+        return "yolo_done"
+    context.log.info("No inference worker running; starting the detection script.")
     script_path = os.path.join(os.getcwd(), "src", "models", "run_yolov8_detection.py")
     result = subprocess.run([sys.executable, script_path], capture_output=True, text=True)
     context.log.info(result.stdout)
@@ -3,16 +3,13 @@ import sys
 import json
 import logging
 import psycopg2
-from psycopg2.extras import DictCursor
+from psycopg2.extras import DictCursor, execute_values
 
 # 🧠 Import your extractors
 sys.path.append(os.path.abspath("../"))  # Adjust path as needed
 from config.config import load_db_credentials
-from src.utils.Extractors import (
-    extract_price,
-    extract_health_flag,
-    extract_channel_products
-)
+from src.utils.Extractors import extract_batch
+from src.utils.enrichment_cache import EnrichmentCache
 
 # ✅ Logging setup
 logging.basicConfig(
@@ -22,6 +19,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ⚙️ Worker processes for extraction (defaults to all cores)
+ENRICH_WORKERS = int(os.getenv("ENRICH_WORKERS", os.cpu_count() or 1))
+
+# 🗃️ Persistent enrichment cache — reposted messages are not re-extracted
+ENRICH_CACHE_PATH = os.getenv("ENRICH_CACHE_PATH", "../data/cache/enrichment_cache.sqlite")
+
 # 🔌 Load DB credentials and connect
 logger.info("🔑 Loading DB credentials...")
 creds = load_db_credentials("../.env")
@@ -60,37 +63,42 @@ def enrich_messages():
             rows = cur.fetchall()
             logger.info(f"🔧 Processing {len(rows)} messages...")
 
-            for row in rows:
-                channel = row["channel_name"]
-                msg_id = row["message_id"]
-                text = row["message_text"]
-
-                # 🧪 Run extractors
-                price_list = extract_price(text)
-                product_list = extract_channel_products(text, channel)
-                health_flag = extract_health_flag(text)
-
-                # 🧼 Normalize values
-                main_price = price_list[0] if price_list and product_list else None
-                product_str = " | ".join(product_list) if product_list else None
+            # 🧪 Run extractors across all cores, skipping cached messages
+            os.makedirs(os.path.dirname(ENRICH_CACHE_PATH), exist_ok=True)
+            cache = EnrichmentCache(db_path=ENRICH_CACHE_PATH)
+            try:
+                enriched = extract_batch(
+                    [row["message_text"] for row in rows],
+                    [row["channel_name"] for row in rows],
+                    workers=ENRICH_WORKERS,
+                    cache=cache,
+                )
+                logger.info(f"🗃️ Enrichment cache: {cache.hits} hits, {cache.misses} misses")
+            finally:
+                cache.close()
 
-                # 📥 Insert enriched data
-                cur.execute("""
-                    INSERT INTO raw.telegram_enriched (
-                        channel_name,
-                        message_id,
-                        product_names,
-                        main_price,
-                        is_health_related
-                    )
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (channel_name, message_id) DO UPDATE SET
-                        product_names = EXCLUDED.product_names,
-                        main_price = EXCLUDED.main_price,
-                        is_health_related = EXCLUDED.is_health_related;
-                """, (
-                    channel, msg_id, product_str, main_price, health_flag
-                ))
+            # 📥 Bulk insert enriched data
+            values = list(zip(
+                [row["channel_name"] for row in rows],
+                [row["message_id"] for row in rows],
+                enriched["product_names"],
+                enriched["main_price"],
+                enriched["is_health_related"],
+            ))
+            execute_values(cur, """
+                INSERT INTO raw.telegram_enriched (
+                    channel_name,
+                    message_id,
+                    product_names,
+                    main_price,
+                    is_health_related
+                )
+                VALUES %s
+                ON CONFLICT (channel_name, message_id) DO UPDATE SET
+                    product_names = EXCLUDED.product_names,
+                    main_price = EXCLUDED.main_price,
+                    is_health_related = EXCLUDED.is_health_related;
+            """, values, page_size=1000)
 
             logger.info("✅ All messages enriched and loaded.")
             conn.commit()
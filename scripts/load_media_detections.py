@@ -1,13 +1,16 @@
 import os
 import sys
 import json
+import hashlib
 import logging
 import psycopg2
-from psycopg2.extras import DictCursor
+from psycopg2.extras import DictCursor, execute_values
 from datetime import datetime
 
 sys.path.append(os.path.abspath("../"))
 from config.config import load_db_credentials
+from src.utils.ndjson import iter_ndjson
+from src.utils.load_manifest import LoadManifest
 
 # 🧾 Logging setup
 logging.basicConfig(
@@ -29,6 +32,11 @@ conn = psycopg2.connect(
     port=creds["db_port"]
 )
 
+INPUT_PATH = "../data/processed/media_detection_results.jsonl"
+LEGACY_INPUT_PATH = "../data/processed/media_detection_results.json"
+# Images per DELETE/INSERT round trip
+CHUNK_SIZE = int(os.getenv('DETECTION_LOAD_CHUNK', 1000))
+
 # 🧱 Create table with surrogate key
 def create_detection_table():
     with conn.cursor() as cur:
@@ -42,55 +50,157 @@ def create_detection_table():
                 label TEXT,
                 confidence NUMERIC
             );
+            CREATE INDEX IF NOT EXISTS media_detections_image_idx
+                ON raw.media_detections (channel_name, message_id);
+
+            -- Raw boxes (original image pixels) for on-demand annotation rendering
+            ALTER TABLE raw.media_detections
+                ADD COLUMN IF NOT EXISTS class_id INTEGER,
+                ADD COLUMN IF NOT EXISTS box_x1 REAL,
+                ADD COLUMN IF NOT EXISTS box_y1 REAL,
+                ADD COLUMN IF NOT EXISTS box_x2 REAL,
+                ADD COLUMN IF NOT EXISTS box_y2 REAL;
+
+            -- Fingerprint of each image's loaded record, so unchanged images are skipped
+            CREATE TABLE IF NOT EXISTS raw.media_detection_state (
+                channel_name TEXT,
+                message_id INTEGER,
+                fingerprint TEXT,
+                PRIMARY KEY (channel_name, message_id)
+            );
         """)
     conn.commit()
     logger.info("✅ Table ready.")
 
-# 📥 Load JSON and insert detections
+def detection_rows(entry):
+    """Rows for one image; images without detections get a "no_object_detected" row."""
+    msg_id = entry["message_id"]
+    channel = entry["channel_name"]
+    image_path = entry["image_path"]
+    detections = entry.get("detections", [])
+
+    # Handle empty detections
+    if not detections:
+        return [(msg_id, channel, image_path, "no_object_detected", None, None, None, None, None, None)]
+    return [
+        (msg_id, channel, image_path, d.get("label"), d.get("confidence"), d.get("class_id"),
+         *(d.get("box") or (None, None, None, None)))
+        for d in detections
+    ]
+
+
+def replace_detections(cur, entries):
+    """Deletes the images' previous detections and inserts the new rows."""
+    images = [(entry["channel_name"], entry["message_id"]) for entry in entries]
+    rows = [row for entry in entries for row in detection_rows(entry)]
+    execute_values(cur, """
+        DELETE FROM raw.media_detections AS d
+        USING (VALUES %s) AS img (channel_name, message_id)
+        WHERE d.channel_name = img.channel_name AND d.message_id = img.message_id;
+    """, images, page_size=1000)
+    execute_values(cur, """
+        INSERT INTO raw.media_detections (
+            message_id, channel_name, image_path, label, confidence,
+            class_id, box_x1, box_y1, box_x2, box_y2
+        ) VALUES %s;
+    """, rows, page_size=1000)
+    return len(rows)
+
+
+def record_fingerprint(entry):
+    """
+    Changes whenever the image's rows would: new image content, a different
+    model's detections, or a moved file.
+    """
+    payload = json.dumps([entry["image_path"], entry.get("content_hash"), entry.get("detections", [])],
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def changed_entries(cur, entries):
+    """The entries whose record differs from what was last loaded for that image."""
+    fingerprints = {(entry["channel_name"], entry["message_id"]): record_fingerprint(entry) for entry in entries}
+    changed = execute_values(cur, """
+        SELECT img.channel_name, img.message_id
+        FROM (VALUES %s) AS img (channel_name, message_id, fingerprint)
+        LEFT JOIN raw.media_detection_state AS s
+            ON s.channel_name = img.channel_name AND s.message_id = img.message_id
+        WHERE s.fingerprint IS DISTINCT FROM img.fingerprint;
+    """, [key + (fingerprint,) for key, fingerprint in fingerprints.items()], page_size=1000, fetch=True)
+    changed = {(row[0], row[1]) for row in changed}
+    entries = [entry for entry in entries if (entry["channel_name"], entry["message_id"]) in changed]
+
+    if entries:
+        execute_values(cur, """
+            INSERT INTO raw.media_detection_state (channel_name, message_id, fingerprint)
+            VALUES %s
+            ON CONFLICT (channel_name, message_id) DO UPDATE SET fingerprint = EXCLUDED.fingerprint;
+        """, [(e["channel_name"], e["message_id"], fingerprints[(e["channel_name"], e["message_id"])])
+              for e in entries], page_size=1000)
+    return entries
+
+
+def load_chunk(cur, entries):
+    """Replaces detections for the chunk's new or changed images; returns (images, rows) written."""
+    entries = changed_entries(cur, entries)
+    if not entries:
+        return 0, 0
+    return len(entries), replace_detections(cur, entries)
+
+
+def iter_detection_file(path):
+    """Detection records from the JSONL output (or a legacy JSON array)."""
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            yield from json.load(f)
+    else:
+        yield from iter_ndjson(path)
+
+
+# 📥 Stream detections and replace them per image
 def ingest_detections():
-    input_path = "../data/processed/media_detection_results.json"
+    input_path = INPUT_PATH if os.path.isfile(INPUT_PATH) else LEGACY_INPUT_PATH
 
     if not os.path.isfile(input_path):
-        logger.error(f"❌ File not found: {input_path}")
+        logger.error(f"❌ File not found: {INPUT_PATH}")
+        return
+
+    # The results file is rewritten by every detection run; skip it if nothing changed
+    manifest = LoadManifest(conn, "media_detections")
+    pending = manifest.pending([input_path])
+    if not pending:
+        logger.info(f"✅ {input_path} unchanged since it was last loaded")
         return
+    source = pending[0]
+
+    logger.info(f"📂 Streaming detections from {input_path}")
+
+    # The file is a full snapshot (cached images included), so only images whose record
+    # changed since the last load are rewritten. Each one's previous detections are
+    # replaced in the same transaction, so re-running the loader never duplicates rows
+    total = image_count = inserted_count = 0
+    try:
+        with conn:
+            with conn.cursor(cursor_factory=DictCursor) as cur:
+                chunk = []
+                for entry in iter_detection_file(input_path):
+                    chunk.append(entry)
+                    total += 1
+                    if len(chunk) == CHUNK_SIZE:
+                        images, rows = load_chunk(cur, chunk)
+                        image_count, inserted_count = image_count + images, inserted_count + rows
+                        chunk = []
+                if chunk:
+                    images, rows = load_chunk(cur, chunk)
+                    image_count, inserted_count = image_count + images, inserted_count + rows
+                manifest.loaded(cur, source, inserted_count)
+    except Exception as e:
+        manifest.failed(source, e)
+        raise
+
+    logger.info(f"✅ Replaced detections for {image_count} of {total} images in raw.media_detections "
+                f"({inserted_count} rows inserted; the rest were unchanged)")
 
-    with open(input_path, 'r') as f:
-        detection_data = json.load(f)
-
-    logger.info(f"📂 Loaded {len(detection_data)} entries from detection JSON")
-
-    with conn:
-        with conn.cursor(cursor_factory=DictCursor) as cur:
-            inserted_count = 0
-
-            for entry in detection_data:
-                msg_id = entry["message_id"]
-                channel = entry["channel_name"]
-                image_path = entry["image_path"]
-                detections = entry.get("detections", [])
-
-                # Handle empty detections
-                if not detections:
-                    cur.execute("""
-                        INSERT INTO raw.media_detections (
-                            message_id, channel_name, image_path, label, confidence
-                        ) VALUES (%s, %s, %s, %s, %s);
-                    """, (msg_id, channel, image_path, "no_object_detected", None))
-                    inserted_count += 1
-                    continue
-
-                # Insert each detection
-                for d in detections:
-                    label = d.get("label")
-                    conf = d.get("confidence")
-                    cur.execute("""
-                        INSERT INTO raw.media_detections (
-                            message_id, channel_name, image_path, label, confidence
-                        ) VALUES (%s, %s, %s, %s, %s);
-                    """, (msg_id, channel, image_path, label, conf))
-                    inserted_count += 1
-
-            logger.info(f"✅ Inserted {inserted_count} rows into raw.media_detections")
 
 if __name__ == "__main__":
     create_detection_table()
@@ -1,12 +1,15 @@
 import os
 import sys
+import glob
 import json
 import logging
 from datetime import datetime
 import psycopg2
+from psycopg2.extras import execute_values
 
 sys.path.append(os.path.abspath("../"))
 from config.config import load_db_credentials
+from src.utils.load_manifest import LoadManifest
 
 # ✅ Logging setup
 logging.basicConfig(
@@ -32,45 +35,74 @@ conn = psycopg2.connect(
 cursor = conn.cursor()
 logger.info("✅ Connection established.")
 
-# ✅ Locate media index file
-INDEX_PATH = "../data/raw/media_index_2025-07-12.json"  # Update this dynamically later if needed for incrementing 
-index_filename_date = INDEX_PATH.split("_")[-1].replace(".json", "")
-scraped_at = datetime.strptime(index_filename_date, "%Y-%m-%d")
+# ✅ Locate media index files: one per scrape date, or MEDIA_INDEX_PATH
+INDEX_PATH = os.getenv('MEDIA_INDEX_PATH')
+INDEX_GLOB = "../data/raw/media_index_*.json"
+index_paths = [INDEX_PATH] if INDEX_PATH else sorted(glob.glob(INDEX_GLOB))
 
-if not os.path.exists(INDEX_PATH):
-    logger.error(f"❌ Media index not found: {INDEX_PATH}")
+if not index_paths or not all(os.path.exists(path) for path in index_paths):
+    logger.error(f"❌ Media index not found: {INDEX_PATH or INDEX_GLOB}")
     exit(1)
 
-logger.info(f"📂 Loading media metadata from: {INDEX_PATH}")
 
-try:
-    with open(INDEX_PATH, "r", encoding="utf-8") as f:
+def index_scraped_at(path):
+    """The scrape date is part of the file name: media_index_<YYYY-MM-DD>.json."""
+    index_filename_date = os.path.basename(path).split("_")[-1].replace(".json", "")
+    return datetime.strptime(index_filename_date, "%Y-%m-%d")
+
+
+def load_index(source):
+    """Upserts one index file and its manifest entry in one transaction; returns its record count."""
+    scraped_at = index_scraped_at(source.path)
+    with open(source.path, "r", encoding="utf-8") as f:
         media_records = json.load(f)
 
-    for record in media_records:
-        cursor.execute("""
-            INSERT INTO raw.telegram_media (
-                channel_name,
-                message_id,
-                image_filename,
-                image_path,
-                scraped_at
-            ) VALUES (%s, %s, %s, %s, %s)
-        """, (
+    rows = {
+        (record["channel_name"], record["message_id"]): (
             record["channel_name"],
             record["message_id"],
             record["image_filename"],
             record["image_path"],
             scraped_at
-        ))
+        )
+        for record in media_records
+    }
+    # Re-loading an index (or a later one listing the same media) updates rows instead of failing
+    execute_values(cursor, """
+        INSERT INTO raw.telegram_media (
+            channel_name,
+            message_id,
+            image_filename,
+            image_path,
+            scraped_at
+        ) VALUES %s
+        ON CONFLICT (channel_name, message_id) DO UPDATE SET
+            image_filename = EXCLUDED.image_filename,
+            image_path = EXCLUDED.image_path,
+            scraped_at = EXCLUDED.scraped_at
+    """, list(rows.values()), page_size=1000)
+    manifest.loaded(cursor, source, len(media_records))
+    conn.commit()
+    return len(media_records)
+
+
+# ✅ Only index files that are new or changed since the last load are read
+manifest = LoadManifest(conn, "media_index")
+pending = manifest.pending(index_paths)
+logger.info(f"📂 {len(pending)} of {len(index_paths)} media index files are new or changed")
 
-    logger.info(f"✅ Inserted {len(media_records)} media records into raw.telegram_media.")
+for source in pending:
+    logger.info(f"📂 Loading media metadata from: {source.path}")
+    try:
+        count = load_index(source)
+        logger.info(f"✅ Upserted {count} media records into raw.telegram_media.")
 
-except Exception as e:
-    logger.error(f"❌ Error during media index load: {e}", exc_info=True)
+    except Exception as e:
+        conn.rollback()
+        manifest.failed(source, e)
+        logger.error(f"❌ Error during media index load: {e}", exc_info=True)
 
 # ✅ Finalize
-conn.commit()
 cursor.close()
 conn.close()
-logger.info("🎉 Media metadata successfully loaded.")
\ No newline at end of file
+logger.info("🎉 Media metadata successfully loaded.")
@@ -7,6 +7,12 @@ import psycopg2
 
 sys.path.append(os.path.abspath("../"))
 from config.config import load_db_credentials
+from src.utils.ndjson import iter_message_file
+from src.utils.pg_copy import copy_rows
+from src.utils.load_manifest import LoadManifest
+
+# Scraper output formats: streamed NDJSON (optionally gzipped) and legacy JSON arrays
+MESSAGE_FILE_SUFFIXES = (".ndjson.gz", ".ndjson", ".json")
 
 # ✅ Configure logging
 logging.basicConfig(
@@ -38,8 +44,59 @@ if not os.path.exists(BASE_PATH):
     logger.error(f"❌ Folder not found: {BASE_PATH}")
     exit(1)
 
-# ✅ Iterate over dated directories
-for date_folder in os.listdir(BASE_PATH):
+# ✅ Staging table: each file is COPYed here, then merged into raw.telegram_messages
+cursor.execute("""
+    CREATE TEMP TABLE staging_telegram_messages (
+        line BIGINT,
+        channel_name TEXT,
+        scraped_at TIMESTAMP,
+        message_id INTEGER,
+        raw_data JSONB
+    )
+""")
+conn.commit()
+
+# ✅ Only files that are new or changed since the last load are read
+manifest = LoadManifest(conn, "telegram_messages")
+
+
+def staged_rows(file_path, channel_name, scraped_at):
+    """Messages are read lazily, one at a time, and streamed straight into COPY."""
+    for line, msg in enumerate(iter_message_file(file_path)):
+        yield line, channel_name, scraped_at, msg.get("id"), json.dumps(msg)
+
+
+def load_file(source, channel_name, scraped_at):
+    """
+    Bulk-loads one channel file in its own transaction, together with its
+    manifest entry. Returns the number of messages read and the number of
+    rows inserted or changed.
+    """
+    cursor.execute("TRUNCATE staging_telegram_messages")
+    count = copy_rows(cursor, "staging_telegram_messages",
+                      ("line", "channel_name", "scraped_at", "message_id", "raw_data"),
+                      staged_rows(source.path, channel_name, scraped_at))
+    # Streamed files may repeat a message after a retried scrape: keep its last copy.
+    # Messages already loaded are updated, so re-runs over overlapping dates are idempotent,
+    # and rows whose content did not change are left alone
+    cursor.execute("""
+        INSERT INTO raw.telegram_messages (channel_name, scraped_at, message_id, raw_data)
+        SELECT DISTINCT ON (channel_name, message_id) channel_name, scraped_at, message_id, raw_data
+        FROM staging_telegram_messages
+        ORDER BY channel_name, message_id, line DESC
+        ON CONFLICT (channel_name, message_id) DO UPDATE
+        SET scraped_at = EXCLUDED.scraped_at, raw_data = EXCLUDED.raw_data
+        WHERE raw.telegram_messages.raw_data IS DISTINCT FROM EXCLUDED.raw_data
+    """)
+    merged = cursor.rowcount
+    manifest.loaded(cursor, source, count)
+    conn.commit()
+    return count, merged
+
+
+# ✅ Find channel files in dated directories, oldest first, so the latest scrape of a message wins
+files = {}
+for date_folder in sorted(os.listdir(BASE_PATH)):
     folder_path = os.path.join(BASE_PATH, date_folder)
     if not os.path.isdir(folder_path):
         continue
@@ -51,36 +108,26 @@ for date_folder in os.listdir(BASE_PATH):
         logger.warning(f"⚠️ Skipping folder '{date_folder}' (invalid date format)")
         continue
 
-    logger.info(f"📂 Loading messages from: {folder_path}")
-
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".json"):
-            channel_name = filename.replace(".json", "")
-            file_path = os.path.join(folder_path, filename)
+    for filename in sorted(os.listdir(folder_path)):
+        suffix = next((s for s in MESSAGE_FILE_SUFFIXES if filename.endswith(s)), None)
+        if suffix:
+            files[os.path.join(folder_path, filename)] = (filename[:-len(suffix)], scraped_at)
 
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    messages = json.load(f)
+pending = manifest.pending(list(files))
+logger.info(f"📂 {len(pending)} of {len(files)} message files are new or changed")
 
-                for msg in messages:
-                    message_id = msg.get("id")
-                    cursor.execute("""
-                        INSERT INTO raw.telegram_messages (channel_name, scraped_at, message_id, raw_data)
-                        VALUES (%s, %s, %s, %s)
-                    """, (
-                        channel_name,
-                        scraped_at,
-                        message_id,
-                        json.dumps(msg)
-                    ))
-
-                logger.info(f"✅ Loaded {len(messages)} messages from {channel_name}")
+for source in pending:
+    channel_name, scraped_at = files[source.path]
+    try:
+        count, merged = load_file(source, channel_name, scraped_at)
+        logger.info(f"✅ Loaded {count} messages from {source.path} ({merged} new or changed)")
 
-            except Exception as e:
-                logger.error(f"❌ Error loading {file_path}: {e}", exc_info=True)
+    except Exception as e:
+        conn.rollback()
+        manifest.failed(source, e)
+        logger.error(f"❌ Error loading {source.path}: {e}", exc_info=True)
 
 # ✅ Finalize
-conn.commit()
 cursor.close()
 conn.close()
 logger.info("🎉 All messages loaded successfully.") 
\ No newline at end of file
@@ -0,0 +1,117 @@
+import os
+import shutil
+import logging
+
+from src.utils.hashing import file_hash
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+
+
+def _artifact_path(weights, image_size, cache_dir, suffix):
+    """Cache file name tied to the weights content and input size."""
+    stem = os.path.splitext(os.path.basename(weights))[0]
+    return os.path.join(cache_dir, f"{stem}-{file_hash(weights)[:12]}-{image_size}{suffix}")
+
+
+def export_onnx(weights, image_size, cache_dir):
+    """
+    Exports `weights` to ONNX once and returns the cached file. The export
+    uses dynamic axes so any batch size can be fed at inference time.
+    """
+    target = _artifact_path(weights, image_size, cache_dir, '.onnx')
+    if os.path.isfile(target):
+        return target
+
+    from ultralytics import YOLO
+
+    os.makedirs(cache_dir, exist_ok=True)
+    logging.info(f"📦 Exporting {weights} to ONNX (imgsz={image_size})...")
+    exported = YOLO(weights).export(format='onnx', imgsz=image_size, dynamic=True, simplify=True)
+    shutil.move(exported, target)
+    logging.info(f"✅ Cached ONNX model at {target}")
+    return target
+
+
+def quantize_int8(onnx_path):
+    """
+    Returns a cached INT8 copy of `onnx_path` (weights quantized to 8 bits,
+    activations quantized dynamically at run time, so no calibration set is
+    needed). Weights are unsigned: the CPU provider only has ConvInteger
+    kernels for uint8 weights, so signed int8 convolutions could not run.
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    target = onnx_path.replace('.onnx', '-uint8.onnx')
+    if os.path.isfile(target):
+        return target
+
+    logging.info(f"📦 Quantizing {onnx_path} to INT8...")
+    tmp_path = target + '.part'
+    quantize_dynamic(onnx_path, tmp_path, weight_type=QuantType.QUInt8)
+    os.replace(tmp_path, target)
+    logging.info(f"✅ Cached INT8 model at {target}")
+    return target
+
+
+def resolve_weights(weights):
+    """
+    Path of the weights file ultralytics actually loads for `weights`:
+    the file itself, or the official weights it resolves from its own
+    directory, downloading them first if needed.
+    """
+    if os.path.isfile(weights):
+        return weights
+    # The lookup YOLO() does on load, without building the model
+    from ultralytics.utils.downloads import attempt_download_asset
+
+    return str(attempt_download_asset(weights))
+
+
+def model_file(backend, weights, image_size, cache_dir):
+    """The file the chosen backend loads (exporting/quantizing on first use)."""
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown detection backend "{backend}" (expected one of {", ".join(BACKENDS)})')
+    if backend == 'torch':
+        return weights
+    weights = resolve_weights(weights)  # so they can be hashed and exported
+    onnx_path = export_onnx(weights, image_size, cache_dir)
+    return quantize_int8(onnx_path) if backend == 'onnx-int8' else onnx_path
+
+
+def limit_onnx_threads(model, path, threads):
+    """
+    Rebuilds the ONNX Runtime session of a warmed-up ultralytics `model`
+    (loaded from `path`) with `threads` intra-op threads. ultralytics builds
+    its session with default options (a pool the size of the machine),
+    which would oversubscribe the CPU with several detection workers.
+    """
+    import onnxruntime
+
+    backend = model.predictor.model
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    backend.session = onnxruntime.InferenceSession(path, options, providers=backend.session.get_providers())
+
+
+def load_detector(backend, weights, image_size, threads, cache_dir):
+    """
+    Loads a YOLO detector for `backend`. ONNX models go through the same
+    ultralytics predict API (run by ONNX Runtime on CPU), so callers don't
+    change. `threads` sets torch's intra-op pool and, for ONNX, the ONNX
+    Runtime session's.
+    """
+    import torch
+    from ultralytics import YOLO
+
+    torch.set_num_threads(threads)
+    path = model_file(backend, weights, image_size, cache_dir)
+    model = YOLO(path, task='detect')
+    if backend != 'torch':
+        import numpy as np
+
+        # ultralytics creates the session on the first predict: warm up,
+        # then swap in a session with the thread limit
+        model.predict(np.zeros((image_size, image_size, 3), dtype=np.uint8), imgsz=image_size, verbose=False)
+        limit_onnx_threads(model, path, threads)
+    return model
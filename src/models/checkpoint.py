@@ -0,0 +1,98 @@
+import os
+import json
+import logging
+import tempfile
+import threading
+
+from src.utils.ndjson import NDJSONWriter
+
+
+def record_key(record):
+    """Identifies one detected image across runs: its message and its content."""
+    return (record["channel_name"], record["message_id"], record.get("content_hash"))
+
+
+class DetectionCheckpoint:
+    """
+    Crash-safe, append-only record of finished detections.
+
+    While a run is in progress, records are appended to `<path>.partial`
+    (one JSON object per line) and the file is fsync'd at every batch
+    boundary, so a crash or kill loses at most the batch in flight. A new
+    run finding a `.partial` file resumes: `completed()` returns what was
+    already detected, dropping a torn last line if the crash hit mid-write.
+    `finalize()` writes the full, ordered result to `path` and removes the
+    partial file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.partial_path = path + '.partial'
+        self._lock = threading.Lock()
+        self._writer = None
+
+    def completed(self):
+        """Records saved by an interrupted earlier run, keyed by `record_key`."""
+        if not os.path.isfile(self.partial_path):
+            return {}
+
+        done, good_bytes = {}, 0
+        with open(self.partial_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # torn final write
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                done[record_key(record)] = record
+                good_bytes += len(line)
+
+        if good_bytes < os.path.getsize(self.partial_path):
+            logging.warning(f"⚠️ Dropping incomplete tail of {self.partial_path}")
+            with open(self.partial_path, 'r+b') as f:
+                f.truncate(good_bytes)
+        return done
+
+    def append(self, record):
+        with self._lock:
+            if self._writer is None:
+                self._writer = NDJSONWriter(self.partial_path, flush_every=1_000_000)
+            self._writer.write(record)
+
+    def sync(self):
+        """Batch boundary: everything appended so far is durably on disk."""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.sync()
+
+    def finalize(self, records):
+        """Atomically writes the final `records` to `path` and drops the partial file."""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False))
+                        f.write('\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+            if os.path.isfile(self.partial_path):
+                os.remove(self.partial_path)
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
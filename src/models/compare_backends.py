@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import time
+import random
+import logging
+
+sys.path.append(os.path.abspath("../../"))
+from src.models.backends import load_detector
+from src.models.detection_metrics import agreement_report
+from src.models.run_yolov8_detection import (
+    MODEL_WEIGHTS, IMAGE_SIZE, BATCH_SIZE, TORCH_THREADS, MODEL_CACHE_DIR, load_index,
+)
+
+# ✅ Report settings
+SAMPLE_SIZE = int(os.getenv('COMPARE_SAMPLE_SIZE', 50))
+REPORT_PATH = os.getenv('COMPARE_REPORT_PATH', '../../data/processed/backend_accuracy_report.json')
+
+
+def sample_images():
+    """A fixed random sample of indexed images that exist on disk."""
+    paths = sorted(
+        path for path in (os.path.join("../../", entry["image_path"]) for entry in load_index())
+        if os.path.isfile(path)
+    )
+    return random.Random(0).sample(paths, min(SAMPLE_SIZE, len(paths)))
+
+
+def run_backend(backend, paths):
+    """Per-image raw detections from `backend` and its mean seconds per image."""
+    model = load_detector(backend, MODEL_WEIGHTS, IMAGE_SIZE, TORCH_THREADS, MODEL_CACHE_DIR)
+    model.predict(paths[:1], imgsz=IMAGE_SIZE, verbose=False)  # warm-up
+
+    detections, elapsed = [], 0.0
+    for start in range(0, len(paths), BATCH_SIZE):
+        batch = paths[start:start + BATCH_SIZE]
+        began = time.perf_counter()
+        results = model.predict(batch, imgsz=IMAGE_SIZE, batch=len(batch), verbose=False)
+        elapsed += time.perf_counter() - began
+        for result in results:
+            boxes = result.boxes
+            detections.append([
+                {"class_id": int(cls), "confidence": float(conf), "box": box}
+                for cls, conf, box in zip(boxes.cls.tolist(), boxes.conf.tolist(), boxes.xyxy.tolist())
+            ])
+    return detections, elapsed / max(len(paths), 1)
+
+
+def main(backends):
+    paths = sample_images()
+    logging.info(f"📊 Comparing {', '.join(backends)} against torch on {len(paths)} images")
+
+    reference, reference_speed = run_backend('torch', paths)
+    report = {"sample_size": len(paths), "weights": MODEL_WEIGHTS, "image_size": IMAGE_SIZE,
+              "torch": {"seconds_per_image": round(reference_speed, 4)}}
+    for backend in backends:
+        candidate, speed = run_backend(backend, paths)
+        report[backend] = dict(
+            agreement_report(reference, candidate),
+            seconds_per_image=round(speed, 4),
+            speedup=round(reference_speed / speed, 2) if speed else None,
+        )
+        logging.info(f"📊 {backend}: {report[backend]}")
+
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"✅ Saved backend accuracy report to {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or ['onnx', 'onnx-int8'])
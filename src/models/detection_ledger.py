@@ -0,0 +1,149 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from src.utils.hashing import file_hash
+
+
+def weights_version(weights_path: str, image_size: int, backend: str = 'torch') -> str:
+    """
+    Identifies a detection model: weights name and content, input size and
+    backend. Anything that changes what the model outputs must change this.
+    """
+    name = os.path.basename(weights_path)
+    digest = file_hash(weights_path)[:12] if os.path.isfile(weights_path) else 'unhashed'
+    return f"{name}:{digest}:{image_size}:{backend}"
+
+
+class DetectionLedger:
+    """
+    Remembers which images were already run through which model.
+
+    Detections are stored per (image content hash, model version), so an
+    image is only re-detected when its bytes or the model change; renamed
+    or reposted copies of a photo hit the ledger too. To avoid re-reading
+    every image, a file's hash is reused while its size and mtime are
+    unchanged. Safe to use from the pipeline's writer thread.
+    """
+
+    def __init__(self, db_path: str, model_version: str, commit_every: int = 50):
+        self.model_version = model_version
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self._uncommitted = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                content_hash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS detections (
+                content_hash TEXT,
+                model_version TEXT,
+                detections TEXT,
+                processed_at TEXT,
+                PRIMARY KEY (content_hash, model_version)
+            );
+            CREATE TABLE IF NOT EXISTS perceptual_hashes (
+                content_hash TEXT PRIMARY KEY,
+                dhash TEXT,
+                width INTEGER,
+                height INTEGER
+            );
+        """)
+        self._db.commit()
+
+    def content_hash(self, path: str) -> str:
+        """Content hash of `path`, re-hashing only if size or mtime changed."""
+        stat = os.stat(path)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, content_hash FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = file_hash(path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest),
+            )
+            self._dirty()
+        return digest
+
+    def get(self, content_hash: str):
+        """Stored detections for this image under the current model, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT detections FROM detections WHERE content_hash = ? AND model_version = ?",
+                (content_hash, self.model_version),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, content_hash: str, detections: list):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO detections (content_hash, model_version, detections, processed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (content_hash, self.model_version, json.dumps(detections), datetime.now().isoformat()),
+            )
+            self._dirty()
+
+    def perceptual_hash(self, content_hash: str):
+        """Cached (dhash, (width, height)) of an image, or None. Independent of the model."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT dhash, width, height FROM perceptual_hashes WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return None if row is None else (int(row[0], 16), (row[1], row[2]))
+
+    def put_perceptual_hash(self, content_hash: str, dhash: int, size):
+        # Stored as hex: a 64-bit hash does not fit SQLite's signed INTEGER
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO perceptual_hashes (content_hash, dhash, width, height) VALUES (?, ?, ?, ?)",
+                (content_hash, format(dhash, 'x'), size[0], size[1]),
+            )
+            self._dirty()
+
+    def detected_perceptual_hashes(self):
+        """(content_hash, dhash, (width, height)) of every image already detected under this model."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT p.content_hash, p.dhash, p.width, p.height FROM perceptual_hashes AS p "
+                "JOIN detections AS d ON d.content_hash = p.content_hash AND d.model_version = ?",
+                (self.model_version,),
+            ).fetchall()
+        return [(content_hash, int(dhash, 16), (width, height)) for content_hash, dhash, width, height in rows]
+
+    def _dirty(self):
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        if self._db is not None:
+            self.commit()
+            self._db.close()
+            self._db = None
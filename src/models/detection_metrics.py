@@ -0,0 +1,63 @@
+def iou(a, b):
+    """Intersection over union of two [x1, y1, x2, y2] boxes."""
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_detections(reference, candidate, iou_threshold=0.5):
+    """
+    Greedily pairs `candidate` detections with `reference` ones of the same
+    class, highest confidence first. Detections are dicts with "class_id",
+    "confidence" and "box" ([x1, y1, x2, y2]). Returns (pairs, unmatched
+    reference, unmatched candidate), pairs being (reference, candidate).
+    """
+    remaining = sorted(candidate, key=lambda d: -d["confidence"])
+    pairs, missed = [], []
+    for ref in sorted(reference, key=lambda d: -d["confidence"]):
+        best, best_iou = None, iou_threshold
+        for cand in remaining:
+            if cand["class_id"] != ref["class_id"]:
+                continue
+            overlap = iou(ref["box"], cand["box"])
+            if overlap >= best_iou:
+                best, best_iou = cand, overlap
+        if best is None:
+            missed.append(ref)
+        else:
+            remaining.remove(best)
+            pairs.append((ref, best))
+    return pairs, missed, remaining
+
+
+def agreement_report(reference_images, candidate_images, iou_threshold=0.5):
+    """
+    Summarises how closely a candidate backend reproduces the reference
+    detections over a set of images (parallel lists of per-image detections).
+    """
+    matched = missed = extra = 0
+    conf_deltas, ious = [], []
+    for reference, candidate in zip(reference_images, candidate_images):
+        pairs, ref_only, cand_only = match_detections(reference, candidate, iou_threshold)
+        matched += len(pairs)
+        missed += len(ref_only)
+        extra += len(cand_only)
+        for ref, cand in pairs:
+            conf_deltas.append(abs(ref["confidence"] - cand["confidence"]))
+            ious.append(iou(ref["box"], cand["box"]))
+
+    reference_total = matched + missed
+    candidate_total = matched + extra
+    return {
+        "images": len(reference_images),
+        "reference_detections": reference_total,
+        "candidate_detections": candidate_total,
+        "matched": matched,
+        "recall": round(matched / reference_total, 4) if reference_total else 1.0,
+        "precision": round(matched / candidate_total, 4) if candidate_total else 1.0,
+        "mean_confidence_delta": round(sum(conf_deltas) / len(conf_deltas), 4) if conf_deltas else 0.0,
+        "max_confidence_delta": round(max(conf_deltas), 4) if conf_deltas else 0.0,
+        "mean_matched_iou": round(sum(ious) / len(ious), 4) if ious else 1.0,
+    }
@@ -0,0 +1,198 @@
+from src.models.prefetch import Prefetcher
+from src.models.checkpoint import record_key
+
+HASH_SIZE = 8  # 8 x 8 gradient bits: a 64-bit hash
+# Near-duplicates whose width/height ratios differ by more than this fraction are
+# crops or padded reposts: copied boxes would land in the wrong place
+ASPECT_TOLERANCE = 0.02
+
+
+def dhash_bits(gray):
+    """
+    Difference hash of a grayscale image already resized to HASH_SIZE rows
+    by HASH_SIZE + 1 columns: one bit per pair of horizontal neighbours,
+    set where brightness increases. Re-encoding, rescaling and small crops
+    change only a few bits.
+    """
+    value = 0
+    for row in gray:
+        row = [int(p) for p in row]
+        for left, right in zip(row, row[1:]):
+            value = (value << 1) | (right > left)
+    return value
+
+
+def image_dhash(image_path, hash_size=HASH_SIZE):
+    """Difference hash and (width, height) of an image file, or None if it cannot be decoded."""
+    import cv2
+
+    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return None
+    h, w = image.shape[:2]
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return dhash_bits(small.tolist()), (w, h)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes with Hamming distance, for
+    "everything within distance r of h" lookups without comparing h to
+    every stored hash.
+    """
+
+    def __init__(self):
+        self._root = None  # [hash, item, {distance: child}]
+        self.size = 0
+
+    def add(self, value, item):
+        self.size += 1
+        node = [value, item, {}]
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            d = hamming(value, current[0])
+            child = current[2].get(d)
+            if child is None:
+                current[2][d] = node
+                return
+            current = child
+
+    def search(self, value, radius):
+        """(distance, hash, item) of every stored hash within `radius` of `value`, nearest first."""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_value, item, children = stack.pop()
+            d = hamming(value, node_value)
+            if d <= radius:
+                found.append((d, node_value, item))
+            # Triangle inequality: only subtrees at distance d +/- radius can match
+            for distance, child in children.items():
+                if d - radius <= distance <= d + radius:
+                    stack.append(child)
+        return sorted(found, key=lambda match: match[0])
+
+
+def group_near_duplicates(hashes, max_distance, known=()):
+    """
+    Groups items whose hashes are within `max_distance` bits of each other.
+    `hashes` is an ordered list of (item, hash); items with a None hash are
+    kept on their own. Each group is a list led by its representative, the
+    first item of the group in input order; every later item joins the
+    nearest representative within range, so groups never chain far away
+    from the image they are named after.
+
+    `known` (item, hash) pairs, e.g. images detected on earlier runs, lead
+    the first len(known) groups, so new items close to one of them join it
+    instead of starting a group of their own.
+    """
+    tree = BKTree()
+    groups = []
+    for item, value in known:
+        tree.add(value, len(groups))
+        groups.append([item])
+    for item, value in hashes:
+        matches = tree.search(value, max_distance) if value is not None else []
+        if matches:
+            groups[matches[0][2]].append(item)
+            continue
+        if value is not None:
+            tree.add(value, len(groups))
+        groups.append([item])
+    return groups
+
+
+def copy_detections(detections, source_size, target_size):
+    """A representative's detections for a near-duplicate, boxes rescaled to its size."""
+    (sw, sh), (tw, th) = source_size, target_size
+    copied = []
+    for d in detections:
+        d = dict(d)
+        if d.get("box") is not None:
+            x1, y1, x2, y2 = d["box"]
+            d["box"] = [round(x1 * tw / sw, 1), round(y1 * th / sh, 1),
+                        round(x2 * tw / sw, 1), round(y2 * th / sh, 1)]
+        copied.append(d)
+    return copied
+
+
+def same_aspect(size_a, size_b, tolerance=ASPECT_TOLERANCE):
+    """Whether two (width, height) sizes have the same aspect ratio, within `tolerance` (relative)."""
+    (aw, ah), (bw, bh) = size_a, size_b
+    ratio_a, ratio_b = aw / ah, bw / bh
+    return abs(ratio_a - ratio_b) <= tolerance * max(ratio_a, ratio_b)
+
+
+def perceptual_hashes(pending, ledger, workers=4, depth=64):
+    """(dhash, (width, height)) of each pending image, None if undecodable; cached in the ledger."""
+    hashes = {}
+    uncached = []
+    for entry, image_path in pending:
+        cached = ledger.perceptual_hash(entry["content_hash"])
+        if cached is None:
+            uncached.append((entry, image_path))
+        else:
+            hashes[record_key(entry)] = cached
+    for (entry, image_path), value, error in Prefetcher(uncached, lambda pair: image_dhash(pair[1]),
+                                                        workers, depth):
+        if value is not None:
+            ledger.put_perceptual_hash(entry["content_hash"], *value)
+        hashes[record_key(entry)] = value
+    return hashes
+
+
+def dedupe_pending(pending, ledger, max_distance, workers=4, depth=64):
+    """
+    Groups pending (entry, image_path) pairs into near-duplicates by
+    perceptual hash, also matching them against images detected on earlier
+    runs. Returns:
+
+    - the images to run through the model: one representative per new
+      group, plus near-duplicates whose aspect ratio differs from their
+      group's (crops, padded reposts), which get detections of their own
+    - the other members of each new group, keyed by the representative's
+      record key, as (entry, image_path, member size, representative size)
+    - (entry, image_path, detections) of images that reuse an earlier run's
+      detections; those detections are already stored in the ledger
+
+    A negative `max_distance` turns deduplication off: every image is
+    returned for detection.
+    """
+    if max_distance < 0:
+        return list(pending), {}, []
+    hashes = perceptual_hashes(pending, ledger, workers, depth)
+    keyed = []
+    for entry, image_path in pending:
+        value = hashes[record_key(entry)]
+        keyed.append(((entry, image_path), value[0] if value is not None else None))
+    known = ledger.detected_perceptual_hashes()
+    groups = group_near_duplicates(keyed, max_distance,
+                                   known=[((content_hash, size), value) for content_hash, value, size in known])
+
+    representatives, members, reused = [], {}, []
+    for (content_hash, source_size), *others in groups[:len(known)]:
+        detections = ledger.get(content_hash) if others else None
+        for entry, image_path in others:
+            size = hashes[record_key(entry)][1]
+            if not same_aspect(source_size, size):
+                representatives.append((entry, image_path))
+                continue
+            copied = copy_detections(detections, source_size, size)
+            ledger.put(entry["content_hash"], copied)
+            reused.append((entry, image_path, copied))
+    for (entry, image_path), *others in groups[len(known):]:
+        representatives.append((entry, image_path))
+        for member, path in others:
+            size, source_size = hashes[record_key(member)][1], hashes[record_key(entry)][1]
+            if same_aspect(source_size, size):
+                members.setdefault(record_key(entry), []).append((member, path, size, source_size))
+            else:
+                representatives.append((member, path))
+    return representatives, members, reused
@@ -0,0 +1,95 @@
+import os
+import json
+import socket
+import asyncio
+import itertools
+
+# ✅ Where the resident inference worker listens (see inference_server.py)
+INFERENCE_HOST = os.getenv('INFERENCE_HOST', '127.0.0.1')
+INFERENCE_PORT = int(os.getenv('INFERENCE_PORT', 8765))
+
+
+class InferenceError(RuntimeError):
+    pass
+
+
+def _encode(request):
+    return (json.dumps(request) + '\n').encode('utf-8')
+
+
+class InferenceClient:
+    """
+    Talks to the resident inference worker over a local TCP socket.
+
+    The protocol is one JSON object per line: requests carry an `id` and an
+    `op` ("detect", "run_index", "ping"); responses echo the `id` with either
+    a result or an `error`. Requests on one connection are pipelined, and the
+    worker micro-batches "detect" requests across all connected callers.
+    This module does not import torch, so callers stay lightweight.
+    """
+
+    def __init__(self, host=INFERENCE_HOST, port=INFERENCE_PORT, timeout=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+
+    def _requests(self, requests, timeout=None):
+        """Sends `requests` on one connection and returns the responses in the same order."""
+        for request in requests:
+            request['id'] = next(self._ids)
+        with socket.create_connection((self.host, self.port), timeout=timeout or self.timeout) as sock:
+            sock.sendall(b''.join(_encode(request) for request in requests))
+            responses = {}
+            with sock.makefile('r', encoding='utf-8') as stream:
+                while len(responses) < len(requests):
+                    line = stream.readline()
+                    if not line:
+                        raise InferenceError('inference worker closed the connection')
+                    response = json.loads(line)
+                    responses[response['id']] = response
+        return [responses[request['id']] for request in requests]
+
+    def available(self, timeout=1.0):
+        """True if a worker is listening and answering."""
+        try:
+            return bool(self._requests([{'op': 'ping'}], timeout=timeout)[0].get('ok'))
+        except (OSError, ValueError, InferenceError):
+            return False
+
+    def detect(self, image_paths):
+        """
+        Detections for each image (same order); None for an image that
+        could not be detected.
+        """
+        requests = [{'op': 'detect', 'image_path': os.path.abspath(path)} for path in image_paths]
+        return [response.get('detections') for response in self._requests(requests)] if requests else []
+
+    def run_index(self):
+        """Runs a full media-index detection job on the worker's warm model; returns its summary."""
+        response = self._requests([{'op': 'run_index'}])[0]
+        if 'error' in response:
+            raise InferenceError(response['error'])
+        return response['summary']
+
+    async def detect_async(self, image_paths):
+        """Async `detect`, for callers running an event loop (e.g. the scraper daemon)."""
+        if not image_paths:
+            return []
+        requests = [{'op': 'detect', 'id': next(self._ids), 'image_path': os.path.abspath(path)}
+                    for path in image_paths]
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(b''.join(_encode(request) for request in requests))
+            await writer.drain()
+            responses = {}
+            while len(responses) < len(requests):
+                line = await reader.readline()
+                if not line:
+                    raise InferenceError('inference worker closed the connection')
+                response = json.loads(line)
+                responses[response['id']] = response
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        return [responses[request['id']].get('detections') for request in requests]
@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import asyncio
+import logging
+import threading
+
+sys.path.append(os.path.abspath("../../"))
+from src.models.prefetch import Prefetcher
+from src.models.microbatch import MicroBatcher
+from src.models.inference_client import INFERENCE_HOST, INFERENCE_PORT
+from src.models.run_yolov8_detection import (
+    BATCH_SIZE, DECODE_WORKERS, load_model, load_image, detect_batch, detections_of, run_detection,
+)
+
+# ✅ How long a request may wait for others to share its batch
+MICROBATCH_WAIT_MS = float(os.getenv('INFERENCE_MICROBATCH_WAIT_MS', 20))
+# Interface to listen on (e.g. 0.0.0.0 inside a container); clients use INFERENCE_HOST
+BIND_HOST = os.getenv('INFERENCE_BIND_HOST', INFERENCE_HOST)
+
+
+class SerializedModel:
+    """Lets request batches and index jobs share one warm model, one call at a time."""
+
+    def __init__(self, model):
+        self._model = model
+        self._lock = threading.Lock()
+        self.names = model.names
+
+    def predict(self, *args, **kwargs):
+        with self._lock:
+            return self._model.predict(*args, **kwargs)
+
+
+class InferenceServer:
+    """
+    Resident detection worker: loads the model once and serves callers over
+    a local socket (protocol in inference_client.py).
+
+    "detect" requests from all connections go through one MicroBatcher, so
+    concurrent callers share model calls of up to DETECT_BATCH_SIZE images.
+    "run_index" runs the regular media-index job (ledger, checkpoint,
+    results file) on the same warm model, one job at a time.
+
+    There is no authentication: anyone who reaches the port can read images
+    under the worker's paths and start jobs, so it must stay on the internal
+    network (docker-compose publishes it on the host's loopback only).
+    """
+
+    def __init__(self, model):
+        self.model = SerializedModel(model)
+        self.batcher = MicroBatcher(self._detect_paths, BATCH_SIZE, MICROBATCH_WAIT_MS / 1000)
+        self._job_lock = asyncio.Lock()
+
+    def _detect_paths(self, paths):
+        """Blocking: decodes and detects one micro-batch; one result (or Exception) per path."""
+        results = [None] * len(paths)
+        items = []
+        for (i, path), decoded, error in Prefetcher(list(enumerate(paths)), lambda pair: load_image((None, pair[1])),
+                                                    DECODE_WORKERS, len(paths)):
+            if error is not None:
+                results[i] = error
+            else:
+                items.append(({"index": i}, path) + decoded)
+
+        for (entry, _, _, geometry), result in detect_batch(self.model, items):
+            results[entry["index"]] = detections_of(self.model, result, geometry)
+        return [RuntimeError(f"detection failed for {path}") if result is None else result
+                for path, result in zip(paths, results)]
+
+    async def _answer(self, request):
+        op = request.get('op', 'detect')
+        if op == 'detect':
+            return {'detections': await self.batcher.submit(request['image_path'])}
+        if op == 'run_index':
+            async with self._job_lock:
+                return {'summary': await asyncio.to_thread(run_detection, self.model)}
+        if op == 'ping':
+            return {'ok': True, 'batches': self.batcher.batches, 'images': self.batcher.items}
+        raise ValueError(f'unknown op "{op}"')
+
+    async def _respond(self, request, writer):
+        try:
+            response = await self._answer(request)
+        except Exception as e:
+            logging.error(f"❌ Request {request.get('op')} failed: {e}")
+            response = {'error': str(e)}
+        response['id'] = request.get('id')
+        writer.write((json.dumps(response) + '\n').encode('utf-8'))
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        pending = set()
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError('expected a JSON object')
+                except ValueError as e:
+                    writer.write((json.dumps({'error': f'invalid request: {e}', 'id': None}) + '\n').encode('utf-8'))
+                    await writer.drain()
+                    continue
+                # Requests are answered as they finish, matched by id, so a
+                # caller can pipeline many images on one connection
+                task = asyncio.create_task(self._respond(request, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve(self, host=BIND_HOST, port=INFERENCE_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        logging.info(f"🔥 Inference worker ready on {host}:{port} "
+                     f"(micro-batches of up to {BATCH_SIZE}, {MICROBATCH_WAIT_MS:g}ms wait)")
+        async with server:
+            await server.serve_forever()
+
+
+def run_server():
+    model = load_model()  # loaded once; every request after this runs warm
+    asyncio.run(InferenceServer(model).serve())
+
+
+if __name__ == "__main__":
+    run_server()
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Groups single-item requests from many concurrent callers into batches.
+
+    `await submit(item)` queues the item and returns its result. A batch is
+    dispatched as soon as `max_batch` items are waiting, or `max_wait`
+    seconds after its first item arrived, whichever comes first, so a lone
+    request is never held for long while bursts share one model call.
+    `run_batch(items)` is blocking (e.g. model inference) and runs in a
+    worker thread; it returns one result per item, and an Exception in that
+    list fails only that caller.
+    """
+
+    def __init__(self, run_batch, max_batch=16, max_wait=0.02):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def submit(self, item):
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _loop(self):
+        while True:
+            batch = await self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = await asyncio.to_thread(self.run_batch, items)
+            except Exception as e:
+                logger.error(f"❌ Batch of {len(items)} failed: {e}", exc_info=True)
+                results = [e] * len(items)
+
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), result in zip(batch, results):
+                if future.done():  # caller went away
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
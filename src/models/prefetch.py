@@ -0,0 +1,95 @@
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_END = object()  # end-of-stream marker
+
+
+class Prefetcher:
+    """
+    Loads upcoming items on a thread pool while the caller works on earlier ones.
+
+    At most `depth` items are loaded ahead of the consumer, so memory stays
+    bounded however long the input is. Items come back in input order as
+    `(item, value, error)`; a failed load yields its exception instead of
+    stopping the stream. Image decoding (cv2) releases the GIL, so the pool
+    overlaps disk reads and JPEG decoding with inference.
+    """
+
+    def __init__(self, items, load, workers=4, depth=32):
+        self.items = items
+        self.load = load
+        self.workers = workers
+        self.depth = max(depth, 1)
+
+    def __iter__(self):
+        items = iter(self.items)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='prefetch') as pool:
+            window = deque()  # (item, future), oldest first
+
+            def top_up():
+                while len(window) < self.depth:
+                    item = next(items, _END)
+                    if item is _END:
+                        return
+                    window.append((item, pool.submit(self.load, item)))
+
+            top_up()
+            try:
+                while window:
+                    item, future = window.popleft()
+                    top_up()
+                    try:
+                        yield item, future.result(), None
+                    except Exception as e:
+                        yield item, None, e
+            finally:
+                for _, future in window:  # consumer stopped early
+                    future.cancel()
+
+
+class BackgroundWriter:
+    """
+    Runs `handle(item)` for submitted items on a single background thread.
+
+    The queue holds at most `depth` items, so a slow disk applies back
+    pressure instead of buffering results without limit. Errors are logged
+    per item and counted in `failed`; `close()` drains the queue and waits.
+    """
+
+    def __init__(self, handle, depth=64):
+        self.handle = handle
+        self.failed = 0
+        self.handled = 0
+        self._queue = queue.Queue(maxsize=max(depth, 1))
+        self._thread = threading.Thread(target=self._run, name='result-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            try:
+                self.handle(item)
+                self.handled += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Background write failed: {e}", exc_info=True)
+
+    def submit(self, item):
+        self._queue.put(item)
+
+    def close(self):
+        self._queue.put(_END)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
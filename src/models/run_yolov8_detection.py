@@ -1,7 +1,8 @@
-from ultralytics import YOLO
 import json
 import os
+import sys
 import cv2
+import glob
 import logging
 from datetime import datetime
 from ultralytics.nn.tasks import DetectionModel
@@ -9,6 +10,14 @@ from torch.nn import Sequential
 
 import torch
 
+sys.path.append(os.path.abspath("../../"))
+from src.models.prefetch import Prefetcher, BackgroundWriter
+from src.models.detection_ledger import DetectionLedger, weights_version
+from src.models.sharding import run_sharded
+from src.models.backends import load_detector, resolve_weights
+from src.models.checkpoint import DetectionCheckpoint, record_key
+from src.models.image_dedupe import dedupe_pending, copy_detections
+
 torch.serialization.add_safe_globals([
     DetectionModel,
     Sequential,
@@ -18,80 +27,341 @@ torch.serialization.add_safe_globals([
 log_format = "[%(levelname)s] %(asctime)s - %(message)s"
 logging.basicConfig(format=log_format, level=logging.INFO)
 
-logging.info(" Starting YOLOv8 inference script...")
+# ✅ Inference settings (env overridable)
+MODEL_WEIGHTS = os.getenv('YOLO_WEIGHTS', 'yolov8l.pt')  # Switch to 'yolov8x.pt' for better detection
+# Inference backend: "torch", "onnx" (ONNX Runtime, CPU) or "onnx-int8" (quantized)
+DETECT_BACKEND = os.getenv('DETECT_BACKEND', 'torch')
+# Where exported / quantized models are cached
+MODEL_CACHE_DIR = os.getenv('DETECT_MODEL_CACHE_DIR', '../../data/cache/models')
+# Images run through the model together; larger batches amortise per-call overhead
+BATCH_SIZE = int(os.getenv('DETECT_BATCH_SIZE', 16))
+# Letterbox size the model sees (multiple of 32)
+IMAGE_SIZE = int(os.getenv('DETECT_IMAGE_SIZE', 640))
+# Torch intra-op threads; default is one per core
+TORCH_THREADS = int(os.getenv('DETECT_TORCH_THREADS', os.cpu_count() or 1))
+# Threads decoding + letterboxing upcoming images while the model runs
+DECODE_WORKERS = int(os.getenv('DETECT_DECODE_WORKERS', 4))
+# Max images decoded ahead of the model, and max results waiting for the writer
+PREFETCH_DEPTH = int(os.getenv('DETECT_PREFETCH_DEPTH', BATCH_SIZE * 4))
+# Worker processes, each with its own model; 1 runs detection in this process
+DETECT_WORKERS = max(1, int(os.getenv('DETECT_WORKERS', 1)))
+# Torch threads per worker; default splits the cores evenly between workers
+WORKER_THREADS = int(os.getenv('DETECT_WORKER_THREADS', max(1, (os.cpu_count() or 1) // DETECT_WORKERS)))
+# Images handed to a worker at a time
+SHARD_SIZE = int(os.getenv('DETECT_SHARD_SIZE', BATCH_SIZE * 4))
+# Near-duplicate images (perceptual hashes this many bits apart or fewer, of 64, and the
+# same aspect ratio) are detected once and share the result; -1 turns deduplication off
+DEDUPE_DISTANCE = int(os.getenv('DETECT_DEDUPE_DISTANCE', 6))
 
-# Load YOLOv8 model
-model = YOLO('yolov8l.pt')  # Switch to 'yolov8x.pt' for better detection
-logging.info("✅ YOLOv8 model loaded")
+# Paths
+# Media indexes to detect on: DETECT_INDEX_PATH, or every dated index the scraper wrote
+index_path = os.getenv('DETECT_INDEX_PATH')
+index_glob = '../../data/raw/media_index_*.json'
+# Ledger of (image content hash, model version) already detected
+ledger_path = os.getenv('DETECT_LEDGER_PATH', '../../data/cache/detection_ledger.sqlite')
+# One JSON record per line; `.partial` next to it while a run is in progress
+output_path = os.getenv('DETECT_OUTPUT_PATH', '../../data/processed/media_detection_results.jsonl')
 
-# Load message index
-index_path = '../../data/raw/media_index_2025-07-12.json'
-try:
-    with open(index_path, 'r') as f:
-        index_data = json.load(f)
-    logging.info(f"📄 Loaded message index from {index_path} with {len(index_data)} entries")
-except Exception as e:
-    logging.error(f"❌ Failed to load index file: {e}")
-    exit(1)
 
-# Output setup
-output_json_path = '../../data/processed/media_detection_results.json'
-bounding_dir = '../../data/processed/annotated'
-os.makedirs(bounding_dir, exist_ok=True)
+def load_model(threads=TORCH_THREADS):
+    model = load_detector(DETECT_BACKEND, MODEL_WEIGHTS, IMAGE_SIZE, threads, MODEL_CACHE_DIR)
+    logging.info(f"✅ YOLOv8 model loaded ({MODEL_WEIGHTS}, backend={DETECT_BACKEND}, batch={BATCH_SIZE}, "
+                 f"imgsz={IMAGE_SIZE}, threads={threads})")
+    return model
 
-results = []
 
-for entry in index_data:
-    image_path = os.path.join("../../", entry["image_path"])
-    message_id = entry["message_id"]
-    channel = entry["channel_name"]
-    filename = os.path.basename(image_path)
+def letterbox(image, size, color=(114, 114, 114)):
+    """
+    Resizes `image` to fit `size` x `size` keeping its aspect ratio and pads
+    the rest, as YOLO's own preprocessing does. Returns the padded image and
+    the geometry needed to map it back: (pad_w, pad_h, new_w, new_h, w, h).
+    """
+    h, w = image.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = round(w * ratio), round(h * ratio)
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_w, pad_h = (size - new_w) // 2, (size - new_h) // 2
+    padded = cv2.copyMakeBorder(image, pad_h, size - new_h - pad_h, pad_w, size - new_w - pad_w,
+                                cv2.BORDER_CONSTANT, value=color)
+    return padded, (pad_w, pad_h, new_w, new_h, w, h)
 
-    logging.info(f"🔍 Processing image: {filename} (message_id={message_id})")
 
-    if not os.path.isfile(image_path):
-        logging.warning(f"⚠️ Image not found: {image_path}")
-        continue
+def unletterbox_box(box, geometry):
+    """Maps an [x1, y1, x2, y2] box on the letterboxed image back to original pixels."""
+    pad_w, pad_h, new_w, new_h, w, h = geometry
+    sx, sy = w / new_w, h / new_h
+    x1, y1, x2, y2 = box
+    return [
+        round(min(max((x1 - pad_w) * sx, 0), w), 1),
+        round(min(max((y1 - pad_h) * sy, 0), h), 1),
+        round(min(max((x2 - pad_w) * sx, 0), w), 1),
+        round(min(max((y2 - pad_h) * sy, 0), h), 1),
+    ]
 
-    try:
-        result = model(image_path)[0]
-        boxes = result.boxes
-
-        # Save annotated image
-        imarray = result.plot()
-        annotated_path = os.path.join(bounding_dir, f"processed_{filename}")
-        cv2.imwrite(annotated_path, imarray)
-        logging.info(f"📸 Saved annotated image to {annotated_path}")
-
-        # Extract detections
-        image_detections = []
-        for box in boxes:
-            cls = int(box.cls[0])
-            conf = float(box.conf[0])
-            label = model.names[cls]
-
-            image_detections.append({
-                "label": label,
-                "confidence": round(conf, 3)
-            })
-
-        results.append({
-            "message_id": message_id,
-            "channel_name": channel,
-            "image_path": image_path,
-            "detections": image_detections
+
+def load_image(pair):
+    """Prefetch stage: read, decode and letterbox one image (runs on the decode pool)."""
+    _, image_path = pair
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f"could not read or decode {image_path}")
+    return letterbox(image, IMAGE_SIZE)
+
+
+# Bump when the shape of stored detections changes, so ledger entries are redone
+RECORD_FORMAT = 2  # 2: class ids and boxes
+
+
+def model_version():
+    # Hash the weights file the model will actually load (downloaded first on a fresh
+    # machine), so the version doesn't change once the weights appear on disk
+    return os.getenv('DETECT_MODEL_VERSION') or (
+        f"{weights_version(resolve_weights(MODEL_WEIGHTS), IMAGE_SIZE, DETECT_BACKEND)}:r{RECORD_FORMAT}"
+    )
+
+
+def load_index():
+    """Media index entries to detect on, deduplicated by (channel, message id)."""
+    paths = [index_path] if index_path else sorted(glob.glob(index_glob))
+    entries = {}
+    for path in paths:
+        with open(path, 'r') as f:
+            for entry in json.load(f):
+                entries[(entry["channel_name"], entry["message_id"])] = entry
+        logging.info(f"📄 Loaded message index from {path}")
+    return list(entries.values())
+
+
+def make_record(entry, image_path, detections):
+    return {
+        "message_id": entry["message_id"],
+        "channel_name": entry["channel_name"],
+        "image_path": image_path,
+        "content_hash": entry.get("content_hash"),
+        "detections": detections
+    }
+
+
+def to_record(model, entry, image_path, result, geometry):
+    """
+    Turns one YOLO result into an output record. Annotated images are not
+    drawn here; the analytics API renders them from the stored boxes on request.
+    """
+    return make_record(entry, image_path, detections_of(model, result, geometry))
+
+
+def detections_of(model, result, geometry):
+    """Label, class id, confidence and box (original image pixels) of each detection."""
+    boxes = result.boxes
+    image_detections = []
+    for cls, conf, box in zip(boxes.cls.tolist(), boxes.conf.tolist(), boxes.xyxy.tolist()):
+        image_detections.append({
+            "label": model.names[int(cls)],
+            "class_id": int(cls),
+            "confidence": round(conf, 3),
+            "box": unletterbox_box(box, geometry),
         })
+    return image_detections
+
 
+def detect_batch(model, batch):
+    """
+    Runs one batch of decoded (entry, image_path, image, geometry) items
+    through the model in a single call and returns (item, result) pairs. If
+    the batch fails, images are retried one by one so a bad input only costs
+    its own result.
+    """
+    images = [image for _, _, image, _ in batch]
+    try:
+        predictions = model.predict(images, imgsz=IMAGE_SIZE, batch=len(images), verbose=False)
     except Exception as e:
-        logging.error(f"❌ Error during detection: {e}")
-
-logging.info("✅ Finished YOLOv8 inference script")
-logging.info(f"📄 Saving detection result for {len(results)} images")
-
-# Save all results
-try:
-    with open(output_json_path, 'w') as f:
-        json.dump(results, f, indent=2)
-    logging.info(f"✅ Saved full detection results to {output_json_path}")
-except Exception as e:
-    logging.error(f"❌ Failed to write JSON output: {e}")
\ No newline at end of file
+        if len(batch) == 1:
+            logging.error(f"❌ Error during detection of {batch[0][1]}: {e}")
+            return []
+        logging.warning(f"⚠️ Batch of {len(batch)} failed ({e}); retrying images one by one")
+        return [pair for item in batch for pair in detect_batch(model, [item])]
+    return list(zip(batch, predictions))
+
+
+def run_pipeline(model, pending, on_record=None, on_batch=None):
+    """
+    Staged detection: the decode pool prefetches and letterboxes upcoming
+    images, the main thread only runs the model, and a background writer
+    turns results into records. The writer calls
+    `on_record(record)` per image and `on_batch()` once a batch's records
+    are all handled. Returns the records.
+    """
+    results = []
+
+    def write(pair):
+        if pair is None:  # batch boundary
+            if on_batch is not None:
+                on_batch()
+            return
+        (entry, image_path, _, geometry), result = pair
+        record = to_record(model, entry, image_path, result, geometry)
+        results.append(record)
+        if on_record is not None:
+            on_record(record)
+
+    batch = []
+    with BackgroundWriter(write, depth=PREFETCH_DEPTH) as writer:
+        def flush():
+            logging.info(f"🔍 Processing batch of {len(batch)} images "
+                         f"(message_ids={[item[0]['message_id'] for item in batch]})")
+            for pair in detect_batch(model, batch):
+                writer.submit(pair)
+            writer.submit(None)
+            batch.clear()
+
+        for (entry, image_path), decoded, error in Prefetcher(pending, load_image, DECODE_WORKERS, PREFETCH_DEPTH):
+            if error is not None:
+                logging.error(f"❌ Error loading {image_path}: {error}")
+                continue
+            batch.append((entry, image_path) + decoded)
+            if len(batch) == BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+
+    if writer.failed:
+        logging.warning(f"⚠️ {writer.failed} results could not be written")
+    return results
+
+
+def init_worker(worker_id):
+    """Runs once in each worker process: loads that worker's own model."""
+    logging.info(f"🧵 Worker {worker_id} (pid {os.getpid()}) loading model with {WORKER_THREADS} threads")
+    return load_model(WORKER_THREADS)
+
+
+def detect_shard(model, shard):
+    """Worker side: detects one shard and returns its records."""
+    return run_pipeline(model, shard)
+
+
+def run_sharded_detection(pending, on_record, on_batch):
+    """
+    Splits `pending` into shards detected by DETECT_WORKERS processes. Each
+    finished shard is saved (`on_record`, then `on_batch`) as soon as it
+    arrives, so if a worker dies the other workers' results are kept and its
+    own shard is retried elsewhere.
+    """
+    shards = [pending[i:i + SHARD_SIZE] for i in range(0, len(pending), SHARD_SIZE)]
+    results = []
+
+    def on_done(shard_id, records):
+        for record in records:
+            results.append(record)
+            on_record(record)
+        on_batch()
+        logging.info(f"📦 Shard {shard_id + 1}/{len(shards)} done ({len(records)} images)")
+
+    logging.info(f"🧵 Detecting {len(pending)} images in {len(shards)} shards on {DETECT_WORKERS} workers")
+    failed = run_sharded(shards, init_worker, detect_shard, on_done, workers=DETECT_WORKERS)
+    if failed:
+        logging.error(f"❌ {sum(len(shards[i]) for i in failed)} images in {len(failed)} shards were not "
+                      f"detected; they will be picked up by the next run")
+    return results
+
+
+def run_detection(model=None):
+    """
+    Detects every new or changed image in the media index and writes the
+    results file. With `model` (e.g. the resident inference worker's warm
+    model) detection runs in this process on that model; otherwise a model is
+    loaded, or DETECT_WORKERS processes are started. Returns a summary.
+    """
+    index_data = load_index()
+    logging.info(f"📄 {len(index_data)} media entries to check")
+
+    ledger = DetectionLedger(ledger_path, model_version())
+    logging.info(f"📒 Detection ledger {ledger_path} (model version {ledger.model_version})")
+    checkpoint = DetectionCheckpoint(output_path)
+    resumed = checkpoint.completed()
+    if resumed:
+        logging.info(f"♻️ Resuming interrupted run: {len(resumed)} images already detected")
+
+    # Only images whose content is new to this model version go through YOLO
+    pending, results = [], []
+    for entry in index_data:
+        image_path = os.path.join("../../", entry["image_path"])
+        if not os.path.isfile(image_path):
+            logging.warning(f"⚠️ Image not found: {image_path}")
+            continue
+        entry = dict(entry, content_hash=ledger.content_hash(image_path))
+        done = resumed.get(record_key(entry))
+        detections = done["detections"] if done else ledger.get(entry["content_hash"])
+        if detections is not None:
+            results.append(make_record(entry, image_path, detections))
+        else:
+            pending.append((entry, image_path))
+    logging.info(f"📒 {len(results)} images unchanged since last run, {len(pending)} to detect")
+
+    # Near-duplicates of a photo (reposts, re-encodes, slight crops) only go through YOLO once
+    duplicates, reused = {}, []
+    if DEDUPE_DISTANCE >= 0 and pending:
+        pending, duplicates, reused = dedupe_pending(pending, ledger, DEDUPE_DISTANCE, DECODE_WORKERS, PREFETCH_DEPTH)
+        reused = [make_record(entry, image_path, detections) for entry, image_path, detections in reused]
+        results += reused
+        copies = sum(len(members) for members in duplicates.values())
+        logging.info(f"🪞 {len(reused)} images reuse detections of near-duplicates from earlier runs, "
+                     f"{copies} will reuse detections from {len(duplicates)} representatives; "
+                     f"{len(pending)} to detect")
+    copied = []
+
+    # Every finished batch is appended to the checkpoint and fsync'd
+    def save(record):
+        ledger.put(record["content_hash"], record["detections"])
+        checkpoint.append(record)
+        for entry, image_path, size, source_size in duplicates.pop(record_key(record), []):
+            copy = make_record(entry, image_path, copy_detections(record["detections"], source_size, size))
+            ledger.put(copy["content_hash"], copy["detections"])
+            checkpoint.append(copy)
+            copied.append(copy)
+
+    def end_batch():
+        checkpoint.sync()
+        ledger.commit()
+
+    started = datetime.now()
+    try:
+        if model is None and DETECT_WORKERS > 1 and pending:
+            results += run_sharded_detection(pending, save, end_batch)
+        elif pending:
+            results += run_pipeline(model or load_model(), pending, save, end_batch)
+    finally:
+        checkpoint.close()
+        ledger.close()
+    results += copied
+    if duplicates:
+        logging.warning(f"⚠️ {sum(len(m) for m in duplicates.values())} near-duplicates were not copied because "
+                        f"their representative was not detected; they will be picked up by the next run")
+
+    # Deterministic output: index order, whatever was cached or which worker detected it
+    order = {(entry["channel_name"], entry["message_id"]): i for i, entry in enumerate(index_data)}
+    results.sort(key=lambda record: order[(record["channel_name"], record["message_id"])])
+
+    elapsed = (datetime.now() - started).total_seconds()
+    logging.info(f"✅ Finished YOLOv8 inference script ({len(pending)} images in {elapsed:.1f}s)")
+    logging.info(f"📄 Saving detection result for {len(results)} images")
+
+    # Save all results (replaces the checkpoint)
+    checkpoint.finalize(results)
+    logging.info(f"✅ Saved full detection results to {output_path}")
+    return {"images": len(results), "detected": len(pending), "copied": len(copied) + len(reused),
+            "seconds": round(elapsed, 1), "output": output_path}
+
+
+def main():
+    logging.info(" Starting YOLOv8 inference script...")
+    try:
+        run_detection()
+    except Exception as e:
+        logging.error(f"❌ Detection run failed: {e}", exc_info=True)
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
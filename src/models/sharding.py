@@ -0,0 +1,109 @@
+import queue
+import logging
+import multiprocessing
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+def _worker(worker_id, init, handle, jobs, results):
+    state = init(worker_id)
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        shard_id, shard = job
+        try:
+            results.put(('done', worker_id, shard_id, handle(state, shard)))
+        except Exception as e:
+            results.put(('failed', worker_id, shard_id, repr(e)))
+
+
+def run_sharded(shards, init, handle, on_done, workers=2, window=2, max_attempts=2,
+                mp_context='spawn', poll_seconds=1.0):
+    """
+    Processes `shards` on `workers` processes and returns the ids of shards
+    that could not be completed.
+
+    Each worker calls `init(worker_id)` once (e.g. to load its own model) and
+    then `handle(state, shard)` for each shard it is given. The parent hands
+    every worker at most `window` shards at a time, so it always knows what
+    a worker was holding: when a worker process dies, only those shards are
+    lost, and they are handed to the surviving workers (up to `max_attempts`
+    tries per shard). Finished shards are passed to `on_done(shard_id, result)`
+    in the parent as soon as they arrive, so a crash never discards work
+    other workers already finished. `init` and `handle` must be picklable
+    (module-level functions).
+    """
+    ctx = multiprocessing.get_context(mp_context)
+    shards = dict(enumerate(shards))
+    todo = deque(shards)
+    attempts = {shard_id: 0 for shard_id in shards}
+    failed = []
+
+    results = ctx.Queue()
+    jobs, assigned, procs = {}, {}, {}
+    for worker_id in range(min(workers, len(shards))):
+        jobs[worker_id] = ctx.Queue()
+        assigned[worker_id] = set()
+        procs[worker_id] = ctx.Process(
+            target=_worker, args=(worker_id, init, handle, jobs[worker_id], results),
+            name=f'detect-worker-{worker_id}', daemon=True,
+        )
+        procs[worker_id].start()
+
+    def hand_out():
+        for worker_id in procs:
+            while todo and len(assigned[worker_id]) < window:
+                shard_id = todo.popleft()
+                attempts[shard_id] += 1
+                assigned[worker_id].add(shard_id)
+                jobs[worker_id].put((shard_id, shards[shard_id]))
+
+    def reap_dead():
+        for worker_id, proc in list(procs.items()):
+            if proc.is_alive():
+                continue
+            lost = sorted(assigned.pop(worker_id))
+            del procs[worker_id]
+            logger.error(f"💥 Worker {worker_id} exited with code {proc.exitcode}; "
+                         f"{len(lost)} unfinished shards handed to other workers")
+            for shard_id in lost:
+                if attempts[shard_id] < max_attempts:
+                    todo.append(shard_id)
+                else:
+                    outstanding.discard(shard_id)
+                    failed.append(shard_id)
+
+    outstanding = set(shards)
+    try:
+        hand_out()
+        while outstanding and procs:
+            try:
+                kind, worker_id, shard_id, payload = results.get(timeout=poll_seconds)
+            except queue.Empty:
+                reap_dead()
+                hand_out()
+                continue
+
+            assigned.get(worker_id, set()).discard(shard_id)
+            if shard_id not in outstanding:
+                continue
+            outstanding.discard(shard_id)
+            if kind == 'done':
+                on_done(shard_id, payload)
+            else:
+                logger.error(f"❌ Shard {shard_id} failed on worker {worker_id}: {payload}")
+                failed.append(shard_id)
+            hand_out()
+    finally:
+        for worker_id, proc in procs.items():
+            jobs[worker_id].put(None)
+        for proc in procs.values():
+            proc.join(timeout=30)
+            if proc.is_alive():
+                proc.terminate()
+
+    # Anything still unassigned when the last worker died is lost too
+    failed.extend(todo)
+    return sorted(failed)
@@ -0,0 +1,74 @@
+import os
+import asyncio
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+def write_atomic(path, data):
+    """Writes `data` through a temp file in the same directory, then renames it."""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+class MediaDownloader:
+    """
+    Bounded pool of concurrent photo downloads.
+
+    - at most `concurrency` downloads are in flight at once
+    - files already on disk are not downloaded again
+    - photos are deduplicated by Telegram photo id, so album posts or
+      reposts that share a photo are fetched once and point at the same file
+    - each file is written through a temp file, so a crash never leaves a
+      half-written image behind
+    """
+
+    def __init__(self, client, base_path, concurrency=8, backoff=None):
+        self.client = client
+        self.base_path = base_path
+        # optional `async backoff(task_factory, label)` wrapper, e.g. flood-wait retries
+        self._backoff = backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._by_photo_id = {}  # photo id -> Task resolving to the saved filename
+        self.downloaded = 0
+        self.skipped = 0
+
+    async def _download(self, media, filename):
+        save_path = os.path.join(self.base_path, filename)
+        if os.path.isfile(save_path) and os.path.getsize(save_path) > 0:
+            self.skipped += 1
+            return filename
+
+        async with self._semaphore:
+            if self._backoff is None:
+                data = await self.client.download_media(media, file=bytes)
+            else:
+                data = await self._backoff(lambda: self.client.download_media(media, file=bytes), filename)
+        write_atomic(save_path, data)
+        self.downloaded += 1
+        logger.info(f"📷 Saved image: {save_path}")
+        return filename
+
+    def fetch(self, media, filename):
+        """
+        Schedules the download of `media` as `filename` and returns a task
+        resolving to the filename actually holding the photo (an earlier
+        file if the same photo was already fetched).
+        """
+        photo_id = getattr(getattr(media, 'photo', None), 'id', None)
+        if photo_id is not None and photo_id in self._by_photo_id:
+            self.skipped += 1
+            return self._by_photo_id[photo_id]
+
+        task = asyncio.ensure_future(self._download(media, filename))
+        if photo_id is not None:
+            self._by_photo_id[photo_id] = task
+        return task
@@ -0,0 +1,237 @@
+import os
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime
+from types import SimpleNamespace
+
+from src.utils.ndjson import iter_message_file
+
+MESSAGE_FILE_SUFFIXES = ('.ndjson.gz', '.ndjson', '.json')
+
+
+class MessageSource(ABC):
+    """
+    Where the scraper reads channels from.
+
+    The scraper only needs four calls, mirroring the Telethon client:
+    `get_entity`, `iter_messages` (an async iterator of messages exposing
+    `.id`, `.date`, `.media` and `.to_dict()`), `download_media` and
+    `flood_wait_seconds` to recognise rate-limit errors. Sources are async
+    context managers: `async with source: ...` connects and disconnects.
+    """
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @abstractmethod
+    async def get_entity(self, channel):
+        ...
+
+    @abstractmethod
+    def iter_messages(self, entity, limit=None, min_id=0, reverse=False):
+        ...
+
+    @abstractmethod
+    async def download_media(self, media, file=bytes):
+        ...
+
+    def flood_wait_seconds(self, error):
+        """Seconds to wait if `error` is a rate-limit error, else None."""
+        return None
+
+
+class TelethonSource(MessageSource):
+    """Live Telegram via Telethon; credentials are read when the source is built."""
+
+    def __init__(self, session='scraping_session', env_path='../../.env'):
+        from telethon import TelegramClient
+        from config.config import load_credentials
+
+        creds = load_credentials(env_path)
+        self.phone = creds['phone']
+        self.client = TelegramClient(session, creds['api_id'], creds['api_hash'])
+
+    async def start(self):
+        await self.client.start(phone=self.phone)
+
+    async def close(self):
+        await self.client.disconnect()
+
+    async def get_entity(self, channel):
+        return await self.client.get_entity(channel)
+
+    async def iter_messages(self, entity, limit=None, min_id=0, reverse=False):
+        from telethon.tl.types import Message
+
+        async for msg in self.client.iter_messages(entity, limit=limit, min_id=min_id, reverse=reverse):
+            if isinstance(msg, Message):  # skip service messages (joins, pins, ...)
+                yield msg
+
+    async def download_media(self, media, file=bytes):
+        return await self.client.download_media(media, file=file)
+
+    def flood_wait_seconds(self, error):
+        from telethon.errors import FloodWaitError
+        return error.seconds if isinstance(error, FloodWaitError) else None
+
+
+class ReplayMessage:
+    """A recorded message, shaped like the Telethon messages the scraper uses."""
+
+    __slots__ = ('id', 'date', 'media', '_raw')
+
+    def __init__(self, message_id, date, media, raw):
+        self.id = message_id
+        self.date = date
+        self.media = media
+        self._raw = raw
+
+    def to_dict(self):
+        raw = dict(self._raw, id=self.id)
+        if self.media is not None and isinstance(raw.get('media'), dict):
+            # Replayed copies carry the same shifted photo id as `media.photo.id`
+            media = dict(raw['media'])
+            media['photo'] = dict(media['photo'], id=self.media.photo.id)
+            raw['media'] = media
+        return raw
+
+
+class ReplaySource(MessageSource):
+    """
+    Offline source serving recorded scraper output.
+
+    Messages come from the per-channel dumps under `dump_dir`
+    (`<date>/<channel>.ndjson[.gz]` or legacy `.json`, as the scraper writes
+    them); photos are served from `media_dir/<channel>_<message_id>.jpg`.
+
+    - `rate`: cap on messages per second across the whole source (None = unthrottled)
+    - `latency`: seconds added to every simulated API call (entity lookup,
+      history page of `page_size` messages, media download)
+    - `repeat`: replay each channel's history this many times with shifted
+      ids (and photo ids), to simulate higher volume from the same dumps
+    - `missing_media_bytes`: size of placeholder bytes served when a recorded
+      photo has no image file; 0 raises FileNotFoundError instead
+    """
+
+    def __init__(self, dump_dir, media_dir=None, rate=None, latency=0.0, repeat=1,
+                 page_size=100, missing_media_bytes=0):
+        self.dump_dir = dump_dir
+        self.media_dir = media_dir
+        self.rate = rate
+        self.latency = latency
+        self.repeat = repeat
+        self.page_size = page_size
+        self.missing_media_bytes = missing_media_bytes
+        self._channels = {}     # channel -> sorted list of ReplayMessage
+        self._next_slot = 0.0   # monotonic time the next message may be served
+
+    # ---------------- loading ----------------
+
+    def _dump_files(self, channel):
+        for root, _, files in os.walk(self.dump_dir):
+            for filename in sorted(files):
+                for suffix in MESSAGE_FILE_SUFFIXES:
+                    if filename.endswith(suffix) and filename[:-len(suffix)] == channel:
+                        yield os.path.join(root, filename)
+
+    def _media_for(self, channel, raw, photo_shift):
+        media = raw.get('media') or {}
+        photo = media.get('photo') if isinstance(media, dict) else None
+        if not photo:
+            return None
+        path = os.path.join(self.media_dir, f"{channel}_{raw['id']}.jpg") if self.media_dir else None
+        return SimpleNamespace(photo=SimpleNamespace(id=photo.get('id', raw['id']) + photo_shift), path=path)
+
+    def _load(self, channel):
+        recorded = {}
+        for path in self._dump_files(channel):
+            for raw in iter_message_file(path):
+                if raw.get('id') is not None:
+                    recorded[raw['id']] = raw
+        if not recorded:
+            raise ValueError(f'No recorded messages for channel "{channel}" under {self.dump_dir}')
+
+        span = max(recorded)
+        messages = []
+        for k in range(self.repeat):
+            for message_id in sorted(recorded):
+                raw = recorded[message_id]
+                date = datetime.fromisoformat(raw['date']) if raw.get('date') else None
+                messages.append(ReplayMessage(
+                    message_id + k * span, date, self._media_for(channel, raw, k * span), raw
+                ))
+        return messages
+
+    # ---------------- simulated API ----------------
+
+    async def _throttle(self):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self._next_slot = max(self._next_slot, now) + 1 / self.rate
+        delay = self._next_slot - 1 / self.rate - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def get_entity(self, channel):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        name = channel.strip('@')
+        if name not in self._channels:
+            self._channels[name] = self._load(name)
+        return SimpleNamespace(username=name)
+
+    async def iter_messages(self, entity, limit=None, min_id=0, reverse=False):
+        messages = [m for m in self._channels[entity.username] if m.id > (min_id or 0)]
+        if not reverse:
+            messages.reverse()  # newest first, like Telegram
+        if limit is not None:
+            messages = messages[:limit]
+
+        for i, msg in enumerate(messages):
+            if self.latency and i % self.page_size == 0:
+                await asyncio.sleep(self.latency)
+            await self._throttle()
+            yield msg
+
+    async def download_media(self, media, file=bytes):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if media.path and os.path.isfile(media.path):
+            with open(media.path, 'rb') as f:
+                return f.read()
+        if self.missing_media_bytes:
+            return b'\0' * self.missing_media_bytes
+        raise FileNotFoundError(f'No recorded image at {media.path}')
+
+
+def make_source(kind=None):
+    """
+    Builds the source named by `kind` or the MESSAGE_SOURCE env var:
+    "telethon" (default) or "replay" (configured by REPLAY_* env vars).
+    """
+    kind = (kind or os.getenv('MESSAGE_SOURCE', 'telethon')).lower()
+    if kind == 'telethon':
+        return TelethonSource(session=os.getenv('TELEGRAM_SESSION', 'scraping_session'))
+    if kind == 'replay':
+        rate = os.getenv('REPLAY_RATE')
+        return ReplaySource(
+            dump_dir=os.getenv('REPLAY_DIR', '../../data/raw/telegram_messages'),
+            media_dir=os.getenv('REPLAY_MEDIA_DIR', '../../data/raw/telegram_media'),
+            rate=float(rate) if rate else None,
+            latency=float(os.getenv('REPLAY_LATENCY', 0)),
+            repeat=int(os.getenv('REPLAY_REPEAT', 1)),
+            missing_media_bytes=int(os.getenv('REPLAY_MISSING_MEDIA_BYTES', 0)),
+        )
+    raise ValueError(f'Unknown MESSAGE_SOURCE "{kind}" (expected "telethon" or "replay")')
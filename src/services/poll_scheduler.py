@@ -0,0 +1,79 @@
+import math
+from datetime import datetime, timedelta
+
+
+class PollScheduler:
+    """
+    Decides which channels to poll next from their observed posting rates.
+
+    Telegram channel message ids are sequential, so the distance a watermark
+    moved between two polls is the number of posts in between. Each poll
+    folds that into an exponentially weighted posts-per-hour estimate, and the
+    channel's next poll is scheduled so that about `target_posts_per_poll`
+    new posts are waiting, clamped to [min_interval, max_interval]. Busy
+    channels are therefore polled often and dormant ones rarely.
+
+    `due_channels` never hands out more polls than the caller's budget;
+    when more channels are due than the budget allows, the most overdue
+    (relative to their interval) go first. Stats live in the WatermarkStore
+    next to the watermarks they are derived from.
+    """
+
+    def __init__(self, watermarks, min_interval=timedelta(minutes=10),
+                 max_interval=timedelta(hours=24), target_posts_per_poll=20,
+                 smoothing=0.3):
+        self.watermarks = watermarks
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_posts_per_poll = target_posts_per_poll
+        self.smoothing = smoothing
+
+    def rate(self, channel):
+        """Estimated posts per hour (None until the channel was polled twice)."""
+        return self.watermarks.poll_stats(channel).get('posts_per_hour')
+
+    def interval(self, channel):
+        rate = self.rate(channel)
+        if rate is None:
+            return self.min_interval  # unknown channel: learn quickly
+        if rate <= 0:
+            return self.max_interval
+        wanted = timedelta(hours=self.target_posts_per_poll / rate)
+        return max(self.min_interval, min(self.max_interval, wanted))
+
+    def next_due(self, channel):
+        stats = self.watermarks.poll_stats(channel)
+        if 'last_polled' not in stats:
+            return datetime.min  # never polled
+        return datetime.fromisoformat(stats['last_polled']) + self.interval(channel)
+
+    def record_poll(self, channel, new_posts, now=None):
+        """Folds a finished poll (`new_posts` since the previous one) into the rate."""
+        now = now or datetime.now()
+        stats = self.watermarks.poll_stats(channel)
+        if 'last_polled' in stats:
+            hours = (now - datetime.fromisoformat(stats['last_polled'])).total_seconds() / 3600
+            if hours > 0:
+                observed = new_posts / hours
+                previous = stats.get('posts_per_hour')
+                stats['posts_per_hour'] = observed if previous is None else (
+                    self.smoothing * observed + (1 - self.smoothing) * previous
+                )
+        stats['last_polled'] = now.isoformat()
+        self.watermarks.set_poll_stats(channel, stats)
+
+    def due_channels(self, channels, budget, now=None):
+        """Up to `budget` channels whose next poll is due, most overdue first."""
+        now = now or datetime.now()
+        budget = math.floor(budget)
+        if budget <= 0:
+            return []
+
+        def overdue(channel):
+            due = self.next_due(channel)
+            if due == datetime.min:
+                return math.inf
+            return (now - due) / self.interval(channel)
+
+        due = [ch for ch in channels if self.next_due(ch) <= now]
+        return sorted(due, key=overdue, reverse=True)[:budget]
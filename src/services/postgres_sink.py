@@ -0,0 +1,268 @@
+import os
+import json
+import asyncio
+import logging
+from datetime import datetime
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from src.utils.ndjson import clean_message
+
+logger = logging.getLogger(__name__)
+
+# ✅ Rows kept while Postgres is unreachable; beyond this the oldest are dropped
+# (the watermark is held back so the next backfill or nightly run refetches them)
+MAX_BUFFERED_ROWS = int(os.getenv('DAEMON_MAX_BUFFERED_ROWS', 50000))
+# ✅ Pause between flush attempts after a failed one
+RETRY_SECONDS = float(os.getenv('DAEMON_RETRY_SECONDS', 30))
+
+
+class PostgresSink:
+    """
+    Buffers new messages and media metadata and writes them to
+    raw.telegram_messages / raw.telegram_media in batches.
+
+    Rows are upserted on (channel_name, message_id), so edits overwrite the
+    stored message and replays are harmless. Detections replace the image's
+    previous rows in raw.media_detections, as load_media_detections.py does;
+    the table is created (or given its box columns, on older databases)
+    before the first detections are written. Saved photos are also passed
+    to `index_media` (the day's media index), so the nightly detection run
+    sees them. Writes run in a worker thread to keep the event loop
+    responsive.
+
+    `connect()` opens the Postgres connection; it is reopened after a
+    connection error. While Postgres is down, rows stay buffered up to
+    `max_rows`; the oldest are dropped beyond that.
+
+    Watermarks only advance past rows that reached Postgres: they are held
+    below dropped rows, failed photo downloads and downloads still in flight
+    (`media_started` / `media_finished`). A hold is released once its rows
+    are written after all, or once another scraper has moved the watermark
+    past them (i.e. fetched them again).
+    """
+
+    def __init__(self, connect, watermarks=None, max_rows=MAX_BUFFERED_ROWS, media_path='', index_media=None):
+        self.connect = connect
+        self.conn = None
+        self.watermarks = watermarks
+        self.max_rows = max_rows
+        self.media_path = media_path
+        self.index_media = index_media
+        self._messages = {}  # (channel, message_id) -> row; later edits win
+        self._media = {}
+        self._detections = {}  # (channel, message_id) -> detection rows
+        self._newest = {}    # (stream, channel) -> (message_id, date)
+        self._dropped = {}   # (stream, channel) -> ids dropped or not downloaded, not yet written
+        self._in_flight = {}  # ('media', channel) -> ids whose download is still running
+        self._retry_at = 0.0
+        self._detections_ready = False
+        self._lock = asyncio.Lock()
+
+    def pending(self):
+        return len(self._messages) + len(self._media) + len(self._detections)
+
+    def _track(self, stream, channel, message_id, date):
+        key = (stream, channel)
+        if key not in self._newest or message_id > self._newest[key][0]:
+            self._newest[key] = (message_id, date)
+
+    def add_message(self, channel, msg):
+        self._messages[(channel, msg.id)] = (
+            channel, datetime.now(), msg.id, json.dumps(clean_message(msg.to_dict()), ensure_ascii=False)
+        )
+        self._track('messages', channel, msg.id, msg.date)
+        self._drop_oldest()
+
+    def add_media(self, channel, msg, filename):
+        self._media[(channel, msg.id)] = (
+            channel, msg.id, filename,
+            os.path.join(self.media_path, filename).replace("../../", ""),
+            datetime.now(),
+        )
+        self._track('media', channel, msg.id, msg.date)
+        self._drop_oldest()
+
+    def add_detections(self, channel, message_id, image_path, detections):
+        rows = [(message_id, channel, image_path, d["label"], d["confidence"], d.get("class_id"),
+                 *(d.get("box") or (None, None, None, None))) for d in detections]
+        self._detections[(channel, message_id)] = rows or [
+            (message_id, channel, image_path, "no_object_detected", None, None, None, None, None, None)
+        ]
+        self._drop_oldest()
+
+    def media_started(self, channel, message_id):
+        """A photo download began: the media watermark must not pass it until it is saved."""
+        self._in_flight.setdefault(('media', channel), set()).add(message_id)
+
+    def media_finished(self, channel, message_id, saved=True):
+        """A photo download ended; a failed one keeps holding the watermark, like a dropped row."""
+        key = ('media', channel)
+        ids = self._in_flight.get(key, set())
+        ids.discard(message_id)
+        if not ids:
+            self._in_flight.pop(key, None)
+        if not saved:
+            self._dropped.setdefault(key, set()).add(message_id)
+
+    def _held(self, stream, channel):
+        """Lowest message id the channel's watermark must stay below, or None."""
+        key = (stream, channel)
+        ids = self._dropped.get(key, set()) | self._in_flight.get(key, set())
+        return min(ids) if ids else None
+
+    def _release(self, stream, channel, written):
+        """Forgets dropped ids that were written after all, or fetched past by another scraper."""
+        key = (stream, channel)
+        ids = self._dropped.get(key)
+        if not ids:
+            return
+        fetched_up_to = self.watermarks.last_message_id(channel, stream) if self.watermarks is not None else 0
+        ids.difference_update(written)
+        ids.difference_update([i for i in ids if i <= fetched_up_to])
+        if not ids:
+            del self._dropped[key]
+
+    def _drop_oldest(self):
+        """Enforces `max_rows`, oldest first, remembering what was dropped."""
+        if self.pending() <= self.max_rows:
+            return
+        dropped = 0
+        for stream, rows in (('messages', self._messages), ('media', self._media), (None, self._detections)):
+            while self.pending() > self.max_rows and rows:
+                channel, message_id = next(iter(rows))
+                del rows[(channel, message_id)]
+                dropped += 1
+                if stream is not None:
+                    self._dropped.setdefault((stream, channel), set()).add(message_id)
+        if dropped:
+            logger.warning(f"⚠️ Buffer full ({self.max_rows} rows): dropped {dropped} of the oldest rows; "
+                           f"they will be fetched again from the held-back watermarks")
+
+    def _ensure_detection_table(self):
+        """Creates or migrates raw.media_detections as load_media_detections.py does."""
+        with self.conn:
+            with self.conn.cursor() as cur:
+                cur.execute("""
+                    CREATE SCHEMA IF NOT EXISTS raw;
+                    CREATE TABLE IF NOT EXISTS raw.media_detections (
+                        detection_id SERIAL PRIMARY KEY,
+                        message_id INTEGER,
+                        channel_name TEXT,
+                        image_path TEXT,
+                        label TEXT,
+                        confidence NUMERIC
+                    );
+                    CREATE INDEX IF NOT EXISTS media_detections_image_idx
+                        ON raw.media_detections (channel_name, message_id);
+                    ALTER TABLE raw.media_detections
+                        ADD COLUMN IF NOT EXISTS class_id INTEGER,
+                        ADD COLUMN IF NOT EXISTS box_x1 REAL,
+                        ADD COLUMN IF NOT EXISTS box_y1 REAL,
+                        ADD COLUMN IF NOT EXISTS box_x2 REAL,
+                        ADD COLUMN IF NOT EXISTS box_y2 REAL;
+                """)
+        self._detections_ready = True
+
+    def _write(self, messages, media, detections=None):
+        if self.conn is None:
+            self.conn = self.connect()
+        if detections and not self._detections_ready:
+            self._ensure_detection_table()
+        with self.conn:
+            with self.conn.cursor() as cur:
+                if messages:
+                    execute_values(cur, """
+                        INSERT INTO raw.telegram_messages (channel_name, scraped_at, message_id, raw_data)
+                        VALUES %s
+                        ON CONFLICT (channel_name, message_id) DO UPDATE SET
+                            scraped_at = EXCLUDED.scraped_at,
+                            raw_data = EXCLUDED.raw_data;
+                    """, messages)
+                if media:
+                    execute_values(cur, """
+                        INSERT INTO raw.telegram_media (channel_name, message_id, image_filename, image_path, scraped_at)
+                        VALUES %s
+                        ON CONFLICT (channel_name, message_id) DO NOTHING;
+                    """, media)
+                if detections:
+                    execute_values(cur, """
+                        DELETE FROM raw.media_detections AS d
+                        USING (VALUES %s) AS img (channel_name, message_id)
+                        WHERE d.channel_name = img.channel_name AND d.message_id = img.message_id;
+                    """, list(detections))
+                    execute_values(cur, """
+                        INSERT INTO raw.media_detections (message_id, channel_name, image_path, label, confidence,
+                                                          class_id, box_x1, box_y1, box_x2, box_y2)
+                        VALUES %s;
+                    """, [row for rows in detections.values() for row in rows])
+
+        if media and self.index_media is not None:
+            self.index_media([
+                {"channel_name": channel, "message_id": message_id, "image_filename": filename,
+                 "image_path": image_path, "scraped_at": scraped_at.isoformat()}
+                for channel, message_id, filename, image_path, scraped_at in media
+            ])
+
+    async def flush(self, force=False):
+        async with self._lock:
+            if not self.pending():
+                return
+            loop = asyncio.get_running_loop()
+            if not force and loop.time() < self._retry_at:
+                return
+            messages, media = list(self._messages.values()), list(self._media.values())
+            detections, newest = self._detections, self._newest
+            self._messages, self._media, self._detections, self._newest = {}, {}, {}, {}
+
+            try:
+                await asyncio.to_thread(self._write, messages, media, detections)
+            except Exception as e:
+                logger.error(f"⚠️ Flush of {len(messages)} messages / {len(media)} media failed: {e}", exc_info=True)
+                if isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+                    # Connection lost: reopen on the next attempt
+                    self.close()
+                # Put the rows back (unless newer versions arrived meanwhile) and retry after a pause
+                restored = ({(row[0], row[2]): row for row in messages},
+                            {(row[0], row[1]): row for row in media}, dict(detections))
+                for buffer, rows in zip((self._messages, self._media, self._detections), restored):
+                    rows.update(buffer)
+                    buffer.clear()
+                    buffer.update(rows)  # oldest first again
+                for (stream, channel), (message_id, date) in newest.items():
+                    self._track(stream, channel, message_id, date)
+                self._drop_oldest()
+                self._retry_at = loop.time() + RETRY_SECONDS
+                return
+
+            logger.info(f"📥 Flushed {len(messages)} messages, {len(media)} media rows and "
+                        f"detections for {len(detections)} images to Postgres")
+
+            written = {}
+            for channel, _, message_id, _ in messages:
+                written.setdefault(('messages', channel), set()).add(message_id)
+            for channel, message_id, *_ in media:
+                written.setdefault(('media', channel), set()).add(message_id)
+            for stream, channel in list(self._dropped):
+                self._release(stream, channel, written.get((stream, channel), ()))
+
+            # Keep the batch scraper's watermarks in step so it doesn't refetch these posts,
+            # but never past rows that have not reached Postgres
+            if self.watermarks is not None:
+                for (stream, channel), (message_id, date) in newest.items():
+                    held = self._held(stream, channel)
+                    if held is not None and message_id >= held:
+                        # Advance the rest of the way once the hold is released
+                        self._track(stream, channel, message_id, date)
+                        message_id, date = held - 1, None
+                    self.watermarks.update(channel, message_id, date, stream=stream)
+                self.watermarks.save()
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
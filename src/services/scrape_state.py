@@ -0,0 +1,115 @@
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single writer assumed
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive advisory lock on `path + '.lock'`, held for the block. The
+    nightly scraper and the daemon share state files; this keeps their
+    read-merge-write cycles from interleaving.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    with open(path + '.lock', 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class WatermarkStore:
+    """
+    Per-channel high-water marks for incremental scraping, kept in a JSON file.
+
+    Each stream ("messages", "media") tracks, per channel, the highest message
+    id already saved and that message's date:
+
+        {"messages": {"CheMed123": {"last_message_id": 120, "last_date": "..."}}}
+
+    The scraper passes `last_message_id` to `iter_messages(min_id=...)`, so a
+    run only fetches posts newer than the previous one.
+
+    Several processes may share the file (nightly scraper, daemon), so
+    `save()` re-reads it under a lock and merges: watermarks keep the higher
+    id, and only the entries this store changed overwrite what others wrote.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._state = self._read()
+        self._changed = set()  # (section, channel) updated since the last save
+
+    def _read(self):
+        if not os.path.isfile(self.path):
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def get(self, channel, stream='messages'):
+        """Returns the watermark dict for `channel`, or None on first run."""
+        return self._state.get(stream, {}).get(channel.strip('@'))
+
+    def last_message_id(self, channel, stream='messages'):
+        mark = self.get(channel, stream)
+        return mark['last_message_id'] if mark else 0
+
+    def update(self, channel, message_id, date=None, stream='messages'):
+        """Moves the watermark forward; older ids are ignored."""
+        if message_id <= self.last_message_id(channel, stream):
+            return
+        if isinstance(date, datetime):
+            date = date.isoformat()
+        self._state.setdefault(stream, {})[channel.strip('@')] = {
+            'last_message_id': message_id,
+            'last_date': date,
+        }
+        self._changed.add((stream, channel.strip('@')))
+
+    def poll_stats(self, channel):
+        """Polling statistics kept for the adaptive scheduler (may be empty)."""
+        return dict(self._state.get('polling', {}).get(channel.strip('@'), {}))
+
+    def set_poll_stats(self, channel, stats):
+        self._state.setdefault('polling', {})[channel.strip('@')] = stats
+        self._changed.add(('polling', channel.strip('@')))
+
+    def _merge(self, stored):
+        """Our changed entries applied on top of `stored` (the file as other writers left it)."""
+        for section, channel in self._changed:
+            ours = self._state[section][channel]
+            theirs = stored.get(section, {}).get(channel)
+            if section != 'polling' and theirs and theirs['last_message_id'] >= ours['last_message_id']:
+                continue
+            stored.setdefault(section, {})[channel] = ours
+        return stored
+
+    def save(self):
+        """
+        Merges into the stored state and writes it atomically, so a crash
+        never leaves a torn file and concurrent writers don't lose updates.
+        """
+        with file_lock(self.path):
+            state = self._merge(self._read())
+            directory = os.path.dirname(self.path) or '.'
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        self._state = state
+        self._changed.clear()
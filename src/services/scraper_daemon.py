@@ -0,0 +1,171 @@
+import os
+import sys
+import asyncio
+import logging
+
+import psycopg2
+from telethon import events, utils
+
+sys.path.append(os.path.abspath("../../"))
+from config.config import load_db_credentials
+from src.services.message_sources import TelethonSource
+from src.models.inference_client import InferenceClient
+from src.services.telegram_scrapper import (
+    MESSAGE_CHANNELS, MEDIA_CHANNELS, BASE_MEDIA_PATH, STATE_PATH,
+    make_downloader, with_flood_backoff, iter_new_messages, save_media_index,
+)
+from src.services.scrape_state import WatermarkStore
+from src.services.postgres_sink import PostgresSink
+
+logger = logging.getLogger(__name__)
+
+# ✅ Flush buffered rows every FLUSH_SECONDS or as soon as FLUSH_ROWS are waiting
+FLUSH_SECONDS = float(os.getenv('DAEMON_FLUSH_SECONDS', 5))
+FLUSH_ROWS = int(os.getenv('DAEMON_FLUSH_ROWS', 500))
+# ✅ Run YOLO on new photos as they arrive, via the resident inference worker
+DETECT_ON_ARRIVAL = os.getenv('DAEMON_DETECT', 'false').lower() in ('1', 'true', 'yes')
+
+
+async def _flush_periodically(sink):
+    while True:
+        await asyncio.sleep(FLUSH_SECONDS)
+        await sink.flush()
+
+
+async def run_forever(connect, source):
+    """
+    Subscribes to all configured channels and streams new posts into Postgres.
+    Needs live update events, so `source` must be a TelethonSource.
+
+    On connect it first backfills everything posted since the shared
+    watermarks (i.e. while neither the daemon nor the nightly scraper was
+    running), so advancing the watermarks never skips posts.
+    """
+    client = source.client
+    sink = PostgresSink(connect, WatermarkStore(STATE_PATH), media_path=BASE_MEDIA_PATH, index_media=save_media_index)
+    downloader = make_downloader(source)
+    background = set()  # strong refs so pending download tasks aren't garbage collected
+    inference = InferenceClient() if DETECT_ON_ARRIVAL else None
+    if inference is not None and not await asyncio.to_thread(inference.available):
+        logger.warning("⚠️ DAEMON_DETECT is set but no inference worker answers; photos are saved "
+                       "and left for the nightly detection run")
+        inference = None
+
+    # Resolve channel usernames once; events carry numeric peer ids
+    channel_names, media_peers = {}, set()
+    for channel in set(MESSAGE_CHANNELS) | set(MEDIA_CHANNELS):
+        entity = await with_flood_backoff(lambda: source.get_entity(channel), channel, source)
+        peer_id = utils.get_peer_id(entity)
+        channel_names[peer_id] = channel.strip('@')
+        if channel in MEDIA_CHANNELS:
+            media_peers.add(peer_id)
+    message_peers = {peer for peer, name in channel_names.items() if f'@{name}' in MESSAGE_CHANNELS}
+
+    async def save_media(channel, msg):
+        try:
+            filename = await downloader.fetch(msg.media, f'{channel}_{msg.id}.jpg')
+        except Exception as e:
+            logger.error(f"⚠️ Failed to download image for {channel} message {msg.id}: {e}")
+            sink.media_finished(channel, msg.id, saved=False)
+            return
+        sink.add_media(channel, msg, filename)
+        sink.media_finished(channel, msg.id)
+
+        # Concurrent arrivals are micro-batched together by the inference worker
+        if inference is not None:
+            image_path = os.path.join(BASE_MEDIA_PATH, filename)
+            try:
+                detections = (await inference.detect_async([image_path]))[0]
+            except Exception as e:
+                logger.error(f"⚠️ Inference worker request failed for {filename}: {e}")
+                detections = None
+            if detections is not None:
+                sink.add_detections(channel, msg.id, image_path, detections)
+
+        if sink.pending() >= FLUSH_ROWS:
+            await sink.flush()
+
+    def schedule_media(channel, msg):
+        # Downloads run as background tasks so a slow photo doesn't hold up other updates;
+        # the media watermark waits for them
+        sink.media_started(channel, msg.id)
+        task = asyncio.create_task(save_media(channel, msg))
+        background.add(task)
+        task.add_done_callback(background.discard)
+
+    async def catch_up(channel, stream):
+        """Fetches a channel's posts newer than its watermark, retrying flood waits."""
+        name = channel.strip('@')
+
+        async def walk():
+            entity = await source.get_entity(channel)
+            async for msg in iter_new_messages(source, entity, channel, sink.watermarks, stream):
+                if stream == 'messages':
+                    sink.add_message(name, msg)
+                elif msg.media and hasattr(msg.media, 'photo'):
+                    schedule_media(name, msg)
+                if sink.pending() >= FLUSH_ROWS:
+                    await sink.flush()
+
+        try:
+            await with_flood_backoff(walk, channel, source)
+        except Exception as e:
+            logger.error(f"⚠️ Catch-up of {stream} for {channel} failed: {e}", exc_info=True)
+
+    @client.on(events.NewMessage(chats=list(channel_names)))
+    @client.on(events.MessageEdited(chats=list(channel_names)))
+    async def on_message(event):
+        msg = event.message
+        channel = channel_names[event.chat_id]
+
+        if event.chat_id in message_peers:
+            sink.add_message(channel, msg)
+
+        if event.chat_id in media_peers and msg.media and hasattr(msg.media, 'photo'):
+            schedule_media(channel, msg)
+
+        if sink.pending() >= FLUSH_ROWS:
+            await sink.flush()
+
+    flusher = asyncio.create_task(_flush_periodically(sink))
+    try:
+        # Handlers are already registered, so nothing posted during the catch-up is missed;
+        # posts seen both ways are simply upserted twice
+        logger.info("⏪ Catching up on posts published while the daemon was down...")
+        for channel in MESSAGE_CHANNELS:
+            await catch_up(channel, 'messages')
+        for channel in MEDIA_CHANNELS:
+            await catch_up(channel, 'media')
+
+        logger.info(f"👂 Listening for new posts on {len(channel_names)} channels "
+                    f"(flush every {FLUSH_SECONDS:g}s or {FLUSH_ROWS} rows)")
+        await client.run_until_disconnected()
+    finally:
+        flusher.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        await sink.flush(force=True)
+        sink.close()
+
+
+async def _serve(connect):
+    async with TelethonSource(session=os.getenv('TELEGRAM_SESSION', 'scraping_session')) as source:
+        await run_forever(connect, source)
+
+
+def run_daemon():
+    creds = load_db_credentials('../../.env')
+
+    def connect():
+        return psycopg2.connect(
+            dbname=creds["db_name"],
+            user=creds["db_user"],
+            password=creds["db_password"],
+            host=creds["db_host"],
+            port=creds["db_port"]
+        )
+
+    asyncio.run(_serve(connect))
+
+
+if __name__ == "__main__":
+    run_daemon()
@@ -1,28 +1,20 @@
 import os
 import sys
 import json
+import time
+import random
+import tempfile
+import asyncio
 import logging
-from datetime import datetime
-from telethon import TelegramClient
-from telethon.tl.types import Message
+from datetime import datetime, timedelta
 
 sys.path.append(os.path.abspath("../../"))
-from config.config import load_credentials
-
-# ✅ Helper function for parsing Datetime objects in messsage dictonary
-def clean_message(obj):
-    if isinstance(obj, dict):
-        return {
-            k: clean_message(v)
-            for k, v in obj.items()
-            if not isinstance(v, bytes) # Remove keys that are Binary data
-        }
-    elif isinstance(obj, list):
-        return [clean_message(item) for item in obj]
-    elif isinstance(obj, datetime):
-        return obj.isoformat()  # or str(obj)
-    else:
-        return obj
+from config.config import load_channel_registry
+from src.services.message_sources import make_source
+from src.services.scrape_state import WatermarkStore, file_lock
+from src.services.poll_scheduler import PollScheduler
+from src.services.media_downloader import MediaDownloader
+from src.utils.ndjson import NDJSONWriter, clean_message
 
 # ✅ Configure logging
 logging.basicConfig(
@@ -35,110 +27,330 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# ✅ Load credentials from .env
-creds = load_credentials('../../.env')
-api_id = creds['api_id']
-api_hash = creds['api_hash']
-phone = creds['phone']
-
-# ✅ Initialize Telegram client
-client = TelegramClient('scraping_session', api_id, api_hash)
-
-# ✅ Channel Lists
-MESSAGE_CHANNELS = [
-    '@CheMed123',
-    '@lobelia4cosmetics',
-    '@tikvahpharma',
-    # Add more channels as needed
-]
-
-MEDIA_CHANNELS = [
-    '@lobelia4cosmetics',
-    '@CheMed123',
-    '@tikvahpharma',
-]
-
-# ✅ Prepare paths
-SCRAPE_DATE = datetime.now().strftime('%Y-%m-%d')
-BASE_MESSAGE_PATH = f'../../data/raw/telegram_messages/{SCRAPE_DATE}'
-BASE_MEDIA_PATH = '../../data/raw/telegram_media'
-
-os.makedirs(BASE_MESSAGE_PATH, exist_ok=True)
+# ✅ Channel Lists (add channels in config/channels.json)
+CHANNEL_REGISTRY_PATH = os.getenv('CHANNEL_REGISTRY_PATH', '../../config/channels.json')
+CHANNELS = load_channel_registry(CHANNEL_REGISTRY_PATH)
+MESSAGE_CHANNELS = [ch['name'] for ch in CHANNELS if ch['messages']]
+MEDIA_CHANNELS = [ch['name'] for ch in CHANNELS if ch['media']]
+
+# ✅ Prepare paths (overridable, e.g. to keep replay benchmark output apart)
+BASE_MESSAGE_ROOT = os.getenv('SCRAPE_MESSAGE_ROOT', '../../data/raw/telegram_messages')
+BASE_MEDIA_PATH = os.getenv('SCRAPE_MEDIA_PATH', '../../data/raw/telegram_media')
+
 os.makedirs(BASE_MEDIA_PATH, exist_ok=True)
 
-# ✅ Scrape messages
-async def scrape_messages():
-    logger.info("Started Telegram client for message scraping.")
 
-    for channel in MESSAGE_CHANNELS:
-        logger.info(f"Scraping messages from channel: {channel}")
+def scrape_date():
+    # Evaluated per write so a long-running poller rolls over at midnight
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def message_dir():
+    path = os.path.join(BASE_MESSAGE_ROOT, scrape_date())
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# ✅ Message output: one NDJSON file per channel per day, optionally gzipped
+COMPRESS_MESSAGES = os.getenv('COMPRESS_MESSAGES', 'false').lower() in ('1', 'true', 'yes')
+MESSAGE_FLUSH_EVERY = int(os.getenv('MESSAGE_FLUSH_EVERY', 100))
+
+# ✅ Incremental scraping state (per-channel high-water marks)
+STATE_PATH = os.getenv('SCRAPE_STATE_PATH', '../../data/state/scrape_watermarks.json')
+# Cap for a channel's first scrape (no watermark yet); unset = full history
+INITIAL_SCRAPE_LIMIT = int(os.getenv('INITIAL_SCRAPE_LIMIT')) if os.getenv('INITIAL_SCRAPE_LIMIT') else None
+
+
+def iter_new_messages(source, entity, channel, watermarks, stream):
+    """
+    Messages newer than the channel's watermark, oldest first. On a channel's
+    first scrape: its newest INITIAL_SCRAPE_LIMIT posts (all if unset).
+    """
+    last_id = watermarks.last_message_id(channel, stream)
+    if last_id:
+        return source.iter_messages(entity, min_id=last_id, reverse=True)
+    return source.iter_messages(entity, limit=INITIAL_SCRAPE_LIMIT)
+
+
+def newest_of(current, msg):
+    """Keeps a running newest message without holding on to the rest."""
+    return msg if current is None or msg.id > current.id else current
+
+
+def advance_watermark(watermarks, channel, stream, newest):
+    """Moves the watermark to the `newest` saved message and persists it."""
+    if newest is None:
+        return
+    watermarks.update(channel, newest.id, newest.date, stream=stream)
+    watermarks.save()
+
+
+def _load_json_list(path):
+    """Existing records in a file we are about to extend (same-day re-runs)."""
+    if not os.path.isfile(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# ✅ Concurrency settings
+# Max channels scraped at once (shared by the message and media passes)
+SCRAPE_CONCURRENCY = int(os.getenv('SCRAPE_CONCURRENCY', 4))
+# Max photo downloads in flight at once, across all channels
+MEDIA_DOWNLOAD_CONCURRENCY = int(os.getenv('MEDIA_DOWNLOAD_CONCURRENCY', 8))
+# Retries after a FloodWaitError longer than Telethon's own auto-sleep threshold
+FLOOD_WAIT_RETRIES = int(os.getenv('FLOOD_WAIT_RETRIES', 3))
+
+
+async def with_flood_backoff(task_factory, channel, source):
+    """
+    Runs `await task_factory()`, sleeping out Telegram flood waits.
+
+    Telethon only auto-sleeps short flood waits; longer ones raise
+    FloodWaitError with the number of seconds to wait (the source tells us
+    which errors are flood waits). We honour that (plus a little jitter so
+    channels don't all wake up together) and retry.
+    """
+    for attempt in range(FLOOD_WAIT_RETRIES + 1):
         try:
-            messages = []
-            entity = await client.get_entity(channel)
-            async for msg in client.iter_messages(entity, limit=200):
-                if isinstance(msg, Message):
-                    messages.append(msg.to_dict())
+            return await task_factory()
+        except Exception as e:
+            seconds = source.flood_wait_seconds(e)
+            if seconds is None or attempt == FLOOD_WAIT_RETRIES:
+                raise
+            delay = seconds + random.uniform(1, 5)
+            logger.warning(f"⏳ Flood wait on {channel}: sleeping {delay:.0f}s (retry {attempt + 1}/{FLOOD_WAIT_RETRIES})")
+            await asyncio.sleep(delay)
 
-            out_path = os.path.join(BASE_MESSAGE_PATH, f'{channel.strip("@")}.json')
-            with open(out_path, 'w', encoding='utf-8') as f:
-                json.dump(clean_message(messages), f, ensure_ascii=False, indent=2)
 
-            logger.info(f"✅ Saved {len(messages)} messages for {channel} to {out_path}")
+def make_downloader(source):
+    """Shared photo downloader for one run, retrying flood waits through `source`."""
+    return MediaDownloader(
+        source, BASE_MEDIA_PATH, MEDIA_DOWNLOAD_CONCURRENCY,
+        backoff=lambda factory, label: with_flood_backoff(factory, label, source),
+    )
+
+
+# ✅ Scrape messages
+async def scrape_channel_messages(source, channel, semaphore, watermarks):
+    async with semaphore:
+        logger.info(f"Scraping messages from channel: {channel} "
+                    f"(after message_id={watermarks.last_message_id(channel, 'messages')})")
+        try:
+            extension = '.ndjson.gz' if COMPRESS_MESSAGES else '.ndjson'
+            out_path = os.path.join(message_dir(), f'{channel.strip("@")}{extension}')
+            newest = None
+            written = None  # (lowest, highest) id already written, to skip replays on retry
+
+            # Each message is cleaned and appended as it arrives, so memory
+            # stays flat however far back a backfill goes
+            with NDJSONWriter(out_path, flush_every=MESSAGE_FLUSH_EVERY) as writer:
+                async def stream():
+                    nonlocal newest, written
+                    entity = await source.get_entity(channel)
+                    async for msg in iter_new_messages(source, entity, channel, watermarks, 'messages'):
+                        if written and written[0] <= msg.id <= written[1]:
+                            continue
+                        writer.write(msg.to_dict())
+                        written = (min(written[0], msg.id), max(written[1], msg.id)) if written else (msg.id, msg.id)
+                        newest = newest_of(newest, msg)
+
+                await with_flood_backoff(stream, channel, source)
+
+            advance_watermark(watermarks, channel, 'messages', newest)
+            logger.info(f"✅ Saved {writer.count} new messages for {channel} to {out_path}")
 
         except Exception as e:
             logger.error(f"⚠️ Error scraping {channel}: {e}", exc_info=True)
 
 
-# ✅ Scrape media
-async def scrape_media():
-    logger.info("Started Telegram client for media scraping.")
+async def scrape_messages(source, semaphore=None, watermarks=None):
+    logger.info("Started message scraping.")
+    semaphore = semaphore or asyncio.Semaphore(SCRAPE_CONCURRENCY)
+    watermarks = watermarks or WatermarkStore(STATE_PATH)
+    await asyncio.gather(*(scrape_channel_messages(source, channel, semaphore, watermarks) for channel in MESSAGE_CHANNELS))
 
-    media_metadata = []  # 🆕 New list to collect structured metadata
 
-    for channel in MEDIA_CHANNELS:
-        logger.info(f"Scraping images from channel: {channel}")
+# ✅ Scrape media
+async def scrape_channel_media(source, channel, semaphore, watermarks, downloader):
+    """Downloads a channel's new photos and returns their metadata records."""
+    async with semaphore:
+        logger.info(f"Scraping images from channel: {channel} "
+                    f"(after message_id={watermarks.last_message_id(channel, 'media')})")
+        media_metadata = []
+        newest = None
+        pending = []  # (message, download task)
         try:
-            entity = await client.get_entity(channel)
-            count = 0
-            async for msg in client.iter_messages(entity, limit=200):
-                if msg.media and hasattr(msg.media, 'photo'):
-                    filename = f'{channel.strip("@")}_{msg.id}.jpg'
-                    save_path = os.path.join(BASE_MEDIA_PATH, filename)
-                    await client.download_media(msg.media, save_path)
-                    logger.info(f"📷 Saved image: {save_path}")
-                    count += 1
-
-                    # 🆕 Add structured metadata for each image
-                    media_metadata.append({
-                        "channel_name": channel.strip("@"),
-                        "message_id": msg.id,
-                        "image_filename": filename,
-                        "image_path": save_path.replace("../../", ""),  # Optional: make relative
-                        "scraped_at": datetime.now().isoformat()
-                    })
-
-            logger.info(f"✅ Finished saving {count} images for {channel}")
+            seen = set()  # ids already scheduled, to skip replays when a flood wait restarts the walk
+
+            async def walk():
+                nonlocal newest
+                entity = await source.get_entity(channel)
+                async for msg in iter_new_messages(source, entity, channel, watermarks, 'media'):
+                    if msg.id in seen:
+                        continue
+                    seen.add(msg.id)
+                    newest = newest_of(newest, msg)
+                    if msg.media and hasattr(msg.media, 'photo'):
+                        filename = f'{channel.strip("@")}_{msg.id}.jpg'
+                        pending.append((msg, downloader.fetch(msg.media, filename)))
+
+            # The whole history walk is retried on flood waits, like the message pass
+            await with_flood_backoff(walk, channel, source)
+
+            # Downloads run in the background while we page through history
+            results = await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+            failed = 0
+            for (msg, _), filename in zip(pending, results):
+                if isinstance(filename, Exception):
+                    failed += 1
+                    logger.error(f"⚠️ Failed to download image for {channel} message {msg.id}: {filename}")
+                    continue
+
+                # 🆕 Add structured metadata for each image
+                save_path = os.path.join(BASE_MEDIA_PATH, filename)
+                media_metadata.append({
+                    "channel_name": channel.strip("@"),
+                    "message_id": msg.id,
+                    "image_filename": filename,
+                    "image_path": save_path.replace("../../", ""),  # Optional: make relative
+                    "scraped_at": datetime.now().isoformat()
+                })
+
+            # Keep the watermark put if anything failed so the next run retries;
+            # photos already on disk are skipped then
+            if not failed:
+                advance_watermark(watermarks, channel, 'media', newest)
+            logger.info(f"✅ Finished saving {len(media_metadata)} images for {channel} ({failed} failed)")
 
         except Exception as e:
+            # Let downloads already started finish rather than leave them orphaned;
+            # the watermark stays put, and photos on disk are skipped on the retry
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
             logger.error(f"⚠️ Error scraping images from {channel}: {e}", exc_info=True)
 
-    # 🆕 Save media index JSON one directory above BASE_MEDIA_PATH
-    media_index_path = os.path.join(os.path.dirname(BASE_MEDIA_PATH), f'media_index_{SCRAPE_DATE}.json')
-    with open(media_index_path, 'w', encoding='utf-8') as f:
-        json.dump(clean_message(media_metadata), f, ensure_ascii=False, indent=2)
+        return media_metadata
+
+
+async def scrape_media(source, semaphore=None, watermarks=None):
+    logger.info("Started media scraping.")
+    semaphore = semaphore or asyncio.Semaphore(SCRAPE_CONCURRENCY)
+    watermarks = watermarks or WatermarkStore(STATE_PATH)
+    downloader = make_downloader(source)
+
+    per_channel = await asyncio.gather(*(scrape_channel_media(source, channel, semaphore, watermarks, downloader) for channel in MEDIA_CHANNELS))
+    media_metadata = [record for records in per_channel for record in records]
+    logger.info(f"📷 Downloaded {downloader.downloaded} images, skipped {downloader.skipped} already on disk or duplicated")
+
+    save_media_index(media_metadata)
+
+
+def save_media_index(media_metadata):
+    """
+    Saves media index JSON one directory above BASE_MEDIA_PATH, extending
+    today's index if the scraper already ran today. The scraper and the
+    daemon both extend it, so the read-extend-write runs under a file lock
+    and the file is replaced atomically.
+    """
+    media_index_path = os.path.join(os.path.dirname(BASE_MEDIA_PATH), f'media_index_{scrape_date()}.json')
+    with file_lock(media_index_path):
+        media_metadata = _load_json_list(media_index_path) + media_metadata
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(media_index_path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(clean_message(media_metadata), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, media_index_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
 
     logger.info(f"🧩 Media index saved to: {media_index_path}")
 
 # ✅ Run both scrapers
-async def main():
-    logger.info("Starting Telegram scraping pipeline...")
-    await scrape_messages()
-    await scrape_media()
-    logger.info("✅ All scraping tasks completed.")
+async def main(source):
+    logger.info(f"Starting Telegram scraping pipeline ({type(source).__name__})...")
+    started = time.perf_counter()
+    # One semaphore for both passes: message and media work for different
+    # channels interleave, but never more than SCRAPE_CONCURRENCY at once
+    semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+    watermarks = WatermarkStore(STATE_PATH)
+    await asyncio.gather(scrape_messages(source, semaphore, watermarks), scrape_media(source, semaphore, watermarks))
+    logger.info(f"✅ All scraping tasks completed in {time.perf_counter() - started:.1f}s.")
+
+
+async def _run_with_source(entry):
+    # The source (and its Telegram client) is built inside the running loop;
+    # MESSAGE_SOURCE=replay serves recorded dumps instead of the network
+    async with make_source() as source:
+        await entry(source)
+
 
 def run_scraper():
-    with client.start(phone=phone) as session:
-        session.loop.run_until_complete(main())
+    asyncio.run(_run_with_source(main))
+
+
+# ✅ Adaptive polling: busy channels often, dormant ones rarely
+# Global budget: channel polls allowed per hour across all channels
+POLL_BUDGET_PER_HOUR = float(os.getenv('POLL_BUDGET_PER_HOUR', 120))
+POLL_TICK_SECONDS = float(os.getenv('POLL_TICK_SECONDS', 60))
+POLL_MIN_INTERVAL_MINUTES = float(os.getenv('POLL_MIN_INTERVAL_MINUTES', 10))
+POLL_MAX_INTERVAL_HOURS = float(os.getenv('POLL_MAX_INTERVAL_HOURS', 24))
+
+
+async def poll_channel(source, channel, semaphore, watermarks, downloader, scheduler):
+    """Polls one registry channel (messages and/or media) and records its rate."""
+    stream = 'messages' if channel['messages'] else 'media'
+    before = watermarks.last_message_id(channel['name'], stream)
+
+    tasks = []
+    if channel['messages']:
+        tasks.append(scrape_channel_messages(source, channel['name'], semaphore, watermarks))
+    if channel['media']:
+        tasks.append(scrape_channel_media(source, channel['name'], semaphore, watermarks, downloader))
+    results = await asyncio.gather(*tasks)
+    if channel['media']:
+        save_media_index(results[-1])
+
+    after = watermarks.last_message_id(channel['name'], stream)
+    # Message ids are sequential per channel; skip the count on a channel's first poll
+    scheduler.record_poll(channel['name'], after - before if before else 0)
+    watermarks.save()
+
+
+async def poll_forever(source):
+    semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+    watermarks = WatermarkStore(STATE_PATH)
+    downloader = make_downloader(source)
+    scheduler = PollScheduler(
+        watermarks,
+        min_interval=timedelta(minutes=POLL_MIN_INTERVAL_MINUTES),
+        max_interval=timedelta(hours=POLL_MAX_INTERVAL_HOURS),
+    )
+    by_name = {ch['name']: ch for ch in CHANNELS}
+
+    # Token bucket: the budget refills continuously, bursts capped at ~10 minutes' worth
+    capacity = max(1.0, POLL_BUDGET_PER_HOUR / 6)
+    tokens = capacity
+    last_tick = datetime.now()
+    logger.info(f"Starting adaptive poller for {len(CHANNELS)} channels ({POLL_BUDGET_PER_HOUR:g} polls/hour budget)")
+
+    while True:
+        now = datetime.now()
+        tokens = min(capacity, tokens + POLL_BUDGET_PER_HOUR * (now - last_tick).total_seconds() / 3600)
+        last_tick = now
+
+        due = scheduler.due_channels(list(by_name), tokens, now)
+        if due:
+            tokens -= len(due)
+            logger.info(f"⏱️ Polling {len(due)} due channels: {', '.join(due)}")
+            await asyncio.gather(*(poll_channel(source, by_name[name], semaphore, watermarks, downloader, scheduler) for name in due))
+        await asyncio.sleep(POLL_TICK_SECONDS)
+
+
+def run_poller():
+    asyncio.run(_run_with_source(poll_forever))
+
 
 if __name__ == "__main__":
-    run_scraper()
\ No newline at end of file
+    if '--poll' in sys.argv:
+        run_poller()
+    else:
+        run_scraper()
\ No newline at end of file
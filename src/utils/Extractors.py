@@ -1,100 +1,155 @@
+import os
 import re
-import re
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional
 
-def classify_message(text: str) -> dict:
+# Bump whenever extractor output can change; invalidates the enrichment cache
+EXTRACTOR_VERSION = "2"
+
+# ---------------- shared static data ----------------
+
+# Strips "Aug-27" / "Dec-27Bulk" style expiry suffixes glued to product names
+DATE_SUFFIX_RE = re.compile(
+    r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)-\d{1,2}(?:Bulk)?\b",
+    re.I
+)
+
+# Phrases that show up capitalised in every channel but are never products
+_COMMON_STOPWORDS = {
+    "Che-Med",
+    "Brand",
+    "First",
+    "Elastic",
+    "Are",
+    "Real-Time Inventory Tracking",
+    "Expiry Alerts",
+    "Seamless Collaboration",
+    "Increased Efficiency",
+    "Import)",
+    "Aug-27Bulk",
+    "Dec-27",
+    "A)",
+    "Multiple",
+    "Also Available",
+    "Non-drowsy",
+    "VivaMedPharma",
+    "StockAlert",
+    "PharmaEthiopia",
+    "QualityFirst",
+    "HealthSolutions",
+    "AllergyRelief",
+    "SkinCareEssentials",
+    "Size16",
+    "NEW ARRIVALSALMAZ GIRMA",
+    "Tounge",
+    "Join",
+    "Ns",
+    "Rl",
+    "Himed Sales091 160",
+    "Tikvah Sales",
+    "Jul-27",
+    "VivaMed Pharma",
+    "High Quality",
+    "Available Now",
+    "Telegram",
+    "IMPORTEgens",
+    "Pharmacy",
+    "Track",
+    "Get",
+    "Streamline",
+    "Boost"
+}
+
+
+class ChannelRuleSet:
     """
-    Given a Telegram post `text`, classify it and (optionally) extract product names.
+    Compiled, reusable rules for one channel's product-name extractor.
 
-    Returns one of:
-        {"type": "vacancy", "products": []}
-        {"type": "product", "products": [list‑of‑names]}
-        {"type": "other",   "products": []}
+    Holds the candidate regex, the stop-list and a single precompiled hint
+    regex used to test the window that follows each candidate. Built once at
+    import so the extractors do no per-call setup.
     """
 
-    # ---------------- helpers & static data ----------------
-    VACANCY_KW = {
-        "vacancy", "position", "apply", "experience", "salary", "license",
-        "gp", "druggist", "pharmacist", "internal specialist", "urgent vacancy",
-        "cpd"  # training / license renewal ads
-    }
+    def __init__(self, candidate_re, stopwords, hints, tail_window: int,
+                 lead_chars=frozenset()):
+        self.candidate_re = candidate_re
+        self.stopwords = frozenset(stopwords)
+        self.hints = frozenset(hints)
+        # longest first so e.g. "caps" is preferred over "cap"
+        self.hint_re = re.compile(
+            "|".join(re.escape(h) for h in sorted(self.hints, key=len, reverse=True))
+        )
+        self.tail_window = tail_window
+        self.lead_chars = frozenset(lead_chars)
+        self.date_re = DATE_SUFFIX_RE
 
-    PRODUCT_HINTS = {
-        "new arrival", "new arrivals", "update", "stock update",
-        "mg", "ml", "tab", "tabs", "cap", "caps", "syrup", "inj",
-        "susp", "strip", "cassette", "kit", "test", "tube", "pcs"
-    }
+    def tail_ok(self, low: str, end: int) -> bool:
+        """True if a hint occurs in `low[end:end + tail_window]` (no slicing)."""
+        return self.hint_re.search(low, end, end + self.tail_window) is not None
+
+    def strip_dates(self, name: str) -> str:
+        return self.date_re.sub("", name)
+
+
+# ---------------- tikvahpharma / generic classifier ----------------
+
+VACANCY_KW = {
+    "vacancy", "position", "apply", "experience", "salary", "license",
+    "gp", "druggist", "pharmacist", "internal specialist", "urgent vacancy",
+    "cpd"  # training / license renewal ads
+}
+
+PRODUCT_HINTS = {
+    "new arrival", "new arrivals", "update", "stock update",
+    "mg", "ml", "tab", "tabs", "cap", "caps", "syrup", "inj",
+    "susp", "strip", "cassette", "kit", "test", "tube", "pcs"
+}
 
-    PRODUCT_EMOJI = {"💊", "✅", "✔️", "🔥", "⭐️", "⭕️", "📈", "📦", "⏳", "#"}
+PRODUCT_EMOJI = {"💊", "✅", "✔️", "🔥", "⭐️", "⭕️", "📈", "📦", "⏳", "#"}
 
+TIKVAH_RULES = ChannelRuleSet(
     # regex: up to 4 capitalised tokens, allows digits, (), %, ‑, /
-    PRODUCT_RE = re.compile(
+    candidate_re=re.compile(
         r"(?:^|[\s#💊✅✔️⭐️🔥⭕️📈📦⏳\-\*•])\s*"
         r"([A-Z][A-Za-z0-9()/%\-]+(?:\s+[A-Z0-9][A-Za-z0-9()/%\-]+){0,3})"
-    )
-
-    STOPWORDS = {
+    ),
+    stopwords={
         "New", "NEW", "ARRIVAL", "ARRIVALS", "Update", "UPDATES", "Available",
         "Stock", "Items", "Medical", "Supplies", "Equipment", "Exp", "Exp.",
         "Round", "Cutting", "Powder", "free", "Blue", "Color",
-        "Che-Med",
-        "Brand",
-        "First","Elastic",
-        "Are",
-        "Real-Time Inventory Tracking",
-        "Expiry Alerts",
-        "Seamless Collaboration",
-        "Increased Efficiency",
-        "Import)",
-        "Aug-27Bulk",
-        "Dec-27",
-        "A)",
-        "Multiple",
-        "Also Available",
-        "Non-drowsy",
-        "VivaMedPharma",
-        "StockAlert",
-        "PharmaEthiopia",
-        "QualityFirst",
-        "HealthSolutions",
-        "AllergyRelief",
-        "SkinCareEssentials",
-        "Size16",
-        "NEW ARRIVALSALMAZ GIRMA",
-        "Tounge",
-        "Join",
-        "Ns",
-        "Rl",
-        "Himed Sales091 160",
-        "Tikvah Sales",
-        "Jul-27",
-        "VivaMed Pharma",
-        "High Quality",
-        "Available Now",
-        "Telegram",
-        "IMPORTEgens",
-        "Pharmacy",
-        "Track",
-        "Get",
-        "Streamline",
-        "Boost"
-    }
+    } | _COMMON_STOPWORDS,
+    hints=PRODUCT_HINTS,
+    tail_window=40,
+    lead_chars=PRODUCT_EMOJI | {"#"},
+)
 
-    pattern = re.compile(
-    r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)-\d{1,2}(?:Bulk)?\b",
-    re.I
-    )
 
-    # ---------------- quick vacancy test -------------------
+def classify_message(text: str) -> dict:
+    """
+    Given a Telegram post `text`, classify it and (optionally) extract product names.
+
+    Returns one of:
+        {"type": "vacancy", "products": []}
+        {"type": "product", "products": [list‑of‑names]}
+        {"type": "other",   "products": []}
+    """
     if isinstance(text, tuple):
         low = text[0].lower()
     else:
         low = text.lower()
+    return _classify(text, low)
+
+
+def _classify(text: str, low: str) -> dict:
+    # `low` is text.lower(), computed once by the caller
+    rules = TIKVAH_RULES
+
+    # ---------------- quick vacancy test -------------------
     if any(kw in low for kw in VACANCY_KW):
         return {"type": "vacancy", "products": []}
 
     # ---------------- product‑post heuristics ---------------
-    hint_hits = sum(kw in low for kw in PRODUCT_HINTS)
+    hint_hits = sum(kw in low for kw in rules.hints)
     emoji_hits = sum(e in text for e in PRODUCT_EMOJI)
     is_product_post = (hint_hits + emoji_hits) >= 2          # tweak if noisy
 
@@ -103,18 +158,15 @@ def classify_message(text: str) -> dict:
 
     # ---------------- extract product names ----------------
     products, seen = [], set()
-    for m in PRODUCT_RE.finditer(text):
+    for m in rules.candidate_re.finditer(text):
         name = m.group(1).rstrip(",;:")
-        if name in STOPWORDS or len(name.split()) > 4:
+        if name in rules.stopwords or len(name.split()) > 4:
             continue
 
         # keep only if dosage/unit word nearby OR starts with emoji/hash
-        tail_ok = any(u in low[m.end():m.end()+40] for u in PRODUCT_HINTS)
-        lead_ok = text[m.start()] in PRODUCT_EMOJI or text[m.start()] == "#"
-
-        if tail_ok or lead_ok:
+        if rules.tail_ok(low, m.end()) or text[m.start()] in rules.lead_chars:
             if name not in seen:
-                name = pattern.sub("",name)
+                name = rules.strip_dates(name)
                 products.append(name.replace("\n", ""))
                 seen.add(name)
 
@@ -122,18 +174,12 @@ def classify_message(text: str) -> dict:
 
 # for CheMed123 channel
 
-def extract_chemed_products(text: str) -> list[str]:
-    """
-    Rules‑based extractor for Che‑Med123 posts.
-    Returns product names (Latin script) or [] if none were found.
-    No ML, only regex + small stop‑lists.
-    """
-
+CHEMED_RULES = ChannelRuleSet(
     # ------------------------------------------------------------------
     # 1.  candidate finder  – up to 4 capitalised tokens (allows digits,
     #     hyphen, %, parentheses, & and single‑letter tokens like 'C').
     # ------------------------------------------------------------------
-    _PROD_RE = re.compile(
+    candidate_re=re.compile(
         r"""
         (?:^|[\s🌞🔵🟠⭐️💊✅✔️🔥✨📦📌👉#\*•-])      # line start or common bullet/emoji
         \s*
@@ -141,97 +187,62 @@ def extract_chemed_products(text: str) -> list[str]:
            (?:\s+[A-Z0-9][A-Za-z0-9()/%&\-']*){0,3})   # plus ≤3 more
         """,
         re.VERBOSE,
-    )
-
+    ),
     # ------------------------------------------------------------------
     # 2. words/phrases that are *never* products in this channel
     # ------------------------------------------------------------------
-    _BLACKLIST = {
-        "Notice", "Dear", "Customers", "Che", "Med", "Che-Med",
-        "Call", "Center", "Follow", "Order", "Buy", "Get", "Due",
+    stopwords={
+        "Notice", "Dear", "Customers", "Che", "Med",
+        "Call", "Center", "Follow", "Order", "Buy", "Due",
         "Delivery", "Service", "Services", "Trivia", "Source",
         "Pharmaceutical", "Industry", "Supports", "Product", "Products",
         "Supplements", "Supplement", "Assistant", "Website",
-        "Che-Med",
-        "Brand",
-        "First",
-        "Elastic",
-        "Are",
-        "Real-Time Inventory Tracking",
-        "Expiry Alerts",
-        "Seamless Collaboration",
-        "Increased Efficiency",
-        "Import)",
-        "Aug-27Bulk",
-        "Dec-27",
-        "A)",
         "B)",
-        "Multiple",
-        "Also Available",
-        "Non-drowsy",
-        "VivaMedPharma",
-        "StockAlert",
-        "PharmaEthiopia",
-        "QualityFirst",
-        "HealthSolutions",
-        "AllergyRelief",
-        "SkinCareEssentials",
-        "Size16",
-        "NEW ARRIVALSALMAZ GIRMA",
-        "Tounge",
-        "Join",
-        "Ns",
-        "Rl",
-        "Himed Sales091 160",
-        "Tikvah Sales",
-        "Jul-27",
-        "VivaMed Pharma",
-        "High Quality",
-        "Available Now",
-        "Telegram",
-        "IMPORTEgens",
-        "Pharmacy",
-        "Track",
-        "Get",
-        "Streamline",
-        "Boost"
-    }
-
-    pattern = re.compile(
-    r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)-\d{1,2}(?:Bulk)?\b",
-    re.I
-    )
-
+    } | _COMMON_STOPWORDS,
     # ------------------------------------------------------------------
     # 3.  keep a hit only if the 50‑char window *after* it contains a
     #     giveaway keyword (mg, supplement, etc.)  – this filters out
     #     most random capitalised words in Amharic sentences.
     # ------------------------------------------------------------------
-    _CONTEXT = {
+    hints={
         "mg", "ml", "mcg", "IU", "susp", "caps", "capsule", "tablet",
         "tab", "inj", "syrup", "drop", "cream", "ointment", "gel",
         "supplement", "product", "relief"
-    }
+    },
+    tail_window=50,
+)
 
+
+def extract_chemed_products(text: str) -> list[str]:
+    """
+    Rules‑based extractor for Che‑Med123 posts.
+    Returns product names (Latin script) or [] if none were found.
+    No ML, only regex + small stop‑lists.
+    """
     if isinstance(text, tuple):
-        flat = text[0].replace("\n", " ")           # single‑line scan
-    else:
-        flat = text.replace("\n", " ")   
+        text = text[0]
+    return _chemed_products(text, text.lower())
+
+
+def _chemed_products(text: str, low: str) -> list[str]:
+    # `low` is text.lower(), computed once by the caller
+    rules = CHEMED_RULES
+
     hits, seen = [], set()
-    for m in _PROD_RE.finditer(flat):
-        name = m.group(1).rstrip(",;:").strip()
+    for m in rules.candidate_re.finditer(text):
+        # single‑line names: `\s` in the candidate regex may span a newline
+        name = m.group(1).replace("\n", " ").rstrip(",;:").strip()
 
-        if name in _BLACKLIST or len(name) < 2:
+        if name in rules.stopwords or len(name) < 2:
             continue
 
         # context test
-        tail = flat[m.end(): m.end() + 50].lower()
-        if not any(k in tail for k in _CONTEXT):
+        if not rules.tail_ok(low, m.end()):
             continue
 
         # deduplicate while preserving order
         if name not in seen:
-            name = pattern.sub("",name)
+            name = rules.strip_dates(name)
             hits.append(name)
             seen.add(name)
 
@@ -248,48 +259,181 @@ def extract_channel_products(text: str, channel_name: str) -> list[str]:
     Returns:
         List[str]: Extracted product names
     """
+    if isinstance(text, tuple):
+        text = text[0]
+    return _channel_products(text, text.lower(), channel_name)
 
-    if channel_name.lower() == "chemed123":
-        return extract_chemed_products(text)
 
-    elif channel_name.lower() == "tikvahpharma":
-        result = classify_message(text)
+def _channel_products(text: str, low: str, channel_name: str) -> list[str]:
+    channel = channel_name.lower()
+
+    if channel == "chemed123":
+        return _chemed_products(text, low)
+
+    elif channel == "tikvahpharma":
+        result = _classify(text, low)
         return result["products"] if result["type"] == "product" else []
 
-    elif channel_name.lower() == "lobelia4cosmetics":
-        if isinstance(text, tuple):
-            text = text[0]
+    elif channel == "lobelia4cosmetics":
         first_line = text.split('\n', 1)[0]
         return [first_line.strip()] if first_line.strip() else []
 
     # Optional fallback
     return []
 
+class PriceHit(NamedTuple):
+    """One price mention: `low`/`high` differ only for ranges like "70-500 birr"."""
+    value: int
+    low: int
+    high: int
+    currency: Optional[str]  # "birr", "ETB", "ብር" or None for a bare "Price 500"
+    offset: int              # character offset of the number in the message
+
+
+# Single tokenizer for every supported price format:
+#   Price 5000 | 5000 birr | 70-500 birr | 💵700ብር | 1,200 ETB
+# Commas are accepted inside numbers and separators instead of being stripped
+# beforehand, so offsets point into the original message. A range only counts
+# when a currency follows it.
+PRICE_TOKEN_RE = re.compile(
+    r"(?P<label>price[:\s,]*)?"
+    r"(?P<low>\d[\d,]*)"
+    r"(?:,*[–\-~][\s,]*(?P<high>\d[\d,]*)(?=[\s,]*(?:birr|etb|ብር)))?"
+    r"[\s,]*(?P<currency>birr|etb|ብር)?"
+)
+
+_CURRENCY_NAMES = {"birr": "birr", "etb": "ETB", "ብር": "ብር"}
+
+
+def _price_hits(low: str) -> List[PriceHit]:
+    # `low` is text.lower(), computed once by the caller
+    hits = []
+    for m in PRICE_TOKEN_RE.finditer(low):
+        currency = m.group("currency")
+        if currency is None and m.group("label") is None:
+            continue  # a bare number, not a price
+
+        lo = int(m.group("low").replace(",", ""))
+        hi = int(m.group("high").replace(",", "")) if m.group("high") else lo
+        hits.append(PriceHit(lo, lo, hi, _CURRENCY_NAMES.get(currency), m.start("low")))
+    return hits
+
+
+def extract_price_hits(text: str) -> List[PriceHit]:
+    """
+    Structured price mentions in order of appearance, e.g.
+    "70-500 birr" -> [PriceHit(value=70, low=70, high=500, currency="birr", offset=0)]
+    """
+    if isinstance(text, tuple):
+        text = text[0]
+    return _price_hits(text.lower())
+
+
 def extract_price(text: str) -> List[float]:
-    # Normalize text
-    text = text.lower().replace(",", "")  # removes commas for easier parsing
-
-    # Combined pattern to match various price formats
-    price_patterns = [
-        r"price[:\s]*([\d]+)",                           # Price 5000
-        r"([\d]+)\s*(birr|etb|ብር)",                      # 5000 birr
-        r"([\d]+)[–\-~]\s*([\d]+)\s*(birr|etb|ብር)",       # 70 - 500 birr
-        r"💵?\s*([\d]+)\s*ብር"                            # 💵700ብር
-    ]
-
-    results = []
-    for pattern in price_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            # Handle different tuple shapes 
-            if isinstance(match, tuple):
-                # Range like 70-500
-                nums = [int(val) for val in match if val.isdigit()]
-                results.extend(nums)
-            else:
-                results.append(float(match))
-
-    return list(set(results))  # de-duplicate
+    """
+    Distinct prices in order of first appearance (both ends of a range), so
+    the first element is the earliest price in the message.
+    """
+    return _prices(text.lower())
+
+
+def _prices(low: str) -> List[float]:
+    prices = []
+    for hit in _price_hits(low):
+        prices.append(hit.low)
+        if hit.high != hit.low:
+            prices.append(hit.high)
+    return list(dict.fromkeys(prices))  # de-duplicate, keep order
+
+
+# ---------------- health keyword matcher (built once at import) ----------------
+
+# English keywords
+HEALTH_ENG_KEYWORDS = {
+    "medicine", "medical", "pharmacy", "pharmacist", "clinic", "hospital",
+    "doctor", "treatment", "therapy", "medication", "healthcare", "drug",
+    "prescription", "injection", "syrup", "tablet", "capsule", "ointment",
+    "vitamin", "supplement", "ml", "mg", "painkiller", "antibiotic", "delivery",
+    "health", "contraceptive", "pregnancy", "fertility", "immune", "pain relief"
+}
+
+# Amharic keywords (expand this as needed)
+HEALTH_AMHARIC_KEYWORDS = {
+    "መድሃኒት", "ህክምና", "ሐኪም", "መከላከያ", "እንቅስቃሴ", "ክሊኒክ", "ኦስፒታል",
+    "ፋርማሲ", "የእርግዝና", "መድሀኒት", "የጤና", "ድርብ ነቃቃ", "አንቲባዮቲክ", "ቫይታሚን",
+    "ህክምና", "ሕክምና", "ጤና", "መድሃኒት ቤት", "ሴቶች ጤና", "የህፃናት"
+}
+
+# Known English health product/brand names
+HEALTH_PRODUCTS = {
+    "wellman", "seven seas", "centrum", "pregnacare", "feroglobin", "vitabiotics",
+    "amoxicillin", "paracetamol", "diclofenac", "neurobion", "omeprazole",
+    "blackmores", "glucophage", "zincovit", "ors", "iron supplement", "lobelia"
+}
+
+
+def _trie_pattern(words) -> str:
+    """
+    Builds a prefix-factored regex alternation from `words`.
+
+    A flat `a|b|c|...` alternation is retried keyword by keyword at every
+    position; factoring shared prefixes into a trie lets the regex engine
+    reject a position after a character or two, so the cost per message stays
+    roughly flat as the keyword lists grow.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # end-of-word marker
+
+    def _build(node) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + _build(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # greedy `?` tries the longer keyword first, then falls back
+            body = "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+        return body
+
+    return _build(trie)
+
+
+_HEALTH_STRIP_RE = re.compile(r"[^\w\s\u1200-\u137F]")  # keep Amharic unicode range
+_WHITESPACE_RE = re.compile(r"\s+")
+HEALTH_TERMS_RE = re.compile(
+    r"\b(" + _trie_pattern(HEALTH_ENG_KEYWORDS | HEALTH_PRODUCTS | HEALTH_AMHARIC_KEYWORDS) + r")\b"
+)
+
+
+def _normalize_health_text(low: str) -> str:
+    # Remove symbols from the lowercased text but keep Amharic and Latin
+    # letters, then collapse extra spaces
+    return _WHITESPACE_RE.sub(" ", _HEALTH_STRIP_RE.sub(" ", low))
+
+
+def _health_terms(low: str) -> list[str]:
+    hits = []
+    for m in HEALTH_TERMS_RE.finditer(_normalize_health_text(low)):
+        term = m.group(1)
+        if term not in hits:
+            hits.append(term)
+    return hits
+
+
+def match_health_terms(text: str) -> list[str]:
+    """
+    Returns every health keyword found in a Telegram post, in order of first
+    appearance. Useful for debugging why a message was (or wasn't) flagged.
+    """
+    if isinstance(text, tuple):
+        text = text[0]
+
+    return _health_terms(text.lower())
 
 
 def extract_health_flag(text: str) -> bool:
@@ -299,36 +443,113 @@ def extract_health_flag(text: str) -> bool:
     if isinstance(text, tuple):
         text = text[0]
 
-    # Normalize text (lowercase + preserve Amharic)
-    text = text.lower()
-    
-    # Remove symbols but keep Amharic and Latin letters
-    text = re.sub(r"[^\w\s\u1200-\u137F]", " ", text)  # keep Amharic unicode range
-    text = re.sub(r"\s+", " ", text)  # collapse extra spaces
-
-    # English keywords
-    eng_keywords = {
-        "medicine", "medical", "pharmacy", "pharmacist", "clinic", "hospital",
-        "doctor", "treatment", "therapy", "medication", "healthcare", "drug",
-        "prescription", "injection", "syrup", "tablet", "capsule", "ointment",
-        "vitamin", "supplement", "ml", "mg", "painkiller", "antibiotic", "delivery", 
-        "health", "contraceptive", "pregnancy", "fertility", "immune", "pain relief"
-    }
+    return HEALTH_TERMS_RE.search(_normalize_health_text(text.lower())) is not None
 
-    # Amharic keywords (expand this as needed)
-    amharic_keywords = {
-        "መድሃኒት", "ህክምና", "ሐኪም", "መከላከያ", "እንቅስቃሴ", "ክሊኒክ", "ኦስፒታል",
-        "ፋርማሲ", "የእርግዝና", "መድሀኒት", "የጤና", "ድርብ ነቃቃ", "አንቲባዮቲክ", "ቫይታሚን",
-        "ህክምና", "ሕክምና", "ጤና", "መድሃኒት ቤት", "ሴቶች ጤና", "የህፃናት"
-    }
 
-    # Known English health product/brand names
-    health_products = {
-        "wellman", "seven seas", "centrum", "pregnacare", "feroglobin", "vitabiotics",
-        "amoxicillin", "paracetamol", "diclofenac", "neurobion", "omeprazole",
-        "blackmores", "glucophage", "zincovit", "ors", "iron supplement", "lobelia"
+# ---------------- fused enrichment ----------------
+
+def enrich_message(text: str, channel_name: str) -> dict:
+    """
+    Runs every extractor over a message, lowercasing it only once.
+
+    The product, price and health stages all read the same lowercased copy
+    instead of each re-normalising the raw text. `extract_price`,
+    `extract_channel_products` and `extract_health_flag` are thin wrappers
+    over the same stages.
+
+    Returns:
+        {"products": [...], "prices": [...], "is_health_related": bool}
+    """
+    if isinstance(text, tuple):
+        text = text[0]
+    low = text.lower()
+
+    return {
+        "products": _channel_products(text, low, channel_name),
+        "prices": _prices(low),
+        "is_health_related": HEALTH_TERMS_RE.search(_normalize_health_text(low)) is not None,
     }
 
-    all_keywords = eng_keywords.union(health_products).union(amharic_keywords)
 
-    return any(re.search(rf"\b{re.escape(word)}\b", text) for word in all_keywords)
\ No newline at end of file
+# ---------------- batch extraction ----------------
+
+def _to_row(enriched: dict) -> tuple:
+    """
+    Reduces an `enrich_message` result to the values stored in
+    raw.telegram_enriched: (product_names, main_price, is_health_related).
+    """
+    price_list = enriched["prices"]
+    product_list = enriched["products"]
+
+    main_price = price_list[0] if price_list and product_list else None
+    product_str = " | ".join(product_list) if product_list else None
+    return product_str, main_price, enriched["is_health_related"]
+
+
+def _extract_chunk(chunk: list) -> list:
+    # Top-level so it can be pickled and sent to worker processes
+    return [enrich_message(text or "", channel) for text, channel in chunk]
+
+
+def _run_chunks(pairs: list, workers: int, chunk_size: int = None) -> list:
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(pairs) // (workers * 4)))
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+
+    if workers == 1 or len(chunks) <= 1:
+        return [r for chunk in map(_extract_chunk, chunks) for r in chunk]
+
+    # pool.map keeps chunk order, so results stay aligned with `pairs`
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        return [r for chunk in pool.map(_extract_chunk, chunks) for r in chunk]
+
+
+def extract_batch(texts, channels, workers: int = None, chunk_size: int = None,
+                  cache=None) -> dict:
+    """
+    Enriches many messages at once, fanning chunks out over a process pool.
+
+    Args:
+        texts (list[str]): Message texts
+        channels (list[str]): Source channel name for each text
+        workers (int): Number of worker processes (defaults to the CPU count);
+            1 runs everything in the current process
+        chunk_size (int): Messages per task (defaults to ~4 chunks per worker)
+        cache (EnrichmentCache): Optional memo cache (see
+            src/utils/enrichment_cache.py); only misses are sent to the pool
+            and identical messages within the batch are enriched once
+
+    Returns:
+        dict: Columnar results, parallel to `texts`:
+            {"product_names": [...], "main_price": [...], "is_health_related": [...]}
+    """
+    texts, channels = list(texts), list(channels)
+    if len(texts) != len(channels):
+        raise ValueError(f"texts and channels differ in length: {len(texts)} != {len(channels)}")
+
+    workers = workers or os.cpu_count() or 1
+    pairs = list(zip(texts, channels))
+
+    if cache is None:
+        results = _run_chunks(pairs, workers, chunk_size)
+    else:
+        keys = [cache.key(text, channel) for text, channel in pairs]
+        results = cache.get_many(keys)
+        todo = {}
+        for key, pair, result in zip(keys, pairs, results):
+            if result is None and key not in todo:
+                todo[key] = pair
+        fresh = dict(zip(todo, _run_chunks(list(todo.values()), workers, chunk_size)))
+        cache.put_many(fresh)
+        results = [fresh[key] if result is None else result
+                   for key, result in zip(keys, results)]
+
+    rows = [_to_row(result) for result in results]
+    product_names, main_price, is_health_related = (
+        (list(col) for col in zip(*rows)) if rows else ([], [], [])
+    )
+    return {
+        "product_names": product_names,
+        "main_price": main_price,
+        "is_health_related": is_health_related,
+    }
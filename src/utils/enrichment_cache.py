@@ -0,0 +1,120 @@
+import json
+import hashlib
+import sqlite3
+from collections import OrderedDict
+
+from src.utils.Extractors import EXTRACTOR_VERSION, enrich_message
+
+
+def cache_key(text: str, channel_name: str, version: str = EXTRACTOR_VERSION) -> str:
+    """
+    Content hash identifying one enrichment result.
+
+    Keyed on the extractor version, the (case-insensitive) channel name and
+    the exact message text, so a repost of the same stock list hits the
+    cache while any change to the extractors invalidates it.
+    """
+    if isinstance(text, tuple):
+        text = text[0]
+    payload = "\0".join((version, channel_name.lower(), text or ""))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EnrichmentCache:
+    """
+    Memoizes `enrich_message` results.
+
+    A bounded in-memory LRU sits in front of an optional SQLite file that
+    survives between pipeline runs. Rows written by another extractor
+    version are dropped when the file is opened.
+    """
+
+    def __init__(self, maxsize: int = 100_000, db_path: str = None,
+                 version: str = EXTRACTOR_VERSION):
+        self.maxsize = maxsize
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._db = None
+
+        if db_path:
+            self._db = sqlite3.connect(db_path)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS enrich_cache (
+                    key TEXT PRIMARY KEY,
+                    version TEXT,
+                    value TEXT
+                )
+            """)
+            self._db.execute("DELETE FROM enrich_cache WHERE version != ?", (version,))
+            self._db.commit()
+
+    # ---------------- in-memory LRU ----------------
+
+    def _remember(self, key: str, value: dict):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    # ---------------- public API ----------------
+
+    def key(self, text: str, channel_name: str) -> str:
+        return cache_key(text, channel_name, self.version)
+
+    def get_many(self, keys: list) -> list:
+        """Looks up `keys`; returns a parallel list with None for misses."""
+        found = {}
+        missing = []
+        for key in keys:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                found[key] = self._lru[key]
+            else:
+                missing.append(key)
+
+        if self._db is not None and missing:
+            unique = list(dict.fromkeys(missing))
+            for i in range(0, len(unique), 500):  # stay under SQLite's bound-parameter limit
+                chunk = unique[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, value FROM enrich_cache WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+                    self._remember(key, found[key])
+
+        results = [found.get(key) for key in keys]
+        hit_count = sum(r is not None for r in results)
+        self.hits += hit_count
+        self.misses += len(keys) - hit_count
+        return results
+
+    def put_many(self, items: dict):
+        """Stores `{key: enrich_message result}` in memory and on disk."""
+        for key, value in items.items():
+            self._remember(key, value)
+
+        if self._db is not None and items:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO enrich_cache (key, version, value) VALUES (?, ?, ?)",
+                    [(key, self.version, json.dumps(value, ensure_ascii=False))
+                     for key, value in items.items()],
+                )
+
+    def enrich(self, text: str, channel_name: str) -> dict:
+        """Cached equivalent of `enrich_message(text, channel_name)`."""
+        key = self.key(text, channel_name)
+        value = self.get_many([key])[0]
+        if value is None:
+            value = enrich_message(text, channel_name)
+            self.put_many({key: value})
+        return value
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,133 @@
+import os
+from datetime import datetime
+
+from src.utils.hashing import file_hash
+
+# ✅ Set LOAD_FORCE=1 to reload every file regardless of the manifest
+LOAD_FORCE = os.getenv('LOAD_FORCE', '0') == '1'
+
+
+class SourceFile:
+    """A source file as seen on disk now; `content_hash` is filled in only when needed."""
+
+    def __init__(self, path, size, mtime_ns, content_hash=None):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.content_hash = content_hash
+
+    @classmethod
+    def stat(cls, path):
+        stat = os.stat(path)
+        return cls(path, stat.st_size, stat.st_mtime_ns)
+
+    def hashed(self):
+        if self.content_hash is None:
+            self.content_hash = file_hash(self.path)
+        return self.content_hash
+
+
+def needs_load(source, entry, force=False):
+    """
+    Whether `source` must be (re)loaded, given its manifest entry
+    (size, mtime_ns, content_hash, status) or None. Files are only hashed
+    when their size or mtime changed, so an unchanged archive costs one stat
+    per file; a file that was touched but not changed is not reloaded.
+    """
+    if force or entry is None:
+        return True
+    size, mtime_ns, content_hash, status = entry
+    if status != 'loaded':
+        return True
+    if (size, mtime_ns) == (source.size, source.mtime_ns):
+        return False
+    return source.hashed() != content_hash
+
+
+class LoadManifest:
+    """
+    Shared record of which raw source files each loader has loaded.
+
+    One row per (loader, path) in raw.load_manifest with the file's size,
+    mtime, content hash, load status and row count. `pending(paths)` returns
+    only new or changed files. `loaded(...)` runs on the caller's cursor, so
+    committing the loaded rows commits the manifest entry with them; a crash
+    mid-file leaves the file pending for the next run.
+    """
+
+    def __init__(self, conn, loader, force=LOAD_FORCE):
+        self.conn = conn
+        self.loader = loader
+        self.force = force
+        with conn.cursor() as cur:
+            cur.execute("""
+                CREATE SCHEMA IF NOT EXISTS raw;
+                CREATE TABLE IF NOT EXISTS raw.load_manifest (
+                    loader TEXT,
+                    path TEXT,
+                    size BIGINT,
+                    mtime_ns BIGINT,
+                    content_hash TEXT,
+                    status TEXT,
+                    row_count INTEGER,
+                    error TEXT,
+                    loaded_at TIMESTAMP,
+                    PRIMARY KEY (loader, path)
+                );
+            """)
+        conn.commit()
+
+    def _entries(self):
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT path, size, mtime_ns, content_hash, status
+                FROM raw.load_manifest WHERE loader = %s
+            """, (self.loader,))
+            return {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+
+    def pending(self, paths):
+        """SourceFiles for the paths that are new or changed since they were last loaded."""
+        entries = self._entries()
+        pending, touched = [], []
+        for path in paths:
+            source = SourceFile.stat(path)
+            entry = entries.get(path)
+            if needs_load(source, entry, self.force):
+                # Hashed before loading: if the file grows while it is read
+                # (the scraper appends to NDJSON), the next run still sees a change
+                source.hashed()
+                pending.append(source)
+            elif (entry[0], entry[1]) != (source.size, source.mtime_ns):
+                touched.append(source)
+        # Same content under a new mtime: remember the new stat so it is not hashed again
+        if touched:
+            with self.conn.cursor() as cur:
+                for source in touched:
+                    cur.execute("""
+                        UPDATE raw.load_manifest SET size = %s, mtime_ns = %s
+                        WHERE loader = %s AND path = %s
+                    """, (source.size, source.mtime_ns, self.loader, source.path))
+            self.conn.commit()
+        return pending
+
+    def _record(self, cur, source, status, row_count=None, error=None):
+        cur.execute("""
+            INSERT INTO raw.load_manifest
+                (loader, path, size, mtime_ns, content_hash, status, row_count, error, loaded_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (loader, path) DO UPDATE SET
+                size = EXCLUDED.size, mtime_ns = EXCLUDED.mtime_ns, content_hash = EXCLUDED.content_hash,
+                status = EXCLUDED.status, row_count = EXCLUDED.row_count, error = EXCLUDED.error,
+                loaded_at = EXCLUDED.loaded_at
+        """, (self.loader, source.path, source.size, source.mtime_ns, source.hashed(),
+              status, row_count, error, datetime.now()))
+
+    def loaded(self, cur, source, row_count):
+        """Marks `source` loaded in the caller's transaction; commit together with its rows."""
+        self._record(cur, source, 'loaded', row_count)
+
+    def failed(self, source, error):
+        """Records a failed load in its own transaction (after the caller rolled back)."""
+        with self.conn.cursor() as cur:
+            self._record(cur, source, 'failed', error=str(error))
+        self.conn.commit()
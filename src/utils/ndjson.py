@@ -0,0 +1,89 @@
+import os
+import gzip
+import json
+from datetime import datetime
+
+
+# ✅ Helper function for parsing Datetime objects in messsage dictonary
+def clean_message(obj):
+    if isinstance(obj, dict):
+        return {
+            k: clean_message(v)
+            for k, v in obj.items()
+            if not isinstance(v, bytes) # Remove keys that are Binary data
+        }
+    elif isinstance(obj, list):
+        return [clean_message(item) for item in obj]
+    elif isinstance(obj, datetime):
+        return obj.isoformat()  # or str(obj)
+    else:
+        return obj
+
+
+def _open_text(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class NDJSONWriter:
+    """
+    Appends one cleaned JSON object per line to `path`.
+
+    Paths ending in `.gz` are gzip-compressed; appending adds a new gzip
+    member, which gzip readers (including `iter_ndjson`) read transparently.
+    The file is flushed every `flush_every` records and on close, so memory
+    use does not depend on how many records are written.
+    """
+
+    def __init__(self, path, flush_every=100):
+        self.path = path
+        self.flush_every = flush_every
+        self.count = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = _open_text(path, 'a')
+
+    def write(self, obj):
+        self._file.write(json.dumps(clean_message(obj), ensure_ascii=False))
+        self._file.write('\n')
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+
+    def sync(self):
+        """Flushes and fsyncs, so everything written so far survives a crash."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_ndjson(path):
+    """Lazily yields the objects in an NDJSON (optionally .gz) file."""
+    with _open_text(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_message_file(path):
+    """
+    Yields messages from a scraped channel file: `.ndjson`, `.ndjson.gz`, or
+    the legacy `.json` array format written by older scraper versions.
+    """
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+    else:
+        yield from iter_ndjson(path)
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+# COPY text format: backslash escapes for the delimiter, line breaks and backslash itself
+_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def copy_field(value) -> str:
+    """One value in PostgreSQL's COPY text format; None becomes NULL (\\N)."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return str(value).translate(_ESCAPES)
+
+
+def copy_line(row) -> str:
+    return '\t'.join(copy_field(value) for value in row) + '\n'
+
+
+class CopyStream:
+    """
+    File-like view of an iterator of rows, encoded for `COPY ... FROM STDIN`.
+
+    psycopg2's `copy_expert` reads it in chunks, so rows are produced lazily
+    and memory use does not depend on how many rows are copied. `rows`
+    counts the rows handed out so far.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = bytearray()
+        self.rows = 0
+
+    def _fill(self, size):
+        while size is None or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                return
+            self._buffer += copy_line(row).encode('utf-8')
+            self.rows += 1
+
+    def read(self, size=-1):
+        self._fill(size if size is not None and size >= 0 else None)
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def copy_rows(cursor, table, columns, rows) -> int:
+    """Streams `rows` into `table` with COPY FROM STDIN; returns the number of rows sent."""
+    stream = CopyStream(rows)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream)
+    return stream.rows
@@ -0,0 +1,154 @@
+"""
+Micro-benchmarks for every extractor in src/utils/Extractors.py.
+
+Run directly for a report:
+    python -m tests.benchmarks.bench_extractors [--update-baseline]
+
+Throughput is stored relative to a fixed pure-Python calibration loop, so the
+baseline in baseline.json carries over between machines of different speed.
+"""
+import gc
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+from src.utils import Extractors
+from tests.benchmarks.corpus import generate_posts
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+CORPUS_SIZE = 1500
+
+# name -> callable(text, channel)
+BENCHMARKS = {
+    "classify_message": lambda text, channel: Extractors.classify_message(text),
+    "extract_chemed_products": lambda text, channel: Extractors.extract_chemed_products(text),
+    "extract_channel_products": Extractors.extract_channel_products,
+    "extract_price": lambda text, channel: Extractors.extract_price(text),
+    "extract_price_hits": lambda text, channel: Extractors.extract_price_hits(text),
+    "extract_health_flag": lambda text, channel: Extractors.extract_health_flag(text),
+    "match_health_terms": lambda text, channel: Extractors.match_health_terms(text),
+    "enrich_message": Extractors.enrich_message,
+}
+
+
+def _calibrate() -> float:
+    """Iterations per second of a fixed string/dict workload on this machine."""
+    def workload():
+        counts = {}
+        for i in range(2000):
+            word = f"token{i % 97}".upper().lower()
+            counts[word] = counts.get(word, 0) + 1
+        return counts
+
+    def run():
+        for _ in range(20):
+            workload()
+    return 20 / _best_time(run)
+
+
+def _best_time(run, repeats: int = 5) -> float:
+    # GC paused while timing, as timeit does, to keep collections out of the numbers
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best
+
+
+def _throughput(fn, posts) -> float:
+    def run():
+        for text, channel in posts:
+            fn(text, channel)
+    return len(posts) / _best_time(run)
+
+
+def _bytes_per_message(fn, posts) -> float:
+    """Mean peak transient allocation (tracemalloc) per message, in bytes."""
+    tracemalloc.start()
+    total = 0
+    try:
+        for text, channel in posts:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn(text, channel)
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - before
+    finally:
+        tracemalloc.stop()
+    return total / len(posts)
+
+
+def run_benchmarks(corpus_size: int = CORPUS_SIZE) -> dict:
+    """
+    Returns {name: {"msgs_per_sec", "bytes_per_msg", "relative"}} where
+    `relative` is msgs_per_sec divided by the calibration score.
+    """
+    posts = generate_posts(corpus_size)
+    for fn in BENCHMARKS.values():  # warm regex caches and imports
+        fn(*posts[0])
+
+    # calibrate next to every measurement so CPU frequency drift cancels out
+    report = {}
+    for name, fn in BENCHMARKS.items():
+        calibration = _calibrate()
+        msgs_per_sec = _throughput(fn, posts)
+        report[name] = {
+            "msgs_per_sec": round(msgs_per_sec, 1),
+            "bytes_per_msg": round(_bytes_per_message(fn, posts[:300]), 1),
+            "relative": round(msgs_per_sec / calibration, 4),
+        }
+
+    # extract_batch in-process, so the number reflects extractor cost only
+    texts, channels = zip(*posts)
+    calibration = _calibrate()
+    msgs_per_sec = len(posts) / _best_time(
+        lambda: Extractors.extract_batch(texts, channels, workers=1)
+    )
+    report["extract_batch"] = {
+        "msgs_per_sec": round(msgs_per_sec, 1),
+        "bytes_per_msg": None,
+        "relative": round(msgs_per_sec / calibration, 4),
+    }
+    return report
+
+
+def load_baseline() -> dict:
+    if not os.path.isfile(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(report: dict):
+    baseline = {name: {"relative": r["relative"]} for name, r in report.items()}
+    with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+
+def main():
+    report = run_benchmarks()
+    baseline = load_baseline()
+    print(f"{'extractor':<26}{'msgs/s':>12}{'bytes/msg':>12}{'vs baseline':>13}")
+    for name, r in report.items():
+        base = baseline.get(name, {}).get("relative")
+        change = f"{r['relative'] / base - 1:+.0%}" if base else "n/a"
+        bytes_per_msg = f"{r['bytes_per_msg']:.0f}" if r["bytes_per_msg"] is not None else "-"
+        print(f"{name:<26}{r['msgs_per_sec']:>12.0f}{bytes_per_msg:>12}{change:>13}")
+
+    if "--update-baseline" in sys.argv:
+        save_baseline(report)
+        print(f"Baseline written to {BASELINE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Synthetic Telegram posts for offline extractor benchmarks.
+
+Posts mimic the three channels we scrape: CheMed123 (Amharic notices with
+Latin product lines), tikvahpharma (stock updates and vacancy ads) and
+lobelia4cosmetics (one product per post with a price block). Generation is
+seeded, so every run benchmarks the same corpus.
+"""
+import random
+
+PRODUCTS = [
+    "Panadol Extra", "Amoxicillin", "Augmentin 625", "Vitamin C", "Omeprazole",
+    "Centrum Silver", "Seven Seas", "Feroglobin B12", "Neurobion Forte",
+    "Zincovit", "Glucophage XR", "Diclofenac Gel", "Cetaphil Cleanser",
+    "CeraVe Moisturizing Cream", "The Ordinary Niacinamide", "Nivea Soft",
+    "Accu-Chek Strip", "Pregnacare Plus", "Wellman Original", "Ors Sachet",
+]
+DOSAGES = ["500mg", "250 mg", "1000mg", "5 ml", "100ml", "20 mcg", "400 IU", "10%", "30 tabs"]
+FORMS = ["tablet", "caps", "syrup", "susp", "inj", "cream", "gel", "drop", "strip", "kit"]
+BULLETS = ["💊", "✅", "🔵", "🟠", "⭐️", "📦", "👉", "•", "-", "#", "🔥"]
+AMHARIC = [
+    "ውድ ደንበኞቻችን", "አዲስ መድሃኒት ገብቷል", "የጤና ምርቶች", "ለበለጠ መረጃ ይደውሉ",
+    "ፋርማሲ", "በቅናሽ ዋጋ", "ሴቶች ጤና", "የህፃናት ቫይታሚን", "አድራሻ፡ ቦሌ መድሃኒአለም",
+]
+ENGLISH_FILLER = [
+    "Dear Customers", "Call Center 8707", "Free delivery in Addis Ababa",
+    "Follow us on Telegram", "Limited stock", "Order now",
+]
+
+
+def _price(rng: random.Random) -> str:
+    value = rng.choice([70, 150, 450, 1200, 3500, 12500])
+    return rng.choice([
+        f"Price {value}",
+        f"{value} birr",
+        f"{value:,} ETB",
+        f"💵{value}ብር",
+        f"{value}-{value * 2} birr",
+        f"ዋጋ፡ {value} ብር",
+    ])
+
+
+def _product_line(rng: random.Random) -> str:
+    return f"{rng.choice(BULLETS)} {rng.choice(PRODUCTS)} {rng.choice(DOSAGES)} {rng.choice(FORMS)}"
+
+
+def chemed_post(rng: random.Random) -> str:
+    lines = [rng.choice(AMHARIC), rng.choice(ENGLISH_FILLER)]
+    lines += [_product_line(rng) for _ in range(rng.randint(1, 4))]
+    lines += [rng.choice(AMHARIC) for _ in range(rng.randint(1, 3))]
+    if rng.random() < 0.4:
+        lines.append(_price(rng))
+    return "\n".join(lines)
+
+
+def tikvah_post(rng: random.Random) -> str:
+    if rng.random() < 0.15:
+        return (f"Urgent vacancy\nPosition: Pharmacist\nExperience: {rng.randint(0, 5)} years\n"
+                f"Salary: negotiable\n{rng.choice(AMHARIC)}")
+    lines = [rng.choice(["NEW ARRIVALS ✅", "Stock update 📦", "New arrival 🔥"])]
+    lines += [f"{_product_line(rng)} Exp {rng.choice(['Aug-27', 'Dec-27', 'Jul-27'])}"
+              for _ in range(rng.randint(2, 8))]
+    lines.append(rng.choice(["Tikvah Sales 0911 223344", "Himed Sales091 160", "Join us"]))
+    return "\n".join(lines)
+
+
+def lobelia_post(rng: random.Random) -> str:
+    lines = [
+        f"{rng.choice(PRODUCTS)} {rng.choice(DOSAGES)}",
+        f"{_price(rng)}",
+        rng.choice(AMHARIC),
+        "📍 Bole, Lobelia Pharmacy & Cosmetics",
+        "📞 0905707070 ✔️",
+    ]
+    return "\n".join(lines)
+
+
+STYLES = {
+    "CheMed123": chemed_post,
+    "tikvahpharma": tikvah_post,
+    "lobelia4cosmetics": lobelia_post,
+}
+
+
+def generate_posts(n: int, seed: int = 0) -> list:
+    """Returns `n` (text, channel_name) pairs cycling through the channel styles."""
+    rng = random.Random(seed)
+    channels = list(STYLES)
+    posts = []
+    for i in range(n):
+        channel = channels[i % len(channels)]
+        posts.append((STYLES[channel](rng), channel))
+    return posts
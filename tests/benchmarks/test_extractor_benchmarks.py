@@ -0,0 +1,33 @@
+import os
+import pytest
+from tests.benchmarks.bench_extractors import BENCHMARKS, load_baseline, run_benchmarks
+from tests.benchmarks.corpus import generate_posts
+
+# Timing-sensitive, so opt-in: RUN_BENCHMARKS=1 pytest tests/benchmarks
+run_benchmarks_enabled = os.getenv("RUN_BENCHMARKS") == "1"
+# Allowed slowdown against the stored baseline before a benchmark fails
+TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.35"))
+
+
+def test_corpus_is_deterministic_and_mixed():
+    posts = generate_posts(30, seed=7)
+    assert posts == generate_posts(30, seed=7)
+    assert {channel for _, channel in posts} == {"CheMed123", "tikvahpharma", "lobelia4cosmetics"}
+    assert any("ብር" in text or "birr" in text for text, _ in posts)
+
+
+def test_every_extractor_is_benchmarked():
+    assert set(BENCHMARKS) | {"extract_batch"} <= set(load_baseline())
+
+
+@pytest.mark.skipif(not run_benchmarks_enabled, reason="set RUN_BENCHMARKS=1 to run benchmarks")
+def test_extractor_throughput_against_baseline():
+    baseline = load_baseline()
+    report = run_benchmarks()
+
+    regressions = {
+        name: f"{r['relative'] / baseline[name]['relative'] - 1:+.0%}"
+        for name, r in report.items()
+        if name in baseline and r["relative"] < baseline[name]["relative"] * (1 - TOLERANCE)
+    }
+    assert not regressions, f"Throughput regressed past baseline: {regressions}"
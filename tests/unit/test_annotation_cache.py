@@ -0,0 +1,30 @@
+import os
+from analytics_api.annotation_cache import AnnotationCache
+
+
+def test_miss_then_hit(tmp_path):
+    cache = AnnotationCache(str(tmp_path), max_bytes=1000)
+    assert cache.get("abc") is None
+    cache.put("abc", b"jpeg")
+    assert cache.get("abc") == b"jpeg"
+
+
+def test_evicted_entry_is_a_miss_not_an_error(tmp_path):
+    cache = AnnotationCache(str(tmp_path), max_bytes=1000)
+    cache.put("abc", b"jpeg")
+    os.remove(cache.path("abc"))  # evicted by another request
+    assert cache.get("abc") is None
+
+
+def test_evicts_least_recently_used_to_stay_under_budget(tmp_path):
+    cache = AnnotationCache(str(tmp_path), max_bytes=350)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, b"x" * 100)
+        os.utime(cache.path(key), ns=(i * 10**9, i * 10**9))
+
+    cache.get("a")          # "a" is used again, so "b" is now the oldest
+    cache.put("d", b"x" * 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c") and cache.get("d")
+    assert cache.size() <= 350
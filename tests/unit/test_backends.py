@@ -0,0 +1,36 @@
+import pytest
+
+from src.models.backends import quantize_int8
+
+
+def conv_model(path):
+    """A one-layer ONNX convolution, large enough for dynamic quantization to pick up."""
+    np = pytest.importorskip("numpy")
+    onnx = pytest.importorskip("onnx")
+    from onnx import helper, numpy_helper, TensorProto
+
+    weights = numpy_helper.from_array(np.random.RandomState(0).randn(8, 3, 3, 3).astype(np.float32), "w")
+    graph = helper.make_graph(
+        [helper.make_node("Conv", ["x", "w"], ["y"], pads=[1, 1, 1, 1])],
+        "conv",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 3, 16, 16])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 8, 16, 16])],
+        [weights],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)], ir_version=8)
+    onnx.save(model, path)
+
+
+def test_quantized_model_runs_on_the_cpu_provider(tmp_path):
+    ort = pytest.importorskip("onnxruntime")
+    np = pytest.importorskip("numpy")
+    path = str(tmp_path / "model.onnx")
+    conv_model(path)
+
+    quantized = quantize_int8(path)
+    assert quantized != path
+    assert quantize_int8(path) == quantized  # cached
+
+    session = ort.InferenceSession(quantized, providers=["CPUExecutionProvider"])
+    (output,) = session.run(None, {"x": np.ones((1, 3, 16, 16), dtype=np.float32)})
+    assert output.shape == (1, 8, 16, 16)
@@ -0,0 +1,40 @@
+import json
+from src.models.checkpoint import DetectionCheckpoint, record_key
+
+
+def record(message_id, labels=("bottle",)):
+    return {"message_id": message_id, "channel_name": "CheMed123", "image_path": f"img_{message_id}.jpg",
+            "content_hash": f"h{message_id}", "detections": [{"label": l, "confidence": 0.9} for l in labels]}
+
+
+def test_interrupted_run_resumes_from_synced_records(tmp_path):
+    path = str(tmp_path / "media_detection_results.jsonl")
+    run = DetectionCheckpoint(path)
+    run.append(record(1))
+    run.append(record(2))
+    run.sync()
+    run.close()
+    with open(path + ".partial", "a") as f:
+        f.write('{"message_id": 3, "chan')  # killed mid-write
+
+    resumed = DetectionCheckpoint(path)
+    done = resumed.completed()
+    assert sorted(key[1] for key in done) == [1, 2]
+    assert done[record_key(record(1))]["detections"][0]["label"] == "bottle"
+
+    # The torn tail is gone, so appends continue on a clean line
+    resumed.append(record(3))
+    resumed.sync()
+    assert sorted(key[1] for key in resumed.completed()) == [1, 2, 3]
+
+
+def test_finalize_writes_output_and_drops_partial(tmp_path):
+    path = tmp_path / "media_detection_results.jsonl"
+    checkpoint = DetectionCheckpoint(str(path))
+    checkpoint.append(record(2))
+    checkpoint.finalize([record(1), record(2)])
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["message_id"] for r in lines] == [1, 2]
+    assert not (tmp_path / "media_detection_results.jsonl.partial").exists()
+    assert DetectionCheckpoint(str(path)).completed() == {}
@@ -0,0 +1,64 @@
+import os
+from src.models.detection_ledger import DetectionLedger, weights_version
+from src.utils.hashing import file_hash
+
+
+def test_ledger_keys_on_content_and_model_version(tmp_path):
+    db = str(tmp_path / "ledger.sqlite")
+    a = tmp_path / "a.jpg"
+    b = tmp_path / "b.jpg"
+    a.write_bytes(b"same photo")
+    b.write_bytes(b"same photo")  # reposted under another name
+
+    ledger = DetectionLedger(db, "yolov8l.pt:abc:640:torch")
+    assert ledger.get(ledger.content_hash(str(a))) is None
+    ledger.put(ledger.content_hash(str(a)), [{"label": "bottle", "confidence": 0.9}])
+    assert ledger.get(ledger.content_hash(str(b))) == [{"label": "bottle", "confidence": 0.9}]
+    ledger.close()
+
+    # Survives restarts, but not a model change
+    assert DetectionLedger(db, "yolov8l.pt:abc:640:torch").get(file_hash(str(a))) is not None
+    assert DetectionLedger(db, "yolov8x.pt:def:640:torch").get(file_hash(str(a))) is None
+
+
+def test_changed_file_is_rehashed(tmp_path):
+    ledger = DetectionLedger(str(tmp_path / "ledger.sqlite"), "v1")
+    image = tmp_path / "a.jpg"
+    image.write_bytes(b"first")
+    first = ledger.content_hash(str(image))
+
+    image.write_bytes(b"second version")
+    os.utime(image, ns=(1, 1))
+    assert ledger.content_hash(str(image)) != first
+    assert ledger.content_hash(str(image)) == file_hash(str(image))
+
+
+def test_weights_version_tracks_weights_content(tmp_path):
+    weights = tmp_path / "yolov8l.pt"
+    weights.write_bytes(b"weights-1")
+    v1 = weights_version(str(weights), 640)
+    weights.write_bytes(b"weights-2")
+    assert weights_version(str(weights), 640) != v1
+    assert weights_version(str(weights), 640).startswith("yolov8l.pt:")
+    assert weights_version(str(weights), 640) != weights_version(str(weights), 960)
+
+
+def test_perceptual_hashes_are_cached_by_content(tmp_path):
+    db = str(tmp_path / "ledger.sqlite")
+    ledger = DetectionLedger(db, "v1")
+    assert ledger.perceptual_hash("abc") is None
+    ledger.put_perceptual_hash("abc", (1 << 64) - 1, (640, 480))
+    ledger.close()
+    # Kept across model versions: the hash depends only on the image
+    assert DetectionLedger(db, "v2").perceptual_hash("abc") == ((1 << 64) - 1, (640, 480))
+
+
+def test_detected_perceptual_hashes_follow_the_model_version(tmp_path):
+    db = str(tmp_path / "ledger.sqlite")
+    ledger = DetectionLedger(db, "v1")
+    ledger.put_perceptual_hash("detected", 5, (640, 480))
+    ledger.put_perceptual_hash("hashed_only", 6, (640, 480))
+    ledger.put("detected", [])
+    assert ledger.detected_perceptual_hashes() == [("detected", 5, (640, 480))]
+    ledger.close()
+    assert DetectionLedger(db, "v2").detected_perceptual_hashes() == []
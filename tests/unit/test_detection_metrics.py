@@ -0,0 +1,30 @@
+from src.models.detection_metrics import iou, match_detections, agreement_report
+
+
+def det(class_id, confidence, box):
+    return {"class_id": class_id, "confidence": confidence, "box": box}
+
+
+def test_iou():
+    assert iou([0, 0, 10, 10], [0, 0, 10, 10]) == 1.0
+    assert iou([0, 0, 10, 10], [20, 20, 30, 30]) == 0.0
+    assert round(iou([0, 0, 10, 10], [5, 0, 15, 10]), 4) == round(50 / 150, 4)
+
+
+def test_matching_requires_same_class_and_overlap():
+    reference = [det(39, 0.9, [0, 0, 10, 10]), det(0, 0.8, [50, 50, 60, 60])]
+    candidate = [det(39, 0.85, [0, 0, 10, 11]), det(41, 0.7, [50, 50, 60, 60])]
+    pairs, missed, extra = match_detections(reference, candidate)
+    assert [(r["class_id"], c["class_id"]) for r, c in pairs] == [(39, 39)]
+    assert [d["class_id"] for d in missed] == [0]
+    assert [d["class_id"] for d in extra] == [41]
+
+
+def test_agreement_report():
+    reference = [[det(39, 0.9, [0, 0, 10, 10])], [det(0, 0.5, [0, 0, 4, 4])]]
+    candidate = [[det(39, 0.8, [0, 0, 10, 10])], []]
+    report = agreement_report(reference, candidate)
+    assert report["recall"] == 0.5
+    assert report["precision"] == 1.0
+    assert report["mean_confidence_delta"] == 0.1
+    assert report["mean_matched_iou"] == 1.0
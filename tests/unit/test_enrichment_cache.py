@@ -0,0 +1,39 @@
+from src.utils.Extractors import enrich_message, extract_batch
+from src.utils.enrichment_cache import EnrichmentCache, cache_key
+
+def test_cache_key_depends_on_version_and_channel():
+    text = "Panadol 500mg"
+    assert cache_key(text, "CheMed123") == cache_key(text, "chemed123")
+    assert cache_key(text, "CheMed123") != cache_key(text, "tikvahpharma")
+    assert cache_key(text, "CheMed123", version="1") != cache_key(text, "CheMed123", version="2")
+
+def test_lru_is_bounded():
+    cache = EnrichmentCache(maxsize=2)
+    for text in ["a", "b", "c"]:
+        cache.enrich(text, "CheMed123")
+    assert cache.get_many([cache.key("a", "CheMed123")]) == [None]
+
+def test_persistent_cache_survives_reopen_and_version_bump(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite")
+    text = "💊 Panadol Extra 500mg syrup 500 birr"
+
+    cache = EnrichmentCache(db_path=db_path)
+    assert cache.enrich(text, "CheMed123") == enrich_message(text, "CheMed123")
+    cache.close()
+
+    reopened = EnrichmentCache(db_path=db_path)
+    assert reopened.get_many([reopened.key(text, "CheMed123")])[0] == enrich_message(text, "CheMed123")
+    reopened.close()
+
+    bumped = EnrichmentCache(db_path=db_path, version="next")
+    assert bumped.get_many([bumped.key(text, "CheMed123")]) == [None]
+    bumped.close()
+
+def test_extract_batch_with_cache_matches_uncached():
+    texts = ["💊 Panadol Extra 500mg syrup 500 birr", "Nothing here"] * 3
+    channels = ["CheMed123", "tikvahpharma"] * 3
+    cache = EnrichmentCache()
+    assert extract_batch(texts, channels, workers=1, cache=cache) == extract_batch(texts, channels, workers=1)
+    assert cache.misses == 6
+    extract_batch(texts, channels, workers=1, cache=cache)
+    assert cache.hits == 6
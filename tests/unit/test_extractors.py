@@ -1,5 +1,9 @@
 import pytest
-from src.utils.Extractors import extract_price, extract_health_flag, extract_channel_products
+from src.utils.Extractors import (
+    extract_price, extract_health_flag, extract_channel_products, match_health_terms,
+    extract_chemed_products, classify_message, extract_batch, enrich_message,
+    extract_price_hits, PriceHit
+)
 
 def test_extract_price_basic():
     text = "This product costs $10 or 500 birr."
@@ -18,4 +22,51 @@ def test_extract_channel_products():
     text = "Aspirin and Paracetamol are available."
     channel = "test_channel"
     products = extract_channel_products(text, channel)
-    assert isinstance(products, list) 
\ No newline at end of file
+    assert isinstance(products, list) 
+def test_match_health_terms_reports_hits():
+    text = "Paracetamol 500 mg syrup — የጤና ምርቶች"
+    assert match_health_terms(text) == ["paracetamol", "mg", "syrup", "የጤና"]
+
+def test_match_health_terms_whole_words_only():
+    assert match_health_terms("Colors and sports") == []
+
+def test_chemed_rules_tail_window():
+    text = "💊 Panadol Extra 500mg tablets\nDear Customers"
+    assert extract_chemed_products(text) == ["Panadol Extra 500mg"]
+
+def test_classify_message_vacancy():
+    assert classify_message("Urgent vacancy for a pharmacist") == {"type": "vacancy", "products": []}
+
+def test_extract_batch_columnar_and_ordered():
+    texts = ["Nothing here", "💊 Panadol Extra 500mg syrup 500 birr", None]
+    channels = ["tikvahpharma", "CheMed123", "CheMed123"]
+    serial = extract_batch(texts, channels, workers=1)
+    assert serial == {
+        "product_names": [None, "Panadol Extra 500mg", None],
+        "main_price": [None, 500, None],
+        "is_health_related": [False, True, False],
+    }
+    assert extract_batch(texts * 4, channels * 4, workers=2, chunk_size=3)["product_names"] == serial["product_names"] * 4
+
+def test_extract_batch_length_mismatch():
+    with pytest.raises(ValueError):
+        extract_batch(["a"], [])
+
+def test_enrich_message_matches_single_extractors():
+    text = "💊 Panadol Extra 500mg syrup\nPrice: 1,200 birr"
+    result = enrich_message(text, "CheMed123")
+    assert result["products"] == extract_channel_products(text, "CheMed123")
+    assert sorted(result["prices"]) == sorted(extract_price(text))
+    assert result["is_health_related"] is extract_health_flag(text) is True
+
+def test_extract_price_hits_structured():
+    text = "Price: 1,200 ETB\n💵700ብር or 70-500 birr"
+    assert extract_price_hits(text) == [
+        PriceHit(1200, 1200, 1200, "ETB", 7),
+        PriceHit(700, 700, 700, "ብር", 18),
+        PriceHit(70, 70, 500, "birr", 27),
+    ]
+    assert extract_price(text) == [1200, 700, 70, 500]
+
+def test_extract_price_ignores_bare_numbers():
+    assert extract_price("Call 0911 223344, 20 tabs") == []
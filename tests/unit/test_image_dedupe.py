@@ -0,0 +1,112 @@
+import random
+
+from src.models.checkpoint import record_key
+from src.models.detection_ledger import DetectionLedger
+from src.models.image_dedupe import (
+    BKTree, hamming, dhash_bits, group_near_duplicates, copy_detections, same_aspect, dedupe_pending,
+)
+
+
+def test_dhash_bits_sets_a_bit_where_brightness_increases():
+    assert dhash_bits([[0, 1, 1], [2, 1, 3]]) == 0b1001
+    # A uniformly brighter re-encode keeps every gradient, so the hash is unchanged
+    image = [[(x * 7 + y * 13) % 256 for x in range(9)] for y in range(8)]
+    assert dhash_bits(image) == dhash_bits([[min(p + 3, 255) for p in row] for row in image])
+
+
+def test_bk_tree_search_matches_brute_force():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(300)]
+    values += [v ^ (1 << rng.randrange(64)) for v in values[:50]]  # near-duplicates
+    tree = BKTree()
+    for i, v in enumerate(values):
+        tree.add(v, i)
+
+    for query in values[:20] + [rng.getrandbits(64) for _ in range(5)]:
+        expected = sorted(i for i, v in enumerate(values) if hamming(query, v) <= 6)
+        found = tree.search(query, 6)
+        assert sorted(item for _, _, item in found) == expected
+        assert [d for d, _, _ in found] == sorted(d for d, _, _ in found)
+
+
+def test_groups_are_led_by_the_first_image_and_do_not_chain():
+    a = 0
+    near_a = 0b11              # 2 bits from a
+    chained = 0b11111          # 3 bits from near_a, but 5 from a
+    other = (1 << 64) - 1
+    groups = group_near_duplicates(
+        [("a", a), ("near_a", near_a), ("other", other), ("chained", chained), ("broken", None)], 4
+    )
+    assert groups == [["a", "near_a"], ["other"], ["chained"], ["broken"]]
+
+
+def test_copied_boxes_are_rescaled_to_the_duplicate():
+    detections = [{"label": "bottle", "class_id": 39, "confidence": 0.9, "box": [10, 20, 110, 220]},
+                  {"label": "person", "class_id": 0, "confidence": 0.5, "box": None}]
+    copied = copy_detections(detections, (200, 400), (100, 200))
+    assert copied[0]["box"] == [5.0, 10.0, 55.0, 110.0]
+    assert copied[1]["box"] is None
+    assert detections[0]["box"] == [10, 20, 110, 220]  # representative untouched
+
+
+def test_known_images_lead_their_own_groups():
+    known = [("detected_last_week", 0)]
+    groups = group_near_duplicates([("repost", 0b1), ("new", (1 << 64) - 1), ("new_copy", (1 << 64) - 2)], 4,
+                                   known=known)
+    assert groups == [["detected_last_week", "repost"], ["new", "new_copy"]]
+
+
+def test_same_aspect_tolerates_rescaling_but_not_crops_or_padding():
+    assert same_aspect((1280, 720), (640, 360))
+    assert same_aspect((1000, 563), (500, 281))   # rounding after a rescale
+    assert not same_aspect((1280, 720), (720, 720))  # padded or cropped to a square
+    assert not same_aspect((1000, 800), (900, 800))  # 10% cropped off one side
+
+
+def hashed_images(ledger, images):
+    """Pending (entry, image_path) pairs whose perceptual hashes are already cached in `ledger`."""
+    pending = []
+    for name, dhash, size in images:
+        ledger.put_perceptual_hash(name, dhash, size)
+        pending.append(({"channel_name": "chan", "message_id": len(pending), "content_hash": name}, name + ".jpg"))
+    return pending
+
+
+def test_dedupe_pending_detects_one_representative_per_group(tmp_path):
+    ledger = DetectionLedger(str(tmp_path / "ledger.sqlite"), "v1")
+    pending = hashed_images(ledger, [
+        ("photo", 0, (800, 600)),
+        ("rescaled", 0b1, (400, 300)),
+        ("padded", 0b11, (800, 800)),      # near-identical hash, different shape
+        ("other", (1 << 64) - 1, (800, 600)),
+    ])
+
+    representatives, members, reused = dedupe_pending(pending, ledger, 4)
+
+    assert [entry["content_hash"] for entry, _ in representatives] == ["photo", "padded", "other"]
+    (member, path, size, source_size), = members[record_key(pending[0][0])]
+    assert (member["content_hash"], path, size, source_size) == ("rescaled", "rescaled.jpg", (400, 300), (800, 600))
+    assert reused == []
+
+
+def test_dedupe_pending_reuses_detections_from_earlier_runs(tmp_path):
+    ledger = DetectionLedger(str(tmp_path / "ledger.sqlite"), "v1")
+    hashed_images(ledger, [("last_week", 0, (800, 600))])
+    ledger.put("last_week", [{"label": "bottle", "confidence": 0.9, "box": [80, 60, 160, 120]}])
+    pending = hashed_images(ledger, [("repost", 0b1, (400, 300)), ("cropped", 0b10, (600, 600))])
+
+    representatives, members, reused = dedupe_pending(pending, ledger, 4)
+
+    assert [entry["content_hash"] for entry, _ in representatives] == ["cropped"]
+    assert members == {}
+    (entry, path, detections), = reused
+    assert entry["content_hash"] == "repost" and path == "repost.jpg"
+    assert detections[0]["box"] == [40.0, 30.0, 80.0, 60.0]
+    assert ledger.get("repost") == detections  # stored, so the next run skips it
+
+
+def test_negative_distance_turns_dedupe_off(tmp_path):
+    ledger = DetectionLedger(str(tmp_path / "ledger.sqlite"), "v1")
+    pending = hashed_images(ledger, [("photo", 0, (800, 600)), ("copy", 0, (800, 600))])
+
+    assert dedupe_pending(pending, ledger, -1) == (pending, {}, [])
@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+from sqlalchemy.exc import ProgrammingError
+from analytics_api.crud import get_image_detections, DetectionsUnavailable, UNDEFINED_COLUMN
+
+
+class PgError(Exception):
+    def __init__(self, pgcode):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+class FailingSession:
+    """A session whose queries fail the way Postgres reports them."""
+
+    def __init__(self, pgcode):
+        self.pgcode = pgcode
+        self.rolled_back = False
+
+    def execute(self, sql, params):
+        raise ProgrammingError(str(sql), params, PgError(self.pgcode))
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def test_table_without_box_columns_is_reported_as_unavailable():
+    db = FailingSession(UNDEFINED_COLUMN)
+    with pytest.raises(DetectionsUnavailable, match="load_media_detections"):
+        get_image_detections("chan", 1, db)
+    assert db.rolled_back  # the session stays usable for the next request
+
+
+def test_other_database_errors_are_not_masked():
+    with pytest.raises(ProgrammingError):
+        get_image_detections("chan", 1, FailingSession("42601"))
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import threading
+import pytest
+from src.models.inference_client import InferenceClient
+
+
+@pytest.fixture
+def stub_worker():
+    """A worker speaking the inference protocol, answering with a fake detector."""
+    ready = threading.Event()
+    state = {}
+
+    async def handle(reader, writer):
+        while line := await reader.readline():
+            request = json.loads(line)
+            if request["op"] == "ping":
+                response = {"ok": True}
+            elif request["image_path"].endswith("missing.jpg"):
+                response = {"error": "could not read"}
+            else:
+                response = {"detections": [{"label": "bottle", "confidence": 0.9}]}
+            writer.write((json.dumps(dict(response, id=request["id"])) + "\n").encode())
+            await writer.drain()
+        writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        state["port"] = server.sockets[0].getsockname()[1]
+        state["loop"] = asyncio.get_running_loop()
+        state["stop"] = asyncio.Event()
+        ready.set()
+        async with server:
+            await state["stop"].wait()
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),), daemon=True)
+    thread.start()
+    ready.wait(5)
+    yield state["port"]
+    state["loop"].call_soon_threadsafe(state["stop"].set)
+    thread.join(5)
+
+
+def test_client_round_trip(stub_worker):
+    client = InferenceClient("127.0.0.1", stub_worker, timeout=5)
+    assert client.available()
+    assert client.detect(["a.jpg", "missing.jpg"]) == [[{"label": "bottle", "confidence": 0.9}], None]
+    assert asyncio.run(client.detect_async(["a.jpg"])) == [[{"label": "bottle", "confidence": 0.9}]]
+
+
+def test_client_reports_unavailable_worker():
+    assert not InferenceClient("127.0.0.1", 1).available(timeout=0.2)
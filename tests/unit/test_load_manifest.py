@@ -0,0 +1,42 @@
+import os
+
+from src.utils.hashing import file_hash
+from src.utils.load_manifest import SourceFile, needs_load
+
+
+def loaded_entry(path):
+    source = SourceFile.stat(path)
+    return (source.size, source.mtime_ns, file_hash(path), 'loaded')
+
+
+def test_new_failed_and_forced_files_are_loaded(tmp_path):
+    path = tmp_path / "CheMed123.ndjson"
+    path.write_text('{"id": 1}\n')
+    source = SourceFile.stat(str(path))
+
+    assert needs_load(source, None)
+    assert needs_load(source, loaded_entry(str(path))[:3] + ('failed',))
+    assert needs_load(source, loaded_entry(str(path)), force=True)
+
+
+def test_unchanged_file_is_skipped_without_hashing(tmp_path):
+    path = tmp_path / "CheMed123.ndjson"
+    path.write_text('{"id": 1}\n')
+    entry = loaded_entry(str(path))
+
+    source = SourceFile.stat(str(path))
+    assert not needs_load(source, entry)
+    assert source.content_hash is None
+
+
+def test_touched_file_is_skipped_but_appended_file_is_loaded(tmp_path):
+    path = tmp_path / "CheMed123.ndjson"
+    path.write_text('{"id": 1}\n')
+    entry = loaded_entry(str(path))
+
+    os.utime(path, ns=(1, 1))  # same bytes, new mtime
+    assert not needs_load(SourceFile.stat(str(path)), entry)
+
+    with open(path, "a") as f:  # the scraper appended a message
+        f.write('{"id": 2}\n')
+    assert needs_load(SourceFile.stat(str(path)), entry)
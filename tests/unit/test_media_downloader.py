@@ -0,0 +1,37 @@
+import asyncio
+from types import SimpleNamespace
+from src.services.media_downloader import MediaDownloader
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def download_media(self, media, file=None):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return b"jpeg-bytes-" + str(media.photo.id).encode()
+
+
+def photo(photo_id):
+    return SimpleNamespace(photo=SimpleNamespace(id=photo_id))
+
+
+def test_downloads_dedupe_by_photo_id_and_skip_existing(tmp_path):
+    (tmp_path / "chan_3.jpg").write_bytes(b"already here")
+    client = FakeClient()
+
+    async def run():
+        downloader = MediaDownloader(client, str(tmp_path), concurrency=2)
+        tasks = [
+            downloader.fetch(photo(1), "chan_1.jpg"),
+            downloader.fetch(photo(1), "chan_2.jpg"),  # same photo in an album
+            downloader.fetch(photo(3), "chan_3.jpg"),
+        ]
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(run()) == ["chan_1.jpg", "chan_1.jpg", "chan_3.jpg"]
+    assert client.calls == 1
+    assert (tmp_path / "chan_1.jpg").read_bytes() == b"jpeg-bytes-1"
+    assert (tmp_path / "chan_3.jpg").read_bytes() == b"already here"
+    assert not list(tmp_path.glob("*.part"))
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import pytest
+from src.services.message_sources import MessageSource, ReplaySource
+
+
+def record(tmp_path):
+    day = tmp_path / "messages" / "2025-07-12"
+    day.mkdir(parents=True)
+    rows = [
+        {"_": "Message", "id": 1, "date": "2025-07-12T08:00:00+00:00", "message": "hello"},
+        {"_": "Message", "id": 2, "date": "2025-07-12T09:00:00+00:00", "message": "photo",
+         "media": {"_": "MessageMediaPhoto", "photo": {"_": "Photo", "id": 77}}},
+        {"_": "Message", "id": 3, "date": "2025-07-12T10:00:00+00:00", "message": "bye"},
+    ]
+    (day / "chan.ndjson").write_text("\n".join(json.dumps(r) for r in rows) + "\n")
+    media = tmp_path / "media"
+    media.mkdir()
+    (media / "chan_2.jpg").write_bytes(b"jpeg")
+    return str(tmp_path / "messages"), str(media)
+
+
+def collect(source, **kwargs):
+    async def run():
+        entity = await source.get_entity("@chan")
+        return [msg async for msg in source.iter_messages(entity, **kwargs)]
+    return asyncio.run(run())
+
+
+def test_replay_serves_history_like_telegram(tmp_path):
+    dumps, media = record(tmp_path)
+    source = ReplaySource(dumps, media)
+
+    assert [m.id for m in collect(source)] == [3, 2, 1]  # newest first
+    assert [m.id for m in collect(source, limit=2)] == [3, 2]
+    assert [m.id for m in collect(source, min_id=1, reverse=True)] == [2, 3]
+
+    photo_msg = collect(source, min_id=1, reverse=True)[0]
+    assert photo_msg.to_dict()["message"] == "photo"
+    assert photo_msg.date.hour == 9
+    assert asyncio.run(source.download_media(photo_msg.media)) == b"jpeg"
+
+
+def test_replay_repeat_multiplies_volume_with_unique_ids(tmp_path):
+    dumps, media = record(tmp_path)
+    source = ReplaySource(dumps, media, repeat=3)
+
+    messages = collect(source, reverse=True)
+    assert len(messages) == 9
+    assert [m.id for m in messages] == sorted({m.id for m in messages})
+    photo_ids = {m.media.photo.id for m in messages if m.media}
+    assert len(photo_ids) == 3
+    assert all(m.to_dict()["id"] == m.id for m in messages)
+    # The persisted dicts agree with the objects, so photo-id dedupe sees unique photos
+    assert {m.to_dict()["media"]["photo"]["id"] for m in messages if m.media} == photo_ids
+
+
+def test_replay_rate_limits_messages(tmp_path):
+    dumps, media = record(tmp_path)
+    source = ReplaySource(dumps, media, rate=100)
+
+    loop_time = []
+
+    async def run():
+        entity = await source.get_entity("chan")
+        start = asyncio.get_running_loop().time()
+        async for _ in source.iter_messages(entity):
+            pass
+        loop_time.append(asyncio.get_running_loop().time() - start)
+
+    asyncio.run(run())
+    assert loop_time[0] >= 0.015  # 3 messages at 100/s: two waits of 10ms
+
+
+def test_incomplete_source_fails_when_constructed():
+    class NoDownloads(MessageSource):
+        async def get_entity(self, channel):
+            return channel
+
+        def iter_messages(self, entity, limit=None, min_id=0, reverse=False):
+            return iter(())
+
+    with pytest.raises(TypeError):
+        NoDownloads()
@@ -0,0 +1,35 @@
+import asyncio
+from src.models.microbatch import MicroBatcher
+
+
+def test_concurrent_requests_share_batches_and_fail_individually():
+    calls = []
+
+    def run_batch(items):
+        calls.append(list(items))
+        return [ValueError("corrupt") if item == "bad" else item.upper() for item in items]
+
+    async def run():
+        batcher = MicroBatcher(run_batch, max_batch=4, max_wait=0.05)
+        results = await asyncio.gather(*(batcher.submit(x) for x in ["a", "b", "bad", "c", "d", "e"]),
+                                       return_exceptions=True)
+        await batcher.stop()
+        return results, batcher
+
+    results, batcher = asyncio.run(run())
+    assert results[:2] == ["A", "B"] and results[3:] == ["C", "D", "E"]
+    assert isinstance(results[2], ValueError)
+    assert [len(c) for c in calls] == [4, 2]
+    assert batcher.batches == 2 and batcher.items == 6
+
+
+def test_lone_request_is_not_held_back():
+    async def run():
+        batcher = MicroBatcher(lambda items: items, max_batch=64, max_wait=0.01)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        assert await batcher.submit(1) == 1
+        await batcher.stop()
+        return loop.time() - started
+
+    assert asyncio.run(run()) < 0.5
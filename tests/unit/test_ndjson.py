@@ -0,0 +1,26 @@
+import json
+from datetime import datetime
+import pytest
+from src.utils.ndjson import NDJSONWriter, iter_message_file, clean_message
+
+def test_clean_message_drops_bytes_and_formats_dates():
+    msg = {"id": 1, "date": datetime(2025, 7, 12, 9, 0), "file_reference": b"\x00", "entities": [{"at": datetime(2025, 7, 12)}]}
+    assert clean_message(msg) == {"id": 1, "date": "2025-07-12T09:00:00", "entities": [{"at": "2025-07-12T00:00:00"}]}
+
+@pytest.mark.parametrize("filename", ["CheMed123.ndjson", "CheMed123.ndjson.gz"])
+def test_writer_appends_across_runs(tmp_path, filename):
+    path = str(tmp_path / "2025-07-12" / filename)
+    with NDJSONWriter(path, flush_every=1) as writer:
+        writer.write({"id": 1, "message": "ፋርማሲ"})
+    with NDJSONWriter(path) as writer:
+        writer.write({"id": 2, "date": datetime(2025, 7, 12)})
+
+    assert list(iter_message_file(path)) == [
+        {"id": 1, "message": "ፋርማሲ"},
+        {"id": 2, "date": "2025-07-12T00:00:00"},
+    ]
+
+def test_iter_message_file_reads_legacy_json(tmp_path):
+    path = tmp_path / "tikvahpharma.json"
+    path.write_text(json.dumps([{"id": 5}]), encoding="utf-8")
+    assert list(iter_message_file(str(path))) == [{"id": 5}]
@@ -0,0 +1,44 @@
+import json
+from datetime import datetime
+
+from src.utils.pg_copy import CopyStream, copy_field, copy_rows
+
+
+def test_copy_field_escapes_text_format_specials():
+    assert copy_field(None) == "\\N"
+    assert copy_field(datetime(2025, 7, 12)) == "2025-07-12T00:00:00"
+    assert copy_field("a\tb\nc\\d\r") == "a\\tb\\nc\\\\d\\r"
+    # JSON's own escapes survive the round trip through COPY
+    assert copy_field(json.dumps({"message": "line1\nline2"})) == '{"message": "line1\\\\nline2"}'
+
+
+def test_stream_is_read_lazily_in_chunks():
+    produced = []
+
+    def rows():
+        for i in range(1000):
+            produced.append(i)
+            yield i, "ፋርማሲ"
+
+    stream = CopyStream(rows())
+    first = stream.read(64)
+    assert len(first) == 64
+    assert len(produced) < 10
+
+    rest = b"".join(iter(lambda: stream.read(64), b""))
+    lines = (first + rest).decode("utf-8").splitlines()
+    assert lines[0] == "0\tፋርማሲ" and lines[-1] == "999\tፋርማሲ"
+    assert stream.rows == 1000
+
+
+class FakeCursor:
+    def copy_expert(self, sql, stream):
+        self.sql = sql
+        self.data = stream.read()
+
+
+def test_copy_rows_names_columns_and_counts_rows():
+    cursor = FakeCursor()
+    assert copy_rows(cursor, "staging", ("a", "b"), [(1, None), (2, "x")]) == 2
+    assert cursor.sql == "COPY staging (a, b) FROM STDIN"
+    assert cursor.data == b"1\t\\N\n2\tx\n"
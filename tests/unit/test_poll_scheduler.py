@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+from src.services.poll_scheduler import PollScheduler
+from src.services.scrape_state import WatermarkStore
+
+NOW = datetime(2025, 7, 12, 12, 0)
+
+
+def make_scheduler(tmp_path):
+    return PollScheduler(WatermarkStore(str(tmp_path / "state.json")),
+                         min_interval=timedelta(minutes=10), max_interval=timedelta(hours=24),
+                         target_posts_per_poll=20)
+
+
+def test_busy_channels_are_polled_more_often(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    for channel in ["@busy", "@quiet", "@dormant"]:
+        scheduler.record_poll(channel, 0, now=NOW - timedelta(hours=2))
+    scheduler.record_poll("@busy", 200, now=NOW)   # 100 posts/hour
+    scheduler.record_poll("@quiet", 4, now=NOW)    # 2 posts/hour
+    scheduler.record_poll("@dormant", 0, now=NOW)
+
+    assert scheduler.interval("@busy") == timedelta(minutes=12)
+    assert scheduler.interval("@quiet") == timedelta(hours=10)
+    assert scheduler.interval("@dormant") == timedelta(hours=24)
+
+
+def test_due_channels_respect_budget_and_overdueness(tmp_path):
+    scheduler = make_scheduler(tmp_path)
+    scheduler.record_poll("@a", 0, now=NOW - timedelta(hours=1))
+    scheduler.record_poll("@b", 0, now=NOW - timedelta(hours=3))
+
+    # never-polled channels first, then the most overdue
+    assert scheduler.due_channels(["@a", "@b", "@new"], budget=2, now=NOW) == ["@new", "@b"]
+    assert scheduler.due_channels(["@a", "@b", "@new"], budget=0.5, now=NOW) == []
+    assert scheduler.due_channels(["@a"], budget=5, now=NOW - timedelta(minutes=55)) == []
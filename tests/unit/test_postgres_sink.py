@@ -0,0 +1,159 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+from src.services.postgres_sink import PostgresSink
+from src.services.scrape_state import WatermarkStore
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def mogrify(self, template, args):
+        return repr(args).encode()
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append(sql)
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for execute_values; `down` makes every use fail."""
+
+    encoding = "UTF8"
+
+    def __init__(self, server):
+        self.server = server
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.server.commits += 1
+        return False
+
+    def cursor(self):
+        if self.server.down:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+class FakeServer:
+    def __init__(self):
+        self.down = False
+        self.commits = 0
+
+    def connect(self):
+        if self.down:
+            raise psycopg2.OperationalError("could not connect to server")
+        return FakeConnection(self)
+
+
+def message(message_id):
+    return SimpleNamespace(id=message_id, date=datetime(2025, 7, 12),
+                           to_dict=lambda: {"id": message_id, "message": "hi"})
+
+
+def flush(sink, force=False):
+    asyncio.run(sink.flush(force))
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+@pytest.fixture
+def watermarks(tmp_path):
+    return WatermarkStore(str(tmp_path / "watermarks.json"))
+
+
+def test_watermark_advances_with_flushed_rows(server, watermarks):
+    sink = PostgresSink(server.connect, watermarks)
+    for i in (1, 2, 3):
+        sink.add_message("chan", message(i))
+    flush(sink)
+    assert server.commits == 1 and sink.pending() == 0
+    assert watermarks.last_message_id("chan") == 3
+
+
+def test_buffer_is_capped_and_watermark_held_below_dropped_rows(server, watermarks):
+    server.down = True
+    sink = PostgresSink(server.connect, watermarks, max_rows=3)
+    for i in range(1, 6):
+        sink.add_message("chan", message(i))
+    assert sink.pending() == 3  # 1 and 2 dropped
+
+    server.down = False
+    flush(sink, force=True)
+    assert watermarks.last_message_id("chan") == 0  # so a backfill fetches 1 and 2 again
+
+    # The backfill re-fetches them: the hold is released and the watermark catches up
+    for i in (1, 2):
+        sink.add_message("chan", message(i))
+    flush(sink)
+    assert watermarks.last_message_id("chan") == 5
+
+
+def test_failed_flush_keeps_rows_and_retries_later(server, watermarks):
+    sink = PostgresSink(server.connect, watermarks)
+    sink.add_message("chan", message(1))
+    server.down = True
+    flush(sink)
+    assert sink.pending() == 1 and watermarks.last_message_id("chan") == 0
+
+    server.down = False
+    sink.add_message("chan", message(2))
+    flush(sink)  # still within the retry pause
+    assert server.commits == 0 and sink.pending() == 2
+
+    flush(sink, force=True)
+    assert server.commits == 1 and sink.pending() == 0
+    assert watermarks.last_message_id("chan") == 2
+
+
+def test_media_watermark_waits_for_downloads(server, watermarks):
+    sink = PostgresSink(server.connect, watermarks)
+
+    sink.media_started("chan", 10)
+    sink.media_started("chan", 11)
+    sink.add_media("chan", message(11), "chan_11.jpg")
+    sink.media_finished("chan", 11)
+    flush(sink)
+    assert watermarks.last_message_id("chan", "media") == 9  # 10 is still downloading
+
+    sink.add_media("chan", message(10), "chan_10.jpg")
+    sink.media_finished("chan", 10)
+    flush(sink)
+    assert watermarks.last_message_id("chan", "media") == 11
+
+    # A failed download holds the watermark like a dropped row...
+    sink.media_started("chan", 12)
+    sink.media_finished("chan", 12, saved=False)
+    sink.add_media("chan", message(13), "chan_13.jpg")
+    flush(sink)
+    assert watermarks.last_message_id("chan", "media") == 11
+
+    # ...until another scraper has fetched past it
+    nightly = WatermarkStore(watermarks.path)
+    nightly.update("chan", 20, stream="media")
+    nightly.save()
+    sink.add_media("chan", message(21), "chan_21.jpg")
+    flush(sink)
+    sink.add_media("chan", message(22), "chan_22.jpg")
+    flush(sink)
+    assert watermarks.last_message_id("chan", "media") == 22
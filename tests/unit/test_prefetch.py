@@ -0,0 +1,48 @@
+import threading
+import time
+from src.models.prefetch import Prefetcher, BackgroundWriter
+
+
+def test_prefetcher_keeps_order_and_reports_failures():
+    def load(n):
+        if n == 3:
+            raise ValueError("corrupt")
+        time.sleep(0.001 * (5 - n % 5))  # later items finish first
+        return n * 10
+
+    out = list(Prefetcher(range(8), load, workers=4, depth=3))
+    assert [item for item, _, _ in out] == list(range(8))
+    assert [value for _, value, _ in out if value is not None] == [0, 10, 20, 40, 50, 60, 70]
+    assert isinstance(out[3][2], ValueError)
+
+
+def test_prefetcher_loads_at_most_depth_ahead():
+    started = []
+    lock = threading.Lock()
+
+    def load(n):
+        with lock:
+            started.append(n)
+        return n
+
+    stream = iter(Prefetcher(range(100), load, workers=2, depth=4))
+    next(stream)
+    time.sleep(0.05)
+    assert len(started) <= 1 + 4
+    stream.close()
+
+
+def test_background_writer_handles_in_order_and_counts_failures():
+    seen = []
+
+    def handle(item):
+        if item == "bad":
+            raise OSError("disk full")
+        seen.append(item)
+
+    with BackgroundWriter(handle, depth=2) as writer:
+        for item in ["a", "bad", "b", "c"]:
+            writer.submit(item)
+
+    assert seen == ["a", "b", "c"]
+    assert writer.handled == 3 and writer.failed == 1
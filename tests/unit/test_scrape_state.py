@@ -0,0 +1,43 @@
+from datetime import datetime
+from src.services.scrape_state import WatermarkStore
+
+def test_watermark_only_moves_forward(tmp_path):
+    store = WatermarkStore(str(tmp_path / "state.json"))
+    assert store.get("@CheMed123") is None
+    assert store.last_message_id("@CheMed123") == 0
+
+    store.update("@CheMed123", 120, datetime(2025, 7, 12, 8, 30))
+    store.update("@CheMed123", 90, datetime(2025, 7, 11))
+    assert store.get("CheMed123") == {"last_message_id": 120, "last_date": "2025-07-12T08:30:00"}
+
+def test_watermarks_persist_per_stream(tmp_path):
+    path = str(tmp_path / "state" / "watermarks.json")
+    store = WatermarkStore(path)
+    store.update("@tikvahpharma", 10, stream="messages")
+    store.update("@tikvahpharma", 7, stream="media")
+    store.save()
+
+    reloaded = WatermarkStore(path)
+    assert reloaded.last_message_id("@tikvahpharma", "messages") == 10
+    assert reloaded.last_message_id("@tikvahpharma", "media") == 7
+
+def test_concurrent_stores_merge_instead_of_overwriting(tmp_path):
+    path = str(tmp_path / "watermarks.json")
+    nightly, daemon = WatermarkStore(path), WatermarkStore(path)
+
+    nightly.update("@CheMed123", 50, stream="messages")
+    nightly.update("@lobelia4cosmetics", 80, stream="media")
+    nightly.set_poll_stats("@CheMed123", {"interval": 600})
+    nightly.save()
+
+    # The daemon loaded the file before the nightly run saved
+    daemon.update("@CheMed123", 40, stream="messages")
+    daemon.update("@tikvahpharma", 9, stream="messages")
+    daemon.save()
+
+    stored = WatermarkStore(path)
+    assert stored.last_message_id("@CheMed123") == 50  # higher id wins
+    assert stored.last_message_id("@tikvahpharma") == 9
+    assert stored.last_message_id("@lobelia4cosmetics", "media") == 80
+    assert stored.poll_stats("@CheMed123") == {"interval": 600}
+    assert daemon.last_message_id("@CheMed123") == 50  # saving picks up others' state
@@ -0,0 +1,45 @@
+import os
+from src.models.sharding import run_sharded
+
+
+def init(worker_id):
+    return worker_id
+
+
+def handle(state, shard):
+    items, crash_marker = shard
+    if crash_marker and not os.path.exists(crash_marker):
+        open(crash_marker, "w").close()
+        os._exit(1)  # simulate a worker dying mid-shard (OOM kill, segfault)
+    if "bad" in items:
+        raise ValueError("corrupt image")
+    return [item * 2 for item in items]
+
+
+def run(shards, **kwargs):
+    done = {}
+    failed = run_sharded(shards, init, handle, lambda shard_id, out: done.update({shard_id: out}),
+                         poll_seconds=0.1, **kwargs)
+    return done, failed
+
+
+def test_all_shards_processed_across_workers():
+    shards = [([i, i + 1], None) for i in range(0, 20, 2)]
+    done, failed = run(shards, workers=3)
+    assert failed == []
+    assert [x for shard_id in sorted(done) for x in done[shard_id]] == [i * 2 for i in range(20)]
+
+
+def test_worker_crash_keeps_finished_work_and_retries_its_shard(tmp_path):
+    marker = str(tmp_path / "crashed")
+    shards = [([1], None), ([2], marker), ([3], None), ([4], None)]
+    done, failed = run(shards, workers=2, window=1)
+    assert os.path.exists(marker)
+    assert failed == []
+    assert done == {0: [2], 1: [4], 2: [6], 3: [8]}
+
+
+def test_failing_shard_is_reported_not_fatal():
+    done, failed = run([([1], None), (["bad"], None), ([3], None)], workers=2)
+    assert failed == [1]
+    assert done == {0: [2], 2: [6]}